@@ -1,12 +1,19 @@
 import os
+import sys
+import argparse
+import json
 import logging
+import threading
 import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from dotenv import load_dotenv
 import firebase_admin
 from firebase_admin import credentials, firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
 import mysql.connector
+from mysql.connector import errorcode, pooling
 import grpc
-from datetime import datetime
+from datetime import datetime, timezone
 
 # Configure logging
 logging.basicConfig(
@@ -27,144 +34,573 @@ DB_NAME = os.getenv("DB_NAME", "FOODMOOD_DB")
 # Firebase credentials file
 FIREBASE_CRED_PATH = "C:\\Users\\Administrator\\Desktop\\FOODMOOD Website\\FOODMOOD_DB_v4.0\\v1\\FirebaseFunctions\\functions\\foodmooddb-firebase-adminsdk-fbsvc-57554975cb.json"
 
-# Initialize Firebase
-try:
-    if not firebase_admin._apps:
-        cred = credentials.Certificate(FIREBASE_CRED_PATH)
-        firebase_admin.initialize_app(cred)
-        logging.info("Firebase initialized successfully.")
-except Exception as e:
-    logging.error(f"Error initializing Firebase: {e}")
-    exit(1)
-
-# Firestore Database
-db = firestore.client()
-
-# Connect to MySQL
-try:
-    connection = mysql.connector.connect(
-        host=DB_HOST,
-        user=DB_USER,
-        password=DB_PASS,
-        database=DB_NAME
+# Name of this job's row in the sync_state table
+SYNC_NAME = "firestore_users"
+
+# Rows per executemany()/DELETE batch; each batch is its own transaction
+SYNC_CHUNK_SIZE = int(os.getenv("SYNC_CHUNK_SIZE", "500"))
+
+# Hours of user_changes rows kept (make.py's profile cache polls the last few seconds)
+USER_CHANGES_KEEP_HOURS = int(os.getenv("USER_CHANGES_KEEP_HOURS", "24"))
+
+# --daemon: local flush endpoint + MySQL pool used by the snapshot writer
+SYNC_DAEMON_HOST = os.getenv("SYNC_DAEMON_HOST", "127.0.0.1")
+SYNC_DAEMON_PORT = int(os.getenv("SYNC_DAEMON_PORT", "3001"))
+SYNC_POOL_SIZE = int(os.getenv("SYNC_POOL_SIZE", "2"))
+
+# Firestore fields the web app stamps with serverTimestamp() on every write
+# (createdAt on registration, updatedAt whenever healthData is saved)
+CHANGE_FIELDS = ("updatedAt", "createdAt")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sync Firestore users into MySQL.")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Re-read every Firestore user instead of only those changed since the last sync.",
     )
-    cursor = connection.cursor()
-    logging.info("Connected to MySQL database successfully.")
-except mysql.connector.Error as err:
-    logging.error(f"Error connecting to MySQL: {err}")
-    exit(1)
-
-# Track how many users we insert/update/delete
-insert_count = 0
-update_count = 0
-delete_count = 0
-
-try:
-    # 1) Fetch all users from Firestore
-    users_ref = db.collection("users").stream()
-    firestore_docs = list(users_ref)  # Convert to list so we can count them
-    firestore_users = set()
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=SYNC_CHUNK_SIZE,
+        help=f"Users per upsert/delete batch (default {SYNC_CHUNK_SIZE}).",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Stay resident: follow Firestore with on_snapshot and serve POST /flush locally.",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=SYNC_DAEMON_PORT,
+        help=f"Port for the --daemon flush endpoint (default {SYNC_DAEMON_PORT}).",
+    )
+    return parser.parse_args()
+
+
+def init_firestore():
+    try:
+        if not firebase_admin._apps:
+            cred = credentials.Certificate(FIREBASE_CRED_PATH)
+            firebase_admin.initialize_app(cred)
+            logging.info("Firebase initialized successfully.")
+    except Exception as e:
+        logging.error(f"Error initializing Firebase: {e}")
+        sys.exit(1)
+    return firestore.client()
+
+
+def connect_mysql():
+    try:
+        connection = mysql.connector.connect(
+            host=DB_HOST,
+            user=DB_USER,
+            password=DB_PASS,
+            database=DB_NAME
+        )
+        logging.info("Connected to MySQL database successfully.")
+        return connection
+    except mysql.connector.Error as err:
+        logging.error(f"Error connecting to MySQL: {err}")
+        sys.exit(1)
+
+
+###############################################################################
+# SYNC CHECKPOINT (high-water mark of Firestore change timestamps)
+###############################################################################
+def ensure_state_table(cursor):
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sync_state (
+            SyncName  VARCHAR(64) PRIMARY KEY,
+            HighWater DATETIME(6) NOT NULL,
+            UpdatedAt DATETIME    NOT NULL
+        )
+        """
+    )
+
+
+def load_checkpoint(cursor):
+    """Return the stored high-water mark as an aware UTC datetime, or None."""
+    cursor.execute("SELECT HighWater FROM sync_state WHERE SyncName = %s", (SYNC_NAME,))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    return row[0].replace(tzinfo=timezone.utc)
+
+
+def save_checkpoint(cursor, high_water):
+    # Stored as naive UTC
+    naive = high_water.astimezone(timezone.utc).replace(tzinfo=None)
+    cursor.execute(
+        """
+        INSERT INTO sync_state (SyncName, HighWater, UpdatedAt)
+        VALUES (%s, %s, NOW())
+        ON DUPLICATE KEY UPDATE HighWater = VALUES(HighWater), UpdatedAt = NOW()
+        """,
+        (SYNC_NAME, naive)
+    )
+
+
+def change_time(user_data):
+    """Latest updatedAt/createdAt stamp on a user document, or None."""
+    stamps = [user_data.get(f) for f in CHANGE_FIELDS]
+    stamps = [s for s in stamps if isinstance(s, datetime)]
+    return max(stamps) if stamps else None
+
+
+###############################################################################
+# BATCHED UPSERT PIPELINE
+###############################################################################
+UPSERT_SQL = """
+    INSERT INTO users (UserID, weight, height, birthday, allergies, bloodType)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        weight    = VALUES(weight),
+        height    = VALUES(height),
+        birthday  = VALUES(birthday),
+        allergies = VALUES(allergies),
+        bloodType = VALUES(bloodType)
+"""
+
+
+# Every upsert/delete also logs its UserIDs here, in the same transaction, so
+# make.py can drop those users from its profile cache (migrations/006).
+# Without the table the sync still runs; make.py then falls back to dropping
+# its whole cache every few seconds.
+USER_CHANGES_SQL = "INSERT INTO user_changes (UserID, ChangedAt) VALUES (%s, NOW())"
+
+
+def missing_user_changes(err):
+    """True if `err` is MySQL's "table doesn't exist" for user_changes (logged as a warning)."""
+    if err.errno != errorcode.ER_NO_SUCH_TABLE:
+        return False
+    logging.warning("Table user_changes is missing (apply migrations/006_user_changes.sql); "
+                    "not logging changed users.")
+    return True
+
+
+def record_user_changes(cursor, user_ids):
+    try:
+        cursor.executemany(USER_CHANGES_SQL, [(user_id,) for user_id in user_ids])
+    except mysql.connector.ProgrammingError as err:
+        # A failed statement leaves the rest of the transaction (the users write) intact
+        if not missing_user_changes(err):
+            raise
+
+
+def prune_user_changes(cursor, connection):
+    try:
+        cursor.execute(
+            "DELETE FROM user_changes WHERE ChangedAt < NOW() - INTERVAL %s HOUR",
+            (USER_CHANGES_KEEP_HOURS,)
+        )
+    except mysql.connector.ProgrammingError as err:
+        if not missing_user_changes(err):
+            raise
+    connection.commit()
+
+
+def user_row(user_id, user_data):
+    """Normalize a Firestore user document into a `users` row tuple."""
+    # Extract nested healthData fields
+    health_data = user_data.get("healthData", {})
+    weight = health_data.get("weight", 0)
+    height = health_data.get("height", 0)
+    birthday_str = health_data.get("birthday", "2000-01-01")
+    allergies_list = health_data.get("allergies", [])
+    blood_type = health_data.get("bloodType", "Unknown")
+
+    # Convert allergies list to comma-separated string
+    if not isinstance(allergies_list, list):
+        allergies_list = []
+    allergies_str = ", ".join(allergies_list)
+
+    # Attempt to parse birthday
+    try:
+        birthday_parsed = datetime.strptime(birthday_str, "%Y-%m-%d").date()
+    except ValueError:
+        logging.warning(
+            f"Invalid birthday '{birthday_str}' for user {user_id}, using default 2000-01-01."
+        )
+        birthday_parsed = datetime(2000, 1, 1).date()
+
+    return (user_id, weight, height, birthday_parsed, allergies_str, blood_type)
+
+
+def chunked(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def upsert_rows(cursor, connection, rows, chunk_size):
+    """
+    Upsert row tuples with one executemany() per chunk, committing each chunk.
+    Returns the number of rows written.
+    """
+    written = 0
+    for batch in chunked(rows, chunk_size):
+        try:
+            cursor.executemany(UPSERT_SQL, batch)
+            record_user_changes(cursor, (row[0] for row in batch))
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        written += len(batch)
+        logging.info(f"Upserted {len(batch)} users (total {written}).")
+    return written
+
 
-    logging.info(f"Found {len(firestore_docs)} user documents in Firestore.")
+def delete_users(cursor, connection, user_ids, chunk_size):
+    """Delete users with batched `WHERE UserID IN (...)`, one transaction per chunk."""
+    deleted = 0
+    for batch in chunked(sorted(user_ids), chunk_size):
+        placeholders = ",".join(["%s"] * len(batch))
+        try:
+            cursor.execute(f"DELETE FROM users WHERE UserID IN ({placeholders})", batch)
+            count = cursor.rowcount
+            record_user_changes(cursor, batch)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        deleted += count
+        logging.info(f"Deleted {count} users missing from Firestore.")
+    return deleted
+
+
+###############################################################################
+# SYNC MODES
+###############################################################################
+def changed_user_docs(db, since):
+    """
+    Firestore user documents whose updatedAt or createdAt is newer than `since`.
+    One query per change field; a document matching both is returned once.
+    """
+    docs = {}
+    for field in CHANGE_FIELDS:
+        query = db.collection("users").where(filter=FieldFilter(field, ">", since))
+        for doc in query.stream():
+            docs[doc.id] = doc
+    return docs.values()
+
+
+def live_user_ids(db):
+    """
+    IDs of the user documents that have fields. An empty document is not a
+    user in any mode (user_rows skips it, the daemon removes it), so every
+    mode deletes the MySQL users missing from this set.
+    """
+    return {doc.id for doc in db.collection("users").stream() if doc.to_dict()}
 
-    # 2) Process each Firestore user doc
-    for user_doc in firestore_docs:
+
+def user_rows(user_docs, seen, marks):
+    """
+    Stream `users` row tuples out of Firestore documents.
+    Adds every applied UserID to `seen` and keeps the newest change stamp in marks["high_water"].
+    """
+    for user_doc in user_docs:
         user_id = user_doc.id
         user_data = user_doc.to_dict()
 
-        logging.info(f"Processing user: {user_id}")
-
         # If no data in the document, skip
         if not user_data:
             logging.warning(f"User {user_id} has an empty document; skipping.")
             continue
 
-        firestore_users.add(user_id)
+        seen.add(user_id)
+        stamp = change_time(user_data)
+        if stamp and (marks["high_water"] is None or stamp > marks["high_water"]):
+            marks["high_water"] = stamp
 
-        # Extract nested healthData fields
-        health_data = user_data.get("healthData", {})
-        weight = health_data.get("weight", 0)
-        height = health_data.get("height", 0)
-        birthday_str = health_data.get("birthday", "2000-01-01")
-        allergies_list = health_data.get("allergies", [])
-        blood_type = health_data.get("bloodType", "Unknown")
+        yield user_row(user_id, user_data)
 
-        # Convert allergies list to comma-separated string
-        if not isinstance(allergies_list, list):
-            allergies_list = []
-        allergies_str = ", ".join(allergies_list)
 
-        # Attempt to parse birthday
-        try:
-            birthday_parsed = datetime.strptime(birthday_str, "%Y-%m-%d").date()
-        except ValueError:
-            logging.warning(
-                f"Invalid birthday '{birthday_str}' for user {user_id}, using default 2000-01-01."
-            )
-            birthday_parsed = datetime(2000, 1, 1).date()
-
-        # 3) Check if user exists in MySQL
-        cursor.execute("SELECT UserID FROM users WHERE UserID = %s", (user_id,))
-        result = cursor.fetchone()
-
-        if not result:
-            # 4) User does NOT exist => INSERT
-            cursor.execute(
-                """
-                INSERT INTO users (UserID, weight, height, birthday, allergies, bloodType)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                """,
-                (user_id, weight, height, birthday_parsed, allergies_str, blood_type)
-            )
-            connection.commit()
-            insert_count += 1
-            logging.info(f"Inserted user {user_id} into MySQL.")
-        else:
-            # 5) User EXISTS => UPDATE
-            cursor.execute(
-                """
-                UPDATE users
-                SET weight = %s,
-                    height = %s,
-                    birthday = %s,
-                    allergies = %s,
-                    bloodType = %s
-                WHERE UserID = %s
-                """,
-                (weight, height, birthday_parsed, allergies_str, blood_type, user_id)
-            )
-            connection.commit()
-            update_count += 1
-            logging.info(f"Updated user {user_id} in MySQL.")
+def sync_users(db, connection, cursor, full, chunk_size=SYNC_CHUNK_SIZE):
+    """
+    Apply Firestore users to MySQL.
+      full=True  -> stream every user doc, delete MySQL users missing from it.
+      full=False -> only docs changed since the stored checkpoint; deletions are
+                    found by diffing against live_user_ids(), the same set full
+                    mode ends up with (empty documents don't count).
+    Returns (upserted, deleted, seconds).
+    """
+    started = time.monotonic()
+
+    ensure_state_table(cursor)
+    since = None if full else load_checkpoint(cursor)
+    if not full and since is None:
+        logging.info("No sync checkpoint yet; running a full sync.")
+    if since is None:
+        full = True
+
+    # 1) Stream the users to apply and upsert them chunk by chunk
+    if full:
+        logging.info("Streaming every user document from Firestore.")
+        user_docs = db.collection("users").stream()
+    else:
+        logging.info(f"Streaming user documents changed since {since.isoformat()}.")
+        user_docs = changed_user_docs(db, since)
+
+    firestore_users = set()
+    marks = {"high_water": since}
+    upserted = upsert_rows(cursor, connection, user_rows(user_docs, firestore_users, marks), chunk_size)
+
+    # 2) Identify MySQL users that are not in Firestore => DELETE them
+    if not full:
+        # Not list_documents(): it also returns empty (and missing) documents, which
+        # full mode treats as deleted
+        firestore_users = live_user_ids(db)
 
-    # 6) Identify MySQL users that are not in Firestore => DELETE them
     cursor.execute("SELECT UserID FROM users")
     mysql_users = {row[0] for row in cursor.fetchall()}
+    deleted = delete_users(cursor, connection, mysql_users - firestore_users, chunk_size)
 
-    # The set difference
-    users_to_delete = mysql_users - firestore_users
-
-    for user_id in users_to_delete:
-        cursor.execute("DELETE FROM users WHERE UserID = %s", (user_id,))
+    # 3) Move the checkpoint forward only after everything above is committed
+    high_water = marks["high_water"]
+    if high_water is not None and high_water != since:
+        save_checkpoint(cursor, high_water)
         connection.commit()
-        delete_count += 1
-        logging.info(f"Deleted user {user_id} from MySQL (not found in Firestore).")
-
-except grpc.RpcError as grpc_err:
-    logging.error(f"gRPC error: {grpc_err.code()} - {grpc_err.details()}")
-    time.sleep(2)  # Small retry delay if needed
-except mysql.connector.Error as err:
-    logging.error(f"Database error: {err}")
-except Exception as e:
-    logging.error(f"Unexpected error: {e}")
-finally:
-    if cursor:
-        cursor.close()
-    if connection:
-        connection.close()
-    logging.info("Database connection closed.")
-
-# Final summary
-logging.info(
-    f"Sync complete. Inserted: {insert_count}, Updated: {update_count}, Deleted: {delete_count}."
-)
\ No newline at end of file
+        logging.info(f"Sync checkpoint moved to {high_water.isoformat()}.")
+
+    prune_user_changes(cursor, connection)
+    return upserted, deleted, time.monotonic() - started
+
+
+###############################################################################
+# DAEMON MODE (on_snapshot listener + local flush endpoint)
+###############################################################################
+class SyncDaemon:
+    """
+    Follows the Firestore `users` collection with on_snapshot and applies the
+    changes to MySQL from a single writer thread using pooled connections.
+
+    The first snapshot contains every user, so startup doubles as a full sync
+    (users deleted while the daemon was down are removed then too).
+    """
+
+    def __init__(self, db, chunk_size):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.pool = pooling.MySQLConnectionPool(
+            pool_name="fetch_data_daemon",
+            pool_size=SYNC_POOL_SIZE,
+            host=DB_HOST,
+            user=DB_USER,
+            password=DB_PASS,
+            database=DB_NAME
+        )
+        self.cond = threading.Condition()
+        self.pending = {}         # UserID -> row tuple to upsert, or None to delete
+        self.initial_ids = None   # every UserID in the first snapshot (for the startup delete diff)
+        self.high_water = None
+        self.received = 0         # change batches received from Firestore
+        self.applied = 0          # change batches written to MySQL
+        self.ready = False        # first snapshot applied
+        self.upserted = 0
+        self.deleted = 0
+        self.last_error = None
+        self.watch = None
+
+    # --- Firestore side ---
+    def on_snapshot(self, col_snapshot, changes, read_time):
+        with self.cond:
+            if self.initial_ids is None:
+                # Empty documents are not users, as in sync_users
+                self.initial_ids = {doc.id for doc in col_snapshot if doc.to_dict()}
+            for change in changes:
+                user_id = change.document.id
+                if change.type.name == "REMOVED":
+                    self.pending[user_id] = None
+                    continue
+                user_data = change.document.to_dict()
+                if not user_data:
+                    logging.warning(f"User {user_id} has an empty document; removing it from MySQL.")
+                    self.pending[user_id] = None
+                    continue
+                self.pending[user_id] = user_row(user_id, user_data)
+                stamp = change_time(user_data)
+                if stamp and (self.high_water is None or stamp > self.high_water):
+                    self.high_water = stamp
+            self.received += 1
+            self.cond.notify_all()
+
+    # --- MySQL side ---
+    def writer(self):
+        while True:
+            with self.cond:
+                while not self.pending and self.initial_ids is None:
+                    self.cond.wait()
+                while not self.pending and self.applied == self.received:
+                    self.cond.wait()
+                batch, self.pending = self.pending, {}
+                initial_ids, self.initial_ids = self.initial_ids, set()
+                target = self.received
+                high_water = self.high_water
+            try:
+                upserted, deleted = self.apply(batch, initial_ids, high_water)
+                error = None
+            except Exception as e:
+                logging.error(f"Daemon write failed, will retry: {e}")
+                upserted = deleted = 0
+                error = str(e)
+            with self.cond:
+                if error:
+                    # Put the batch back unless newer changes for the same users arrived
+                    for user_id, row in batch.items():
+                        self.pending.setdefault(user_id, row)
+                    if initial_ids:
+                        self.initial_ids = initial_ids
+                else:
+                    self.applied = target
+                    self.ready = True
+                self.upserted += upserted
+                self.deleted += deleted
+                self.last_error = error
+                self.cond.notify_all()
+            if error:
+                time.sleep(2)
+
+    def apply(self, batch, initial_ids, high_water):
+        rows = [row for row in batch.values() if row is not None]
+        to_delete = {user_id for user_id, row in batch.items() if row is None}
+
+        connection = self.pool.get_connection()
+        cursor = connection.cursor()
+        try:
+            if initial_ids:
+                cursor.execute("SELECT UserID FROM users")
+                to_delete |= {row[0] for row in cursor.fetchall()} - initial_ids
+            upserted = upsert_rows(cursor, connection, rows, self.chunk_size)
+            deleted = delete_users(cursor, connection, to_delete, self.chunk_size)
+            if high_water is not None:
+                ensure_state_table(cursor)
+                save_checkpoint(cursor, high_water)
+                connection.commit()
+            prune_user_changes(cursor, connection)
+            return upserted, deleted
+        finally:
+            cursor.close()
+            connection.close()
+
+    def flush(self, timeout):
+        """Wait until every change received so far is in MySQL. Returns True if it drained in time."""
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            target = self.received
+            while not self.ready or self.applied < target or self.pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.cond.wait(remaining)
+            return True
+
+    def status(self):
+        with self.cond:
+            return {
+                "ready":     self.ready,
+                "pending":   len(self.pending),
+                "upserted":  self.upserted,
+                "deleted":   self.deleted,
+                "lastError": self.last_error,
+            }
+
+    def start(self):
+        threading.Thread(target=self.writer, daemon=True).start()
+        self.watch = self.db.collection("users").on_snapshot(self.on_snapshot)
+
+
+def make_handler(daemon):
+    class FlushHandler(BaseHTTPRequestHandler):
+        def _reply(self, code, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                return self._reply(200, daemon.status())
+            self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            # POST /flush => ack once every change seen so far is written to MySQL
+            if self.path != "/flush":
+                return self._reply(404, {"error": "not found"})
+            drained = daemon.flush(timeout=10)
+            payload = daemon.status()
+            payload["success"] = drained
+            self._reply(200 if drained else 504, payload)
+
+        def log_message(self, fmt, *args):
+            logging.info(f"flush endpoint: {fmt % args}")
+
+    return FlushHandler
+
+
+def run_daemon(db, chunk_size, port):
+    daemon = SyncDaemon(db, chunk_size)
+    daemon.start()
+    server = ThreadingHTTPServer((SYNC_DAEMON_HOST, port), make_handler(daemon))
+    logging.info(f"Sync daemon listening on http://{SYNC_DAEMON_HOST}:{port} (POST /flush, GET /health).")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if daemon.watch:
+            daemon.watch.unsubscribe()
+        server.server_close()
+        logging.info("Sync daemon stopped.")
+
+
+def main():
+    args = parse_args()
+    db = init_firestore()
+    if args.daemon:
+        run_daemon(db, args.chunk_size, args.port)
+        return
+    connection = connect_mysql()
+    cursor = connection.cursor()
+
+    # Track how many users we upsert/delete
+    upserted = deleted = 0
+    seconds = 0.0
+
+    try:
+        upserted, deleted, seconds = sync_users(db, connection, cursor, args.full, args.chunk_size)
+    except grpc.RpcError as grpc_err:
+        logging.error(f"gRPC error: {grpc_err.code()} - {grpc_err.details()}")
+        time.sleep(2)  # Small retry delay if needed
+    except mysql.connector.Error as err:
+        logging.error(f"Database error: {err}")
+    except Exception as e:
+        logging.error(f"Unexpected error: {e}")
+    finally:
+        if cursor:
+            cursor.close()
+        if connection:
+            connection.close()
+        logging.info("Database connection closed.")
+
+    # Final summary
+    rate = (upserted + deleted) / seconds if seconds > 0 else 0.0
+    logging.info(
+        f"Sync complete. Upserted: {upserted}, Deleted: {deleted} "
+        f"in {seconds:.2f}s ({rate:.1f} rows/sec)."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,60 @@
 const express = require("express");
 const { spawn } = require("child_process");
+const http = require("http");
 const path = require("path");
 
 const app = express();
 const PORT = 3000;
 
+// Resident sync daemon started with: python fetch_data.py --daemon
+const SYNC_DAEMON_URL = process.env.SYNC_DAEMON_URL || "http://127.0.0.1:3001";
+
 app.use(express.json());
 
-// POST /run-fetch-data => calls python fetch_data.py
-app.post("/run-fetch-data", (req, res) => {
+/**
+ * POST /flush to the sync daemon.
+ * Resolves with {statusCode, body}; rejects when the daemon can't be reached.
+ * @return {Promise<{statusCode: number, body: string}>}
+ */
+function flushSyncDaemon() {
+  return new Promise((resolve, reject) => {
+    const req = http.request(`${SYNC_DAEMON_URL}/flush`, {method: "POST"}, (resp) => {
+      let body = "";
+      resp.setEncoding("utf8");
+      resp.on("data", (chunk) => {
+        body += chunk;
+      });
+      resp.on("end", () => resolve({statusCode: resp.statusCode, body}));
+    });
+    req.on("error", reject);
+    req.end();
+  });
+}
+
+// POST /run-fetch-data => ask the sync daemon to flush, or fall back to running fetch_data.py
+app.post("/run-fetch-data", async (req, res) => {
+  let flush = null;
+  try {
+    flush = await flushSyncDaemon();
+  } catch (err) {
+    // Daemon not running => one-off sync below
+  }
+
+  if (flush) {
+    // 504 = the daemon is up but still writing; passed through so callers can retry later
+    const status = flush.statusCode === 200 ? 200 : (flush.statusCode === 504 ? 504 : 500);
+    const messages = {
+      200: "Sync daemon flushed.",
+      504: "Sync daemon did not drain in time.",
+      500: "Sync daemon flush failed.",
+    };
+    return res.status(status).json({
+      success: status === 200,
+      message: messages[status],
+      logs: flush.body,
+    });
+  }
+
   // Path to your fetch_data.py:
   const pythonScriptPath = path.join(__dirname, "fetch_data.py");
 
@@ -0,0 +1,13 @@
+"""
+Benchmark suite for make.py.
+
+    python -m bench run --scale 10000 --requests 200 --out bench_output.json
+    python -m bench run --backend mysql --scale 100000 --out mysql.json
+    python -m bench compare before.json after.json
+
+Pieces:
+  standin.py - sqlite-backed stand-in for MySQL (default backend, no network)
+  datagen.py - seeded synthetic data for every table at a configurable scale
+  driver.py  - replays requests through Flask's test client and reports
+               throughput, p50/p95/p99 latency and queries per request
+"""
@@ -0,0 +1,54 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+
+import make
+from bench import driver, standin
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Benchmark make.py endpoints.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Generate data and drive the routes.")
+    run.add_argument("--backend", choices=["standin", "mysql"], default="standin",
+                     help="standin = in-process sqlite (default); mysql = DB_* settings from make.py")
+    run.add_argument("--db-file", help="sqlite file for the stand-in (default: a fresh temp file)")
+    run.add_argument("--scale", type=int, default=10000, help="moodentry rows to generate (default 10000)")
+    run.add_argument("--requests", type=int, default=200, help="requests per route (default 200)")
+    run.add_argument("--routes", help=f"comma-separated subset of: {','.join(driver.ROUTES)}")
+    run.add_argument("--seed", type=int, default=1)
+    run.add_argument("--no-generate", action="store_true", help="reuse the data already in the database")
+    run.add_argument("--out", default="bench_output.json")
+
+    cmp_ = sub.add_parser("compare", help="Diff two saved reports.")
+    cmp_.add_argument("old")
+    cmp_.add_argument("new")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.old) as f_old, open(args.new) as f_new:
+            for line in driver.compare(json.load(f_old), json.load(f_new)):
+                print(line)
+        return
+
+    if args.backend == "mysql":
+        connect = make.db_pool._connect
+    else:
+        path = args.db_file or os.path.join(tempfile.mkdtemp(prefix="foodmood-bench-"), "bench.sqlite3")
+        connect = standin.connect_factory(path)
+        print(f"Stand-in database: {path}", file=sys.stderr)
+
+    routes = [r.strip() for r in args.routes.split(",")] if args.routes else None
+    report = driver.run(connect, args.backend, args.scale, args.requests,
+                        routes=routes, seed=args.seed, generate=not args.no_generate)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
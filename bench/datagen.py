@@ -0,0 +1,208 @@
+"""
+Synthetic data generator for the benchmark suite.
+
+Fills the catalog tables (fooditems, ingredients, food_ingredient, allergens)
+and the per-user tables (users, moodentry, foodsuggestion, user_eaten,
+notifications) at a configurable scale. `scale` is the number of moodentry
+rows; the other tables are sized from it:
+
+    users          scale / 20   (at least 10)
+    foodsuggestion scale        (one per mood entry on average)
+    user_eaten     scale / 4
+    notifications  users / 2
+
+Everything is driven by a seeded RNG, so the same (scale, seed) always
+produces the same data.
+"""
+import random
+import datetime
+
+MOODS = ["MD01", "MD02", "MD03", "MD04"]
+BLOOD_TYPES = ["A", "B", "O", "AB"]
+ALLERGENS = [
+    "Milk", "Egg", "Fish", "Shellfish", "Tree nuts", "Peanuts", "Wheat",
+    "Soy", "Sesame", "Celery", "Mustard", "Lupin", "Molluscs", "Sulphites",
+]
+FREQUENCIES = ["once", "daily", "3days", "5days", "weekly", "monthly"]
+
+CHUNK = 5000
+
+
+def user_id(n):
+    return f"U{n:07d}"
+
+
+def food_id(n):
+    return f"F{n:03d}"
+
+
+def _insert(conn, sql, rows):
+    """executemany() in chunks, one commit per chunk. Returns the row count."""
+    cursor = conn.cursor()
+    total = 0
+    batch = []
+    try:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= CHUNK:
+                cursor.executemany(sql, batch)
+                conn.commit()
+                total += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+            conn.commit()
+            total += len(batch)
+    finally:
+        cursor.close()
+    return total
+
+
+def _max_id(conn, table, column):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT MAX({column}) FROM {table}")
+        row = cursor.fetchone()
+        return row[0] or 0
+    finally:
+        cursor.close()
+
+
+def generate_catalog(conn, rng, foods=100, ingredients=300):
+    """Catalog tables. Skipped when fooditems already has rows."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM fooditems")
+    existing = cursor.fetchone()[0]
+    cursor.close()
+    if existing:
+        return {"fooditems": existing}
+
+    counts = {}
+    counts["allergens"] = _insert(
+        conn,
+        "INSERT INTO allergens (AL_ID, AL_Title) VALUES (%s, %s)",
+        ((f"AL{i:02d}", title) for i, title in enumerate(ALLERGENS, start=1)),
+    )
+
+    def ingredient_rows():
+        for i in range(1, ingredients + 1):
+            blood = ", ".join(sorted(rng.sample(BLOOD_TYPES, rng.randint(2, 4))))
+            allergy = None
+            if rng.random() < 0.2:
+                allergy = ", ".join(f"AL{a:02d}" for a in sorted(rng.sample(range(1, len(ALLERGENS) + 1), rng.randint(1, 2))))
+            yield (f"I{i:04d}", f"Ingredient {i}", allergy, blood)
+
+    counts["ingredients"] = _insert(
+        conn,
+        "INSERT INTO ingredients (IngredientID, IngredientName, Allergy, BloodType) VALUES (%s, %s, %s, %s)",
+        ingredient_rows(),
+    )
+
+    def food_rows():
+        for i in range(1, foods + 1):
+            moods = ", ".join(sorted(rng.sample(MOODS, rng.randint(1, 2))))
+            lo = rng.choice([1, 7, 13, 18])
+            hi = rng.choice([60, 80, 99])
+            yield (food_id(i), f"Food {i}", f"images/{food_id(i)}.jpg", moods,
+                   rng.choice(["N/A", "N/A", "<25"]), f"{lo}-{hi}", lo, hi)
+
+    counts["fooditems"] = _insert(
+        conn,
+        """INSERT INTO fooditems (FoodID, FoodName, ImageURL, MoodCategoryID, BMI, age_range, age_min, age_max)
+           VALUES (%s, %s, %s, %s, %s, %s, %s, %s)""",
+        food_rows(),
+    )
+
+    def link_rows():
+        for i in range(1, foods + 1):
+            for ing in sorted(rng.sample(range(1, ingredients + 1), rng.randint(3, 8))):
+                yield (food_id(i), f"I{ing:04d}")
+
+    counts["food_ingredient"] = _insert(
+        conn, "INSERT INTO food_ingredient (FoodID, IngredientID) VALUES (%s, %s)", link_rows()
+    )
+    return counts
+
+
+def generate(conn, scale, seed=1, foods=100):
+    """
+    Fill every table for `scale` mood entries. Existing rows are kept;
+    generated auto-increment IDs continue after the current maximum.
+    Returns {table: rows inserted} plus the generated `user_ids`.
+    """
+    rng = random.Random(seed)
+    now = datetime.datetime.now().replace(microsecond=0)
+    n_users = max(10, scale // 20)
+    counts = generate_catalog(conn, rng, foods=foods)
+
+    first_user = _max_id(conn, "users", "CAST(SUBSTR(UserID, 2) AS UNSIGNED)") + 1
+    user_ids = [user_id(n) for n in range(first_user, first_user + n_users)]
+
+    def users():
+        for uid in user_ids:
+            birthday = datetime.date(rng.randint(1950, 2015), rng.randint(1, 12), rng.randint(1, 28))
+            allergies = ", ".join(rng.sample(ALLERGENS, rng.choice([0, 0, 0, 1, 2])))
+            yield (uid, rng.randint(40, 110), rng.randint(140, 195), birthday, allergies,
+                   rng.choice(BLOOD_TYPES) + rng.choice(["+", "-", ""]))
+
+    counts["users"] = _insert(
+        conn,
+        "INSERT INTO users (UserID, weight, height, birthday, allergies, bloodType) VALUES (%s, %s, %s, %s, %s, %s)",
+        users(),
+    )
+
+    def random_time(days=365):
+        return now - datetime.timedelta(seconds=rng.randint(0, days * 86400))
+
+    first_entry = _max_id(conn, "moodentry", "MoodEntryID") + 1
+    entries = []  # (MoodEntryID, UserID, mood, DateTime), kept small enough to link suggestions
+
+    def mood_rows():
+        for i in range(first_entry, first_entry + scale):
+            row = (i, rng.choice(user_ids), rng.choice(MOODS), rng.randint(1, 10), random_time())
+            if len(entries) < 200000:
+                entries.append((row[0], row[1], row[2], row[4]))
+            yield row
+
+    counts["moodentry"] = _insert(
+        conn,
+        "INSERT INTO moodentry (MoodEntryID, UserID, MoodCategoryID, MoodIntensity, DateTime) VALUES (%s, %s, %s, %s, %s)",
+        mood_rows(),
+    )
+
+    def suggestion_rows():
+        for _ in range(scale):
+            entry_id, uid, mood, dt = rng.choice(entries)
+            yield (entry_id, uid, food_id(rng.randint(1, foods)), mood, dt,
+                   "Eaten" if rng.random() < 0.25 else None)
+
+    counts["foodsuggestion"] = _insert(
+        conn,
+        """INSERT INTO foodsuggestion (MoodEntryID, UserID, FoodID, MoodCategoryID, SuggestedDate, EatenFlag)
+           VALUES (%s, %s, %s, %s, %s, %s)""",
+        suggestion_rows(),
+    )
+
+    def eaten_rows():
+        for _ in range(scale // 4):
+            yield (rng.choice(user_ids), food_id(rng.randint(1, foods)), random_time(), rng.choice(MOODS))
+
+    counts["user_eaten"] = _insert(
+        conn,
+        "INSERT INTO user_eaten (UserID, FoodID, EatenDateTime, FeelBetter) VALUES (%s, %s, %s, %s)",
+        eaten_rows(),
+    )
+
+    def notification_rows():
+        for uid in user_ids[: len(user_ids) // 2]:
+            remind = now + datetime.timedelta(minutes=rng.randint(-60, 7 * 24 * 60))
+            yield (f"{uid.lower()}@example.com", remind, now, 0, rng.choice(FREQUENCIES))
+
+    counts["notifications"] = _insert(
+        conn,
+        "INSERT INTO notifications (Email, RemindTime, CreatedAt, SentFlag, Frequency) VALUES (%s, %s, %s, %s, %s)",
+        notification_rows(),
+    )
+
+    counts["user_ids"] = user_ids
+    return counts
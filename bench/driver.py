@@ -0,0 +1,221 @@
+"""
+Load driver: replays requests against make.py's Flask app through the test
+client (no sockets) and reports per-route throughput, latency percentiles and
+queries per request.
+"""
+import sys
+import time
+import random
+import platform
+import datetime
+import threading
+import statistics
+
+import make
+from bench import datagen
+
+
+class CountingCursor:
+    """Cursor proxy that counts execute()/executemany() issued from the driver thread."""
+
+    def __init__(self, cursor, counter):
+        self._cursor = cursor
+        self._counter = counter
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, *args, **kwargs):
+        self._counter.hit()
+        return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self._counter.hit()
+        return self._cursor.executemany(*args, **kwargs)
+
+
+class CountingConnection:
+    def __init__(self, raw, counter):
+        self._raw = raw
+        self._counter = counter
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        return CountingCursor(self._raw.cursor(*args, **kwargs), self._counter)
+
+
+class QueryCounter:
+    """Counts queries made by one thread (the driver), ignoring background threads."""
+
+    def __init__(self):
+        self.thread_id = threading.get_ident()
+        self.count = 0
+
+    def hit(self):
+        if threading.get_ident() == self.thread_id:
+            self.count += 1
+
+
+def install(connect, counter, pool_size=10):
+    """Point make.py's pool at `connect`, wrapping every connection in a query counter."""
+    make.db_pool = make.ConnectionPool(
+        connect=lambda: CountingConnection(connect(), counter),
+        size=pool_size,
+        timeout=make.DB_POOL_TIMEOUT,
+        ping_after=make.DB_POOL_PING_AFTER,
+        recycle=make.DB_POOL_RECYCLE,
+    )
+    make.food_catalog.invalidate()
+
+
+class Context:
+    """Random but reproducible request parameters drawn from the generated data."""
+
+    def __init__(self, user_ids, foods, seed):
+        self.rng = random.Random(seed)
+        self.user_ids = user_ids
+        self.foods = foods
+
+    def user(self):
+        return self.rng.choice(self.user_ids)
+
+    def food(self):
+        return datagen.food_id(self.rng.randint(1, self.foods))
+
+    def date_range(self, days=90):
+        end = datetime.date.today()
+        return (end - datetime.timedelta(days=days)).isoformat(), end.isoformat()
+
+
+# name -> ctx -> (method, url, json body or None)
+ROUTES = {
+    "save_mood":        lambda c: ("POST", "/save_mood",
+                                   {"userID": c.user(), "moodCategoryID": c.rng.choice(datagen.MOODS), "moodIntensity": 5}),
+    "moodentry":        lambda c: ("GET", f"/moodentry?userId={c.user()}", None),
+    "moodsummary":      lambda c: ("GET", f"/moodsummary?userId={c.user()}&range={c.rng.choice(['weekly', 'monthly'])}", None),
+    "moodsummary_all":  lambda c: ("GET", "/moodsummary?range=weekly", None),
+    "foodsuggestion":   lambda c: ("GET", f"/foodsuggestion?userId={c.user()}", None),
+    "foodsugg_history": lambda c: ("GET", f"/foodsugg_history?userId={c.user()}", None),
+    "report_data":      lambda c: ("GET", "/report_data?userId={}&start={}&end={}".format(c.user(), *c.date_range()), None),
+    "ourmenu":          lambda c: ("GET", "/ourmenu", None),
+    "foodingredient":   lambda c: ("GET", f"/foodingredient?foodId={c.food()}", None),
+    "food_eaten_info":  lambda c: ("GET", f"/food_eaten_info?foodId={c.food()}", None),
+}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run_route(client, name, ctx, counter, requests):
+    build = ROUTES[name]
+    latencies = []
+    queries = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        method, url, body = build(ctx)
+        counter.count = 0
+        t0 = time.perf_counter()
+        if method == "POST":
+            resp = client.post(url, json=body)
+        else:
+            resp = client.get(url)
+        resp.get_data()  # drain streamed bodies inside the timed window
+        resp.close()     # runs call_on_close hooks, returning pooled connections
+        latencies.append((time.perf_counter() - t0) * 1000)
+        queries.append(counter.count)
+        if resp.status_code >= 400:
+            errors += 1
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests":            requests,
+        "errors":              errors,
+        "throughput_rps":      round(requests / elapsed, 2) if elapsed else 0.0,
+        "mean_ms":             round(statistics.mean(latencies), 3),
+        "p50_ms":              round(percentile(latencies, 50), 3),
+        "p95_ms":              round(percentile(latencies, 95), 3),
+        "p99_ms":              round(percentile(latencies, 99), 3),
+        "queries_per_request": round(statistics.mean(queries), 2),
+    }
+
+
+def run(connect, backend, scale, requests, routes=None, seed=1, generate=True):
+    """
+    Generate data (optional), then drive every route `requests` times.
+    Returns the JSON-serializable report.
+    """
+    counter = QueryCounter()
+    install(connect, counter)
+
+    gen_seconds = 0.0
+    conn = connect()
+    try:
+        if generate:
+            t0 = time.perf_counter()
+            counts = datagen.generate(conn, scale, seed=seed)
+            gen_seconds = time.perf_counter() - t0
+            user_ids = counts.pop("user_ids")
+            make.backfill_mood_rollup()
+        else:
+            counts = {}
+            cursor = conn.cursor()
+            cursor.execute("SELECT UserID FROM users LIMIT 10000")
+            user_ids = [row[0] for row in cursor.fetchall()]
+            cursor.close()
+    finally:
+        conn.close()
+
+    ctx = Context(user_ids, foods=100, seed=seed)
+    client = make.app.test_client()
+    results = {}
+    for name in routes or ROUTES:
+        results[name] = run_route(client, name, ctx, counter, requests)
+        print(f"{name:<18} {results[name]['throughput_rps']:>9.1f} req/s  "
+              f"p50 {results[name]['p50_ms']:>8.2f} ms  p99 {results[name]['p99_ms']:>8.2f} ms  "
+              f"{results[name]['queries_per_request']:>5.1f} q/req", file=sys.stderr)
+
+    return {
+        "meta": {
+            "backend":            backend,
+            "scale":              scale,
+            "seed":               seed,
+            "requests_per_route": requests,
+            "generated_rows":     counts,
+            "generate_seconds":   round(gen_seconds, 2),
+            "timestamp":          datetime.datetime.now().isoformat(timespec="seconds"),
+            "python":             platform.python_version(),
+            "suggestion_engine":  make.SUGGESTION_ENGINE,
+        },
+        "routes": results,
+    }
+
+
+def compare(old, new):
+    """Per-route deltas between two reports (new vs old), as printable lines."""
+    lines = []
+    for name, after in new["routes"].items():
+        before = old["routes"].get(name)
+        if not before:
+            lines.append(f"{name:<18} (new route)")
+            continue
+        parts = []
+        for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms", "queries_per_request"):
+            if before[key]:
+                change = (after[key] - before[key]) / before[key] * 100
+                parts.append(f"{key} {before[key]} -> {after[key]} ({change:+.1f}%)")
+            else:
+                parts.append(f"{key} {before[key]} -> {after[key]}")
+        lines.append(f"{name:<18} " + " | ".join(parts))
+    return lines
@@ -0,0 +1,284 @@
+"""
+In-process stand-in for MySQL, backed by sqlite3.
+
+Gives make.py something to talk to when no MySQL server is around: connections
+look enough like mysql.connector ones for the app's queries (`%s` params,
+dictionary cursors, NOW(), INTERVAL arithmetic, REGEXP, SUBSTRING_INDEX,
+ON DUPLICATE KEY UPDATE, ...). It is a benchmarking aid, not a MySQL emulator:
+timings are only comparable between runs on the same backend.
+"""
+import re
+import sqlite3
+import datetime
+from contextlib import contextmanager
+from functools import lru_cache
+
+import mysql.connector
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    UserID     TEXT PRIMARY KEY,
+    weight     REAL,
+    height     REAL,
+    birthday   DATE,
+    allergies  TEXT,
+    bloodType  TEXT
+);
+CREATE TABLE IF NOT EXISTS user_changes (
+    ChangeSeq INTEGER PRIMARY KEY AUTOINCREMENT,
+    UserID    TEXT,
+    ChangedAt DATETIME
+);
+CREATE INDEX IF NOT EXISTS idx_user_changes_at ON user_changes (ChangedAt);
+CREATE TABLE IF NOT EXISTS moodentry (
+    MoodEntryID    INTEGER PRIMARY KEY AUTOINCREMENT,
+    UserID         TEXT,
+    MoodCategoryID TEXT,
+    MoodIntensity  INTEGER,
+    DateTime       DATETIME
+);
+CREATE INDEX IF NOT EXISTS idx_moodentry_user_dt ON moodentry (UserID, DateTime, MoodEntryID);
+CREATE INDEX IF NOT EXISTS idx_moodentry_dt ON moodentry (DateTime, MoodEntryID);
+CREATE TABLE IF NOT EXISTS mood_daily_user (
+    UserID         TEXT,
+    Day            DATE,
+    MoodCategoryID TEXT,
+    MoodCount      INTEGER DEFAULT 0,
+    PRIMARY KEY (UserID, Day, MoodCategoryID)
+);
+CREATE INDEX IF NOT EXISTS idx_mood_daily_day ON mood_daily_user (Day, MoodCategoryID, MoodCount);
+CREATE TABLE IF NOT EXISTS foodsuggestion (
+    SuggestionID   INTEGER PRIMARY KEY AUTOINCREMENT,
+    MoodEntryID    INTEGER,
+    UserID         TEXT,
+    FoodID         TEXT,
+    MoodCategoryID TEXT,
+    SuggestedDate  DATETIME,
+    EatenFlag      TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_foodsuggestion_user_entry ON foodsuggestion (UserID, MoodEntryID);
+CREATE INDEX IF NOT EXISTS idx_foodsuggestion_user_food ON foodsuggestion (UserID, FoodID, SuggestedDate);
+CREATE INDEX IF NOT EXISTS idx_foodsuggestion_user_date ON foodsuggestion (UserID, SuggestedDate, SuggestionID);
+CREATE TABLE IF NOT EXISTS user_eaten (
+    EatenID       INTEGER PRIMARY KEY AUTOINCREMENT,
+    UserID        TEXT,
+    FoodID        TEXT,
+    EatenDateTime DATETIME,
+    FeelBetter    TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_user_eaten_user_dt ON user_eaten (UserID, EatenDateTime);
+CREATE TABLE IF NOT EXISTS notifications (
+    NotificationID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Email          TEXT,
+    RemindTime     DATETIME,
+    CreatedAt      DATETIME,
+    SentFlag       INTEGER DEFAULT 0,
+    Frequency      TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_notifications_due ON notifications (SentFlag, RemindTime);
+CREATE TABLE IF NOT EXISTS fooditems (
+    FoodID         TEXT PRIMARY KEY,
+    FoodName       TEXT,
+    ImageURL       TEXT,
+    MoodCategoryID TEXT,
+    BMI            TEXT,
+    age_range      TEXT,
+    age_min        INTEGER,
+    age_max        INTEGER
+);
+CREATE TABLE IF NOT EXISTS ingredients (
+    IngredientID   TEXT PRIMARY KEY,
+    IngredientName TEXT,
+    Allergy        TEXT,
+    BloodType      TEXT
+);
+CREATE TABLE IF NOT EXISTS food_ingredient (
+    FoodID       TEXT,
+    IngredientID TEXT,
+    PRIMARY KEY (FoodID, IngredientID)
+);
+CREATE INDEX IF NOT EXISTS idx_food_ingredient_ing ON food_ingredient (IngredientID, FoodID);
+CREATE TABLE IF NOT EXISTS allergens (
+    AL_ID    TEXT PRIMARY KEY,
+    AL_Title TEXT
+);
+CREATE TABLE IF NOT EXISTS food_mood (
+    FoodID         TEXT,
+    MoodCategoryID TEXT,
+    PRIMARY KEY (MoodCategoryID, FoodID)
+);
+CREATE TABLE IF NOT EXISTS ingredient_bloodtype (
+    IngredientID TEXT,
+    BloodType    TEXT,
+    PRIMARY KEY (BloodType, IngredientID)
+);
+CREATE TABLE IF NOT EXISTS ingredient_allergen (
+    IngredientID TEXT,
+    AL_ID        TEXT,
+    PRIMARY KEY (AL_ID, IngredientID)
+);
+"""
+
+# MySQL spellings -> sqlite, applied in order
+_REWRITES = [
+    (re.compile(r"%s"), "?"),
+    (re.compile(r"NOW\(\)\s*([-+])\s*INTERVAL\s+(\?|\d+)\s+(SECOND|MINUTE|HOUR|DAY)", re.I),
+     r"datetime(NOW(), '\1' || \2 || ' \3S')"),
+    (re.compile(r"AS\s+UNSIGNED", re.I), "AS INTEGER"),
+    (re.compile(r"FOR\s+UPDATE(\s+SKIP\s+LOCKED)?", re.I), ""),
+]
+_UPSERT = re.compile(r"ON\s+DUPLICATE\s+KEY\s+UPDATE", re.I)
+_VALUES_REF = re.compile(r"VALUES\((\w+)\)", re.I)
+
+
+@lru_cache(maxsize=512)
+def translate(sql):
+    """Rewrite one MySQL statement into sqlite syntax."""
+    for pattern, repl in _REWRITES:
+        sql = pattern.sub(repl, sql)
+    m = _UPSERT.search(sql)
+    if m:
+        head, tail = sql[:m.start()], sql[m.end():]
+        sql = head + "ON CONFLICT DO UPDATE SET" + _VALUES_REF.sub(r"excluded.\1", tail)
+    return sql
+
+
+def _now():
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _regexp(pattern, value):
+    # MySQL REGEXP on non-binary strings is case-insensitive; NULL never matches
+    if value is None or pattern is None:
+        return None
+    return 1 if re.search(pattern, str(value), re.I) else 0
+
+
+def _substring_index(value, delim, count):
+    if value is None:
+        return None
+    parts = str(value).split(delim)
+    return delim.join(parts[:count]) if count >= 0 else delim.join(parts[count:])
+
+
+def _register_types():
+    sqlite3.register_adapter(datetime.datetime, lambda d: d.isoformat(sep=" "))
+    sqlite3.register_adapter(datetime.date, lambda d: d.isoformat())
+    sqlite3.register_converter("DATETIME", lambda b: datetime.datetime.fromisoformat(b.decode()))
+    sqlite3.register_converter("DATE", lambda b: datetime.date.fromisoformat(b.decode()[:10]))
+
+
+_register_types()
+
+
+@contextmanager
+def _mysql_errors():
+    """Raise a missing table the way mysql.connector does (errno 1146), for code that checks."""
+    try:
+        yield
+    except sqlite3.OperationalError as e:
+        if not str(e).startswith("no such table"):
+            raise
+        raise mysql.connector.errors.ProgrammingError(
+            msg=str(e), errno=mysql.connector.errorcode.ER_NO_SUCH_TABLE
+        ) from e
+
+
+class StandInCursor:
+    """mysql.connector-style cursor over a sqlite3 cursor."""
+
+    def __init__(self, raw, dictionary=False):
+        self._cur = raw.cursor()
+        self._dictionary = dictionary
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return {d[0]: v for d, v in zip(self._cur.description, row)}
+
+    def execute(self, sql, params=()):
+        with _mysql_errors():
+            self._cur.execute(translate(sql), tuple(params or ()))
+
+    def executemany(self, sql, seq_params):
+        with _mysql_errors():
+            self._cur.executemany(translate(sql), [tuple(p) for p in seq_params])
+
+    def fetchone(self):
+        return self._row(self._cur.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._row(r) for r in self._cur.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(r) for r in self._cur.fetchall()]
+
+    def __iter__(self):
+        for row in self._cur:
+            yield self._row(row)
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cur.lastrowid
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    def close(self):
+        self._cur.close()
+
+
+class StandInConnection:
+    """mysql.connector-style connection over one sqlite3 connection."""
+
+    def __init__(self, path):
+        self._raw = sqlite3.connect(
+            path, timeout=30, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False
+        )
+        self._raw.execute("PRAGMA journal_mode=WAL")
+        self._raw.create_function("NOW", 0, _now)
+        self._raw.create_function("CURDATE", 0, lambda: datetime.date.today().isoformat())
+        self._raw.create_function("REGEXP", 2, _regexp)
+        self._raw.create_function("SUBSTRING_INDEX", 3, _substring_index)
+        # Advisory locks always succeed: a stand-in database has a single process
+        self._raw.create_function("GET_LOCK", 2, lambda name, timeout: 1)
+        self._raw.create_function("RELEASE_LOCK", 1, lambda name: 1)
+
+    def cursor(self, dictionary=False, **kwargs):
+        return StandInCursor(self._raw, dictionary=dictionary)
+
+    @property
+    def in_transaction(self):
+        return self._raw.in_transaction
+
+    def commit(self):
+        self._raw.commit()
+
+    def rollback(self):
+        self._raw.rollback()
+
+    def ping(self, reconnect=False, **kwargs):
+        self._raw.execute("SELECT 1")
+
+    def close(self):
+        self._raw.close()
+
+
+def create_schema(path):
+    raw = sqlite3.connect(path)
+    try:
+        raw.executescript(SCHEMA)
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def connect_factory(path):
+    """A zero-argument connect() for make.ConnectionPool, backed by the sqlite file at `path`."""
+    create_schema(path)
+    return lambda: StandInConnection(path)
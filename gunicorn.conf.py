@@ -0,0 +1,46 @@
+"""
+Production server settings for make.py (gunicorn, Linux/macOS).
+
+    gunicorn -c gunicorn.conf.py            # serves make:app
+    kill -HUP <master pid>                  # graceful reload: new workers start, old ones finish their requests
+    python make.py worker                   # reminders run in their own process (see README)
+
+Every value can be overridden from the environment (or on the command line).
+Each worker process has its own DB pool of DB_POOL_SIZE connections, so MySQL
+needs max_connections >= workers * DB_POOL_SIZE (+ the background worker).
+"""
+import os
+import multiprocessing
+
+wsgi_app = "make:app"
+bind = os.getenv("FOODMOOD_BIND", "0.0.0.0:5500")
+
+# Pre-fork workers, each with a few threads: requests mostly wait on MySQL/SMTP,
+# so threads keep a core busy while another request is blocked on I/O.
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# Keep-alive: browsers load a page plus its CSS/JS/API calls over one connection.
+# Behind nginx (deploy/nginx.conf) the upstream keepalive pool reuses these too.
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))            # PDF exports can take a while
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+
+# Recycle workers now and then so slow leaks can't build up; jitter avoids all restarting at once
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "5000"))
+max_requests_jitter = max_requests // 10
+
+# No preload: HUP then re-imports make.py in the new workers, i.e. picks up code changes
+preload_app = False
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def post_worker_init(worker):
+    # make.py already starts its log listener at import and after each fork; this is a safety net
+    import make
+    make.setup_logging()
@@ -1,30 +1,143 @@
 # script.py
 import random
 import os
+import sys
+import io
+import re
+import csv
+import queue
+import signal
+import atexit
 import datetime
+import logging
+import logging.handlers
 import threading
 import time
+import heapq
+import gzip
+import hashlib
+import mimetypes
+import argparse
+import statistics
 import smtplib
 from email.mime.text import MIMEText
 from collections import defaultdict
-from collections import Counter
+from collections import OrderedDict
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
 import mysql.connector
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory, abort
+
+try:  # PDF export (/report_export?format=pdf) is optional
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.graphics.shapes import Drawing
+    from reportlab.graphics.charts.barcharts import VerticalBarChart
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+except ImportError:
+    SimpleDocTemplate = None
+
+try:  # brotli variants of static assets are optional; gzip is always built
+    import brotli
+except ImportError:
+    brotli = None
+
+try:  # /eligible_foods scores pairs as boolean matrices when NumPy is around, else with bitsets
+    import numpy as np
+except ImportError:
+    np = None
 
 ###############################################################################
-# CONFIG: DEBUG, SMTP, DB
+# CONFIG: LOGGING, SMTP, DB
 ###############################################################################
-DEBUG_FILTERING = True  # For printing debug logs
-
-def dprint(*args):
-    if DEBUG_FILTERING:
-        print(*args)
+# Logging: each subsystem has its own child of the "foodmood" logger, e.g.
+#   LOG_LEVEL=WARNING LOG_LEVELS="suggestions=DEBUG,db=INFO" python make.py
+LOG_LEVEL  = os.getenv("LOG_LEVEL", "INFO")  # level for every foodmood.* logger
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")     # per-logger overrides: name=LEVEL[,name=LEVEL...]
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(threadName)s] %(message)s"
+
+log          = logging.getLogger("foodmood")
+db_log       = logging.getLogger("foodmood.db")           # slow queries
+catalog_log  = logging.getLogger("foodmood.catalog")      # catalog loads, filter tables, rollups
+suggest_log  = logging.getLogger("foodmood.suggestions")  # suggestion building and its job queue
+reminder_log = logging.getLogger("foodmood.reminders")    # scheduler, worker, email delivery
+http_log     = logging.getLogger("foodmood.http")         # route errors
+
+def configure_log_levels(default=LOG_LEVEL, overrides=LOG_LEVELS):
+    """Apply LOG_LEVEL / LOG_LEVELS. Names without a "foodmood." prefix get one."""
+    log.setLevel(default.upper())
+    for item in overrides.split(","):
+        name, _, level = item.partition("=")
+        name, level = name.strip(), level.strip()
+        if not name or not level:
+            continue
+        if name != "foodmood" and not name.startswith("foodmood."):
+            name = "foodmood." + name
+        logging.getLogger(name).setLevel(level.upper())
+
+configure_log_levels()
+
+_log_listener = None
+_log_listener_pid = None
+_log_listener_lock = threading.Lock()
+
+def setup_logging():
+    """
+    Send foodmood.* records through a queue to a listener thread that does the
+    actual writing, so a slow terminal or log pipe never stalls a request.
+    Runs at import, so every server (gunicorn, waitress, the dev server) gets
+    it; later calls return the running listener. The listener thread doesn't
+    survive a fork, so a forked child (e.g. a gunicorn worker) starts its own.
+    """
+    global _log_listener, _log_listener_pid
+    with _log_listener_lock:
+        if _log_listener is None or _log_listener_pid != os.getpid():
+            for old in [h for h in log.handlers if isinstance(h, logging.handlers.QueueHandler)]:
+                log.removeHandler(old)  # the parent's, feeding a queue nobody reads here
+            handler = logging.StreamHandler()  # stderr
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
+            records = queue.SimpleQueue()
+            _log_listener = logging.handlers.QueueListener(records, handler)
+            _log_listener_pid = os.getpid()
+            log.addHandler(logging.handlers.QueueHandler(records))
+            log.propagate = False
+            _log_listener.start()
+        return _log_listener
+
+def _stop_logging():
+    # Flushes whatever is still queued; only the process that started the listener owns it
+    if _log_listener is not None and _log_listener_pid == os.getpid():
+        _log_listener.stop()
+
+def _setup_logging_after_fork():
+    global _log_listener_lock
+    _log_listener_lock = threading.Lock()  # may have been held by another thread at fork time
+    setup_logging()
+
+setup_logging()
+atexit.register(_stop_logging)
+if hasattr(os, "register_at_fork"):  # not on Windows, which doesn't fork
+    os.register_at_fork(after_in_child=_setup_logging_after_fork)
 
 # SMTP / Email (Gmail example)
-SMTP_HOST = "smtp.gmail.com"
-SMTP_PORT = 587
-SMTP_USER = "foodmoodmai@gmail.com"
-SMTP_PASS = "fcsfufzdengmohjf"
+# For local testing point it at a debugging server, e.g.
+#   python -m aiosmtpd -n -l localhost:8025
+#   SMTP_HOST=localhost SMTP_PORT=8025 SMTP_USE_TLS=0 SMTP_PASS= python make.py
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USER = os.getenv("SMTP_USER", "foodmoodmai@gmail.com")
+SMTP_PASS = os.getenv("SMTP_PASS", "fcsfufzdengmohjf")  # empty => no login
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "1") == "1"    # STARTTLS before login
+
+# Reminder delivery: persistent SMTP sessions shared by a small thread pool
+SMTP_POOL_SIZE      = int(os.getenv("SMTP_POOL_SIZE", "4"))       # sessions / concurrent sends
+SMTP_TIMEOUT        = float(os.getenv("SMTP_TIMEOUT", "30"))      # socket timeout per session
+SMTP_NOOP_AFTER     = float(os.getenv("SMTP_NOOP_AFTER", "60"))   # NOOP-check sessions idle longer than this
+SMTP_RETRIES        = int(os.getenv("SMTP_RETRIES", "3"))         # extra attempts per message
+SMTP_RETRY_BACKOFF  = 0.5  # seconds, doubled per attempt
 
 # Database
 DB_HOST = "127.0.0.1"
@@ -32,10 +145,365 @@ DB_USER = "root"
 DB_PASS = "Tarearthforever"
 DB_NAME = "foodmood_db"
 
+# Connection pool (every route + the reminder scheduler borrow from the same pool)
+DB_POOL_SIZE       = int(os.getenv("DB_POOL_SIZE", "10"))          # max open connections
+DB_POOL_TIMEOUT    = float(os.getenv("DB_POOL_TIMEOUT", "5"))      # seconds to wait for a free one
+DB_POOL_PING_AFTER = float(os.getenv("DB_POOL_PING_AFTER", "30"))  # ping connections idle longer than this
+DB_POOL_RECYCLE    = float(os.getenv("DB_POOL_RECYCLE", "3600"))   # reopen connections older than this
+
+# Food catalog (fooditems / food_ingredient / ingredients / allergens) is cached in memory
+CATALOG_TTL = float(os.getenv("CATALOG_TTL", "600"))  # seconds before the catalog is reloaded
+
+# Which filter implementation generate_food_suggestions uses:
+#   "memory" -> in-memory catalog bitsets (default)
+#   "sql"    -> indexed query over the normalized tables from migrations/001
+SUGGESTION_ENGINE = os.getenv("SUGGESTION_ENGINE", "memory")
+
+# Bulk eligibility (/eligible_foods): read-only, many (user, mood) pairs per call
+MAX_ELIGIBLE_PAIRS = int(os.getenv("MAX_ELIGIBLE_PAIRS", "20000"))  # max pairs per request
+ELIGIBLE_CHUNK     = 2048  # pairs per matrix pass (bounds the pairs x foods arrays)
+
+# Suggestion filters derived from each `users` row are cached per process; fetch_data.py
+# logs every user it writes to user_changes (migrations/006), which the cache polls
+USER_PROFILE_CACHE_SIZE = int(os.getenv("USER_PROFILE_CACHE_SIZE", "10000"))  # max cached users (LRU)
+USER_CHANGES_POLL       = float(os.getenv("USER_CHANGES_POLL", "5"))  # seconds between user_changes checks
+USER_CHANGES_OVERLAP    = 60     # seconds re-read on every check, for late commits
+USER_CHANGES_RESYNC     = 43200  # idle longer than this => start over (fetch_data.py keeps 24h)
+
+# Eligible FoodIDs per filter profile (blood type, allergens, age bucket, BMI band, mood), shared by
+# every user with that profile; starts over whenever the catalog is reloaded
+SUGGESTION_CANDIDATE_CACHE_SIZE = int(os.getenv("SUGGESTION_CANDIDATE_CACHE_SIZE", "4096"))
+
+# Catalog responses (/ourmenu, /foodingredient) are cached as ready-to-send JSON bytes
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "512"))    # max cached responses (LRU)
+CATALOG_CACHE_TTL  = float(os.getenv("CATALOG_CACHE_TTL", "600"))   # seconds before an entry expires
+MAX_BATCH_FOOD_IDS = 200  # max FoodIDs per /foodingredients call
+
+# History endpoints (/moodentry, /foodsugg_history): keyset pages and streamed results
+HISTORY_PAGE_MAX  = 500   # max ?limit= per page
+STREAM_FETCH_SIZE = 500   # rows pulled from the cursor per chunk when streaming
+
+# Reminder scheduler: sleeps until the next RemindTime instead of polling every minute
+REMINDER_BATCH_SIZE      = int(os.getenv("REMINDER_BATCH_SIZE", "100"))   # reminders claimed per transaction
+REMINDER_RECONCILE       = float(os.getenv("REMINDER_RECONCILE", "300"))  # seconds between heap rebuilds from the table
+REMINDER_LOOKAHEAD_SLACK = 60      # extra seconds of upcoming rows loaded past the next rebuild
+REMINDER_HEAP_MAX        = int(os.getenv("REMINDER_HEAP_MAX", "10000"))   # max reminders held in memory
+REMINDER_TAIL_POLL       = float(os.getenv("REMINDER_TAIL_POLL", "5"))   # seconds between checks for newly inserted rows
+REMINDER_TAIL_OVERLAP    = 60      # seconds a lower ID committing after a higher one is still picked up
+REMINDER_RETRY_DELAY     = 10      # seconds before rebuilding after an error
+
+# Background worker (python make.py worker): one leader per database via GET_LOCK
+WORKER_LOCK_NAME   = os.getenv("WORKER_LOCK_NAME", "foodmood_worker_leader")
+WORKER_LOCK_WAIT   = 10   # seconds a standby blocks in GET_LOCK per attempt
+WORKER_LOCK_CHECK  = 5    # seconds between leader lock-connection pings
+WORKER_RETRY_DELAY = 5    # seconds before retrying after a DB error
+
+# Report export (/report_export): PDFs render in a small worker pool and finished files are cached
+REPORT_RENDER_WORKERS = int(os.getenv("REPORT_RENDER_WORKERS", "2"))
+REPORT_RENDER_TIMEOUT = float(os.getenv("REPORT_RENDER_TIMEOUT", "60"))  # seconds a request waits for its PDF
+REPORT_CACHE_SIZE     = int(os.getenv("REPORT_CACHE_SIZE", "64"))        # finished PDFs kept (LRU)
+REPORT_CACHE_TTL      = float(os.getenv("REPORT_CACHE_TTL", "3600"))
+
+# Static assets: shared CSS/JS get content-hashed URLs under /assets/ (dependencies first:
+# script.js imports ./firebaseConfig.js)
+FINGERPRINTED_ASSETS = ("firebaseConfig.js", "styles.css", "script.js")
+ASSET_MAX_AGE        = 31536000  # one year; hashed URLs never change content
+STATIC_MAX_AGE       = int(os.getenv("STATIC_MAX_AGE", "3600"))  # images/ and photo/ (not fingerprinted)
+
+# Request metrics (/metrics): queries at least this slow are logged with their SQL
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+# Async mood save: /save_mood returns once the mood row commits, suggestions are built by workers
+ASYNC_SUGGESTIONS      = os.getenv("ASYNC_SUGGESTIONS", "0") == "1"
+SUGGESTION_WORKERS     = int(os.getenv("SUGGESTION_WORKERS", "4"))
+SUGGESTION_QUEUE_SIZE  = int(os.getenv("SUGGESTION_QUEUE_SIZE", "200"))  # full queue => build inline
+SUGGESTION_RETRIES     = int(os.getenv("SUGGESTION_RETRIES", "3"))
+SUGGESTION_PENDING_WINDOW = 60  # seconds a new entry without suggestions counts as "still being built"
+# Queued jobs live in web-process memory, so a restart can drop them; the background
+# worker fills in entries that still have no suggestions after a grace period
+SUGGESTION_SWEEP_INTERVAL = float(os.getenv("SUGGESTION_SWEEP_INTERVAL", "60"))
+SUGGESTION_SWEEP_GRACE    = 120    # seconds before an entry counts as missed (longer than a job + retries)
+SUGGESTION_SWEEP_WINDOW   = 86400  # only entries from the last day are filled in
+SUGGESTION_SWEEP_PAGE     = 200    # entries per sweep query
+
+###############################################################################
+# DATABASE CONNECTION POOL
+###############################################################################
+class PoolTimeout(Exception):
+    """Raised when no connection frees up within the checkout timeout."""
+
+
+class PooledConnection:
+    """
+    Proxy around a raw MySQL connection borrowed from a ConnectionPool.
+    close() hands the connection back to the pool instead of closing the socket,
+    so route code can keep its usual `conn.close()` in `finally`.
+    If a connection-level error (lost connection, server gone) is raised while
+    borrowed, the pool checks the connection before taking it back.
+    """
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self.failed = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._raw.cursor(*args, **kwargs), self)
+
+    def commit(self):
+        with watch_connection(self):
+            return self._raw.commit()
+
+    def rollback(self):
+        with watch_connection(self):
+            return self._raw.rollback()
+
+    def close(self):
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._release(raw, suspect=self.failed)
+
+
+# Errors that can mean the socket itself is gone (2006/2013/2055, ...)
+CONNECTION_ERRORS = (mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError)
+
+@contextmanager
+def watch_connection(conn):
+    """Flag `conn` as failed when a connection-level error passes through."""
+    try:
+        yield
+    except CONNECTION_ERRORS:
+        conn.failed = True
+        raise
+
+
+class InstrumentedCursor:
+    """
+    Cursor proxy that times every execute()/executemany() and counts fetched
+    rows for the request metrics and the slow-query log (see record_query).
+    """
+    def __init__(self, cursor, conn):
+        self._cursor = cursor
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def execute(self, sql, params=(), *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            with watch_connection(self._conn):
+                return self._cursor.execute(sql, params, *args, **kwargs)
+        finally:
+            record_query(sql, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_params, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            with watch_connection(self._conn):
+                return self._cursor.executemany(sql, seq_params, *args, **kwargs)
+        finally:
+            record_query(sql, time.perf_counter() - started)
+
+    def fetchone(self):
+        with watch_connection(self._conn):
+            row = self._cursor.fetchone()
+        if row is not None:
+            record_rows(1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        with watch_connection(self._conn):
+            rows = self._cursor.fetchmany(*args, **kwargs)
+        record_rows(len(rows))
+        return rows
+
+    def fetchall(self):
+        with watch_connection(self._conn):
+            rows = self._cursor.fetchall()
+        record_rows(len(rows))
+        return rows
+
+    def __iter__(self):
+        with watch_connection(self._conn):
+            for row in self._cursor:
+                record_rows(1)
+                yield row
+
+
+class ConnectionPool:
+    """
+    Bounded, lazily-filled pool of MySQL connections.
+      - At most `size` connections are open at once; callers wait up to
+        `timeout` seconds for one to be returned, then get PoolTimeout.
+      - Connections idle longer than `ping_after` are pinged before reuse,
+        and connections older than `recycle` are reopened.
+      - Checkout wait times are recorded so the pool can be sized (see stats()).
+    """
+    def __init__(self, connect, size, timeout, ping_after, recycle):
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.recycle = recycle
+
+        self._cond = threading.Condition()
+        self._idle = []      # LIFO stack of (raw, created_at, last_used)
+        self._created = {}   # id(raw) -> created_at, for connections currently open
+        self._open = 0
+
+        self._checkouts = 0
+        self._waited = 0       # checkouts that found no idle connection and had to block
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+        self._opened = 0
+        self._discarded = 0
+        self._health_failures = 0
+
+    def get_connection(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        entry = None
+        blocked = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f"No database connection available within {self.timeout}s "
+                        f"(pool size {self.size})"
+                    )
+                blocked = True
+                self._cond.wait(remaining)
+
+            waited = time.monotonic() - start
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            if blocked:
+                self._waited += 1
+
+        if entry is None:
+            raw = self._open_new()
+        else:
+            raw = self._checked(*entry)
+        return PooledConnection(self, raw)
+
+    def _open_new(self):
+        try:
+            raw = self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._created[id(raw)] = time.monotonic()
+            self._opened += 1
+        return raw
+
+    def _checked(self, raw, created_at, last_used):
+        """Health-check an idle connection; replace it if it is stale or dead."""
+        now = time.monotonic()
+        if now - created_at > self.recycle:
+            self._drop(raw, reopen=True)
+            return self._open_new()
+        if now - last_used > self.ping_after:
+            try:
+                raw.ping(reconnect=False)
+            except Exception:
+                with self._cond:
+                    self._health_failures += 1
+                self._drop(raw, reopen=True)
+                return self._open_new()
+        return raw
+
+    def _drop(self, raw, reopen=False):
+        """Close a raw connection and free its slot (or keep the slot for a reopen)."""
+        try:
+            raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._created.pop(id(raw), None)
+            self._discarded += 1
+            if not reopen:
+                self._open -= 1
+                self._cond.notify()
+
+    def _release(self, raw, suspect=False):
+        # Never hand a half-finished transaction (or a dead socket) to the next borrower.
+        try:
+            if suspect:
+                raw.ping(reconnect=False)
+            if raw.in_transaction:
+                raw.rollback()
+        except Exception:
+            if suspect:
+                with self._cond:
+                    self._health_failures += 1
+            self._drop(raw)
+            return
+        with self._cond:
+            created_at = self._created.get(id(raw), time.monotonic())
+            self._idle.append((raw, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size":              self.size,
+                "open":              self._open,
+                "idle":              len(self._idle),
+                "in_use":            self._open - len(self._idle),
+                "checkouts":         self._checkouts,
+                "waited":            self._waited,
+                "wait_total_ms":     round(self._wait_total * 1000, 3),
+                "wait_avg_ms":       round(self._wait_total * 1000 / self._checkouts, 3) if self._checkouts else 0.0,
+                "wait_max_ms":       round(self._wait_max * 1000, 3),
+                "timeouts":          self._timeouts,
+                "opened":            self._opened,
+                "discarded":         self._discarded,
+                "health_failures":   self._health_failures,
+            }
+
+
+db_pool = ConnectionPool(
+    connect=lambda: mysql.connector.connect(
+        host=DB_HOST, user=DB_USER, password=DB_PASS, database=DB_NAME
+    ),
+    size=DB_POOL_SIZE,
+    timeout=DB_POOL_TIMEOUT,
+    ping_after=DB_POOL_PING_AFTER,
+    recycle=DB_POOL_RECYCLE,
+)
+
+def get_db_connection():
+    """
+    Borrow a connection from the shared pool.
+    Call .close() on it (as before) to give it back.
+    """
+    return db_pool.get_connection()
+
 ###############################################################################
 # FLASK APP INIT
 ###############################################################################
-app = Flask(__name__, static_folder='.', static_url_path='')
+# No static folder: the app directory also holds make.py (credentials), the Firebase
+# admin key, migrations/ and deploy/. Only images/, photo/, the HTML pages and
+# /assets/ are served, each through an explicit route below.
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+app = Flask(__name__, static_folder=None)
+app.config["SEND_FILE_MAX_AGE_DEFAULT"] = STATIC_MAX_AGE
 
 @app.route('/')
 def serve_index():
@@ -43,21 +511,21 @@ def serve_index():
     Serve the default page (mood_cards.html) at root.
     Make sure 'mood_cards.html' is in the same folder or adjust accordingly.
     """
-    return app.send_static_file('mood_cards.html')
+    return html_response('mood_cards.html')
 
 @app.route('/add_mood.html')
 def serve_add_mood():
     """
     Serve add_mood.html.
     """
-    return app.send_static_file('add_mood.html')
+    return html_response('add_mood.html')
 
 @app.route('/notification_page.html')
 def serve_notification_page():
     """
     Serve notification_page.html (the new Notification UI).
     """
-    return app.send_static_file('notification_page.html')
+    return html_response('notification_page.html')
 
 @app.route('/photo/<path:filename>')
 def serve_photo(filename):
@@ -66,9 +534,305 @@ def serve_photo(filename):
     e.g. http://127.0.0.1:5500/photo/default-profile.png
     Make sure there's actually a file named default-profile.png inside ./photo
     """
-    return send_from_directory(os.path.join(os.path.dirname(__file__), 'photo'), filename)
+    return send_from_directory(os.path.join(APP_DIR, 'photo'), filename)
+
+@app.route('/images/<path:filename>')
+def serve_image(filename):
+    """Food pictures (fooditems.ImageURL is e.g. images/F001.jpg)."""
+    return send_from_directory(os.path.join(APP_DIR, 'images'), filename)
+
+
+###############################################################################
+# STATIC ASSETS (fingerprinted + precompressed)
+###############################################################################
+class StaticAssets:
+    """
+    Shared CSS/JS served as content-hashed files under /assets/ and HTML pages
+    rewritten to point at them.
+      - Every name in FINGERPRINTED_ASSETS gets an URL like
+        /assets/styles.3f2a9c1b0d.css, so it can be cached forever
+        (Cache-Control: immutable) and a deploy changes the URL.
+      - References inside later assets are rewritten too: script.js imports
+        ./firebaseConfig.js, so firebaseConfig.js is hashed first and script.js's
+        hash covers the new import URL.
+      - Each body is compressed once (gzip, and brotli when the `brotli` package
+        is installed); requests get the best variant their Accept-Encoding allows.
+      - HTML pages are rewritten once and answered with a weak ETag, so repeat
+        visits get a 304.
+    In debug mode files are re-checked on every request so edits show up at once.
+    """
+    def __init__(self, root, names):
+        self.root = root
+        self.names = names
+        self._ref_re = re.compile(r"""(["'])(?:\./|/)?(%s)\1""" % "|".join(re.escape(n) for n in names))
+        self._lock = threading.Lock()
+        self._urls = {}     # plain name -> /assets/<hashed name>
+        self._assets = {}   # hashed name -> entry
+        self._pages = {}    # page name -> entry
+        self._mtimes = None
+
+    @staticmethod
+    def _entry(body, mimetype):
+        entry = {
+            "mimetype": mimetype,
+            "etag": hashlib.sha1(body).hexdigest()[:16],
+            "identity": body,
+            "gzip": gzip.compress(body, 9),
+        }
+        if brotli is not None:
+            entry["br"] = brotli.compress(body)
+        return entry
+
+    def _rewrite(self, text, urls):
+        def repl(m):
+            url = urls.get(m.group(2))
+            return m.group(1) + url + m.group(1) if url else m.group(0)
+        return self._ref_re.sub(repl, text)
+
+    def _build(self):
+        urls, assets = {}, {}
+        for name in self.names:
+            with open(os.path.join(self.root, name), encoding="utf-8") as f:
+                body = self._rewrite(f.read(), urls).encode("utf-8")
+            stem, ext = os.path.splitext(name)
+            hashed = f"{stem}.{hashlib.sha1(body).hexdigest()[:10]}{ext}"
+            urls[name] = f"/assets/{hashed}"
+            assets[hashed] = self._entry(body, mimetypes.guess_type(name)[0])
+        return urls, assets
+
+    def _ensure_current(self):
+        if self._mtimes is not None and not app.debug:
+            return
+        mtimes = tuple(os.stat(os.path.join(self.root, n)).st_mtime_ns for n in self.names)
+        with self._lock:
+            if mtimes != self._mtimes:
+                self._urls, self._assets = self._build()
+                self._pages = {}
+                self._mtimes = mtimes
+
+    def asset(self, hashed_name):
+        self._ensure_current()
+        return self._assets.get(hashed_name)
+
+    def page(self, name):
+        """Rewritten HTML page `name` (a file in root), or None if there is no such page."""
+        self._ensure_current()
+        entry = self._pages.get(name)
+        if entry is None:
+            path = os.path.join(self.root, name)
+            if os.path.basename(name) != name or not name.endswith(".html") or not os.path.isfile(path):
+                return None
+            with open(path, encoding="utf-8") as f:
+                entry = self._entry(self._rewrite(f.read(), self._urls).encode("utf-8"), "text/html")
+            if not app.debug:
+                self._pages[name] = entry
+        return entry
+
+    def urls(self):
+        self._ensure_current()
+        return dict(self._urls)
+
+
+static_assets = StaticAssets(APP_DIR, FINGERPRINTED_ASSETS)
+
+def encoded_response(entry, cache_control):
+    """
+    Send a StaticAssets entry in the best encoding the client accepts, with a
+    weak ETag (one per content, whatever the encoding) and 304 on a match.
+    """
+    if request.if_none_match.contains_weak(entry["etag"]):
+        resp = Response(status=304)
+    else:
+        encoding = next((enc for enc in ("br", "gzip")
+                         if enc in entry and request.accept_encodings[enc]), None)
+        resp = Response(entry[encoding or "identity"], mimetype=entry["mimetype"])
+        if encoding:
+            resp.headers["Content-Encoding"] = encoding
+    resp.set_etag(entry["etag"], weak=True)
+    resp.headers["Cache-Control"] = cache_control
+    resp.headers["Vary"] = "Accept-Encoding"
+    return resp
+
+def html_response(name):
+    entry = static_assets.page(name)
+    if entry is None:
+        abort(404)
+    # Pages revalidate on every load (cheap 304s) so they always point at the current assets
+    return encoded_response(entry, "no-cache")
+
+@app.route('/assets/<name>')
+def serve_asset(name):
+    entry = static_assets.asset(name)
+    if entry is None:
+        abort(404)
+    return encoded_response(entry, f"public, max-age={ASSET_MAX_AGE}, immutable")
+
+@app.route('/<any(%s):name>' % ", ".join(f'"{n}"' for n in FINGERPRINTED_ASSETS))
+def serve_unhashed_asset(name):
+    """Plain /styles.css etc. for pages cached before fingerprinting; always revalidated."""
+    entry = static_assets.asset(static_assets.urls()[name].rsplit("/", 1)[1])
+    return encoded_response(entry, "no-cache")
+
+@app.route('/<page>.html')
+def serve_page(page):
+    """Any HTML page in the app folder (nothing else there is served), with fingerprinted asset URLs."""
+    return html_response(page + ".html")
 
 
+###############################################################################
+# REQUEST METRICS (/metrics, slow-query log)
+###############################################################################
+class RequestStats:
+    """DB work done on behalf of one request (filled in by InstrumentedCursor)."""
+    __slots__ = ("started", "queries", "db_seconds", "rows")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+
+
+# The request being served by this thread, if any (background threads have none)
+_request_local = threading.local()
+
+def _current_stats():
+    return getattr(_request_local, "stats", None)
+
+def _one_line(sql, limit=300):
+    sql = " ".join(str(sql).split())
+    return sql if len(sql) <= limit else sql[:limit] + "..."
+
+
+class MetricCounter:
+    """Prometheus counter with a fixed set of label names."""
+    def __init__(self, name, help_text, labelnames=()):
+        self.name, self.help, self.labelnames = name, help_text, labelnames
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] += amount
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Prometheus histogram (cumulative buckets + sum + count) per label set."""
+    def __init__(self, name, help_text, buckets, labelnames=()):
+        self.name, self.help, self.labelnames = name, help_text, labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}   # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lbl = _labels(self.labelnames + ("le",), labels + (f"{bound:g}",))
+                    lines.append(f"{self.name}_bucket{lbl} {count}")
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames + ("le",), labels + ("+Inf",))} {series[-1]}')
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-2]:g}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join('{}="{}"'.format(n, str(v).replace("\\", "\\\\").replace('"', '\\"')) for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS   = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+REQUESTS = MetricCounter("foodmood_requests_total", "HTTP requests by route, method and status.",
+                         ("route", "method", "status"))
+REQUEST_SECONDS = Histogram("foodmood_request_duration_seconds", "Wall time per request.",
+                            LATENCY_BUCKETS, ("route", "method"))
+REQUEST_DB_SECONDS = Histogram("foodmood_request_db_seconds", "Time spent in cursor.execute per request.",
+                               LATENCY_BUCKETS, ("route",))
+REQUEST_QUERIES = Histogram("foodmood_request_queries", "Queries executed per request.",
+                            COUNT_BUCKETS, ("route",))
+REQUEST_ROWS = MetricCounter("foodmood_request_rows_total", "Rows fetched by requests.", ("route",))
+BACKGROUND_QUERIES = MetricCounter("foodmood_background_queries_total",
+                                   "Queries executed outside requests (workers, scheduler).")
+SLOW_QUERIES = MetricCounter("foodmood_slow_queries_total", "Queries slower than SLOW_QUERY_MS.", ("route",))
+
+METRICS = (REQUESTS, REQUEST_SECONDS, REQUEST_DB_SECONDS, REQUEST_QUERIES, REQUEST_ROWS,
+           BACKGROUND_QUERIES, SLOW_QUERIES)
+
+def record_query(sql, seconds):
+    """Called by InstrumentedCursor after every execute()/executemany()."""
+    stats = _current_stats()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += seconds
+    else:
+        BACKGROUND_QUERIES.inc()
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        route = _request_local.route if stats is not None else "background"
+        SLOW_QUERIES.inc((route,))
+        if db_log.isEnabledFor(logging.WARNING):
+            db_log.warning("Slow query %.1f ms (%s): %s", seconds * 1000, route, _one_line(sql))
+
+def record_rows(count):
+    stats = _current_stats()
+    if stats is not None:
+        stats.rows += count
+
+@app.before_request
+def _start_request_metrics():
+    _request_local.stats = RequestStats()
+    _request_local.route = request.url_rule.rule if request.url_rule else "unmatched"
+
+@app.after_request
+def _finish_request_metrics(response):
+    stats = _current_stats()
+    if stats is not None:
+        route = _request_local.route
+        REQUESTS.inc((route, request.method, str(response.status_code)))
+        REQUEST_SECONDS.observe((route, request.method), time.perf_counter() - stats.started)
+        REQUEST_DB_SECONDS.observe((route,), stats.db_seconds)
+        REQUEST_QUERIES.observe((route,), stats.queries)
+        REQUEST_ROWS.inc((route,), stats.rows)
+    return response
+
+@app.teardown_request
+def _clear_request_metrics(exc):
+    _request_local.stats = None
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text exposition: per-route request/DB histograms plus pool gauges."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.expose())
+    for key, value in db_pool.stats().items():
+        if isinstance(value, (int, float)):
+            lines.append(f"# TYPE foodmood_db_pool_{key} gauge")
+            lines.append(f"foodmood_db_pool_{key} {value:g}")
+    return Response("\n".join(lines) + "\n", content_type="text/plain; version=0.0.4; charset=utf-8")
+
 ###############################################################################
 # HELPER FUNCTIONS
 ###############################################################################
@@ -105,221 +869,1024 @@ def normalize_blood_type(bt):
     return bt.upper().replace("+", "").replace("-", "").replace(" ", "")
 
 ###############################################################################
-# FOOD SUGGESTION LOGIC (with Allergy + Blood Type + Mood + Age + BMI Filters)
+# FOOD CATALOG (in-memory index used by the suggestion filters)
 ###############################################################################
-def generate_food_suggestions(moodentry_id, userID, moodCategoryID, open_conn=None):
-    # Connect to MySQL database (reuse existing connection if provided)
-    conn = open_conn or mysql.connector.connect(
-        host=DB_HOST, user=DB_USER, password=DB_PASS, database=DB_NAME
-    )
-    cursor = conn.cursor(dictionary=True)
-    need_to_close_conn = not open_conn
+def _list_tokens(value):
+    """
+    Split a comma/space separated column (e.g. "A, B, O") into upper-case tokens.
+    X is in the result exactly when `value REGEXP '(^|[ ,])X($|[ ,])'` would match.
+    """
+    if value is None:
+        return frozenset()
+    return frozenset(t.upper() for t in re.split(r"[ ,]", str(value)))
+
+def _mysql_unsigned(text):
+    """Mimic CAST(text AS UNSIGNED): leading digits, or 0 when there are none."""
+    m = re.match(r"\s*(\d+)", text)
+    return int(m.group(1)) if m else 0
+
+def _catalog_age_range(age_text):
+    """Parse fooditems.age_range the same way the old SQL filter did ("7–60", "18-99")."""
+    if age_text is None:
+        return (None, None)
+    parts = str(age_text).replace('–', '-').split('-')
+    return (_mysql_unsigned(parts[0]), _mysql_unsigned(parts[-1]))
 
-    try:
-        # [1] Fetch user profile to get birthday, bloodType, allergies, plus weight/height for BMI
-        cursor.execute("""
-            SELECT UserID, birthday, bloodType, allergies, weight, height
-            FROM users
-            WHERE UserID = %s
-            LIMIT 1
-        """, (userID,))
-        user = cursor.fetchone()
-        if not user:
-            print(f"[ERROR] User not found: {userID}")
-            return []
+def _food_sort_key(food_id):
+    # Numeric portion of FoodID ("F019" -> 19), unknown formats last
+    tail = str(food_id)[1:]
+    return (0, int(tail), "") if tail.isdigit() else (1, 0, str(food_id))
 
-        # [2] Calculate user's age
-        today = datetime.date.today()
-        bday = user["birthday"]
-        age = today.year - bday.year - ((today.month, today.day) < (bday.month, bday.day))
 
-        # [3] Calculate the user’s BMI
-        #    Assuming weight in kg, height in cm: BMI = weight / ( (height/100)^2 ).
-        if user["height"] and user["height"] > 0:
-            user_bmi = user["weight"] / ((user["height"] / 100) ** 2)
+class CatalogIndex:
+    """
+    Immutable snapshot of the food catalog with every filter precomputed.
+    Food sets are stored as int bitsets (bit i = food_ids[i]) so the whole
+    suggestion filter is a handful of AND operations.
+    """
+    def __init__(self, foods, ingredients, links, allergens):
+        self.food_ids = sorted(foods, key=_food_sort_key)
+        self.position = {fid: i for i, fid in enumerate(self.food_ids)}
+        self.foods = foods                # FoodID -> fooditems row
+        self.ingredients = ingredients    # IngredientID -> ingredients row
+
+        # FoodID -> ingredient IDs (only links whose food + ingredient both exist, like the old JOINs)
+        food_ingredients = defaultdict(set)
+        for food_id, ingredient_id in links:
+            if food_id in foods and ingredient_id in ingredients:
+                food_ingredients[food_id].add(ingredient_id)
+        self.food_ingredients = {fid: frozenset(ids) for fid, ids in food_ingredients.items()}
+
+        self.ingredient_blood = {iid: _list_tokens(row["BloodType"]) for iid, row in ingredients.items()}
+        self.ingredient_allergy = {iid: _list_tokens(row["Allergy"]) for iid, row in ingredients.items()}
+
+        # Blood type -> foods with at least one ingredient allowed for it
+        # Allergen ID -> foods with at least one ingredient containing it
+        self.blood_bits = defaultdict(int)
+        self.allergen_bits = defaultdict(int)
+        for fid, ids in self.food_ingredients.items():
+            bit = 1 << self.position[fid]
+            for iid in ids:
+                for bt in self.ingredient_blood[iid]:
+                    self.blood_bits[bt] |= bit
+                for al in self.ingredient_allergy[iid]:
+                    self.allergen_bits[al] |= bit
+
+        # Mood -> foods, BMI flags and parsed age ranges
+        self.mood_bits = defaultdict(int)
+        self.bmi_na_bits = 0
+        self.bmi_lt25_bits = 0
+        self.age_ranges = []
+        for i, fid in enumerate(self.food_ids):
+            row = foods[fid]
+            bit = 1 << i
+            for mood in _list_tokens(row["MoodCategoryID"]):
+                self.mood_bits[mood] |= bit
+            bmi = (row["BMI"] or "").rstrip().upper()
+            if bmi == "N/A":
+                self.bmi_na_bits |= bit
+            elif bmi == "<25":
+                self.bmi_lt25_bits |= bit
+            self.age_ranges.append(_catalog_age_range(row["age_range"]))
+        self._age_bits = {}
+        self._matrices = None
+
+        # Lower-cased allergen title -> AL_IDs
+        self.allergen_ids = defaultdict(set)
+        for row in allergens:
+            if row["AL_Title"] is not None:
+                self.allergen_ids[row["AL_Title"].lower()].add(row["AL_ID"])
+
+    def age_bits(self, age):
+        bits = self._age_bits.get(age)
+        if bits is None:
+            bits = 0
+            for i, (lo, hi) in enumerate(self.age_ranges):
+                if lo is not None and lo <= age <= hi:
+                    bits |= 1 << i
+            self._age_bits[age] = bits
+        return bits
+
+    def bmi_bits(self, user_bmi):
+        # BMI >= 25 only allows 'N/A' foods, otherwise '<25' foods are fine too
+        if user_bmi < 25:
+            return self.bmi_na_bits | self.bmi_lt25_bits
+        return self.bmi_na_bits
+
+    def allergen_ids_for(self, allergy_names):
+        ids = set()
+        for name in allergy_names:
+            ids |= self.allergen_ids.get(name, set())
+        return ids
+
+    def eligible_bits(self, age, user_bmi, blood_type, mood_id, allergy_ids):
+        bits = self.mood_bits.get(str(mood_id).upper(), 0)
+        bits &= self.bmi_bits(user_bmi)
+        bits &= self.age_bits(age)
+        bits &= self.blood_bits.get(blood_type, 0)
+        for aid in allergy_ids:
+            bits &= ~self.allergen_bits.get(str(aid).upper(), 0)
+        return bits
+
+    def ids_from_bits(self, bits):
+        """FoodIDs in catalog order (numeric portion of FoodID)."""
+        return [fid for i, fid in enumerate(self.food_ids) if bits >> i & 1]
+
+    def matrices(self):
+        """NumPy form of the filters (built on first use; needs NumPy)."""
+        if self._matrices is None:
+            self._matrices = CatalogMatrices(self)
+        return self._matrices
+
+    def exclusions(self, age, user_bmi, blood_type, mood_id, allergy_ids):
+        """Per-reason breakdown of excluded foods, for debug output only."""
+        excluded = {"allergies": {}, "bloodtype": {}, "mood": {}, "bmi": {}, "age": {}}
+        allergy_ids = {str(a).upper() for a in allergy_ids}
+        mood_id = str(mood_id).upper()
+        for i, fid in enumerate(self.food_ids):
+            for iid in sorted(self.food_ingredients.get(fid, ())):
+                if self.ingredient_allergy[iid] & allergy_ids:
+                    excluded["allergies"].setdefault(fid, []).append(self.ingredients[iid]["IngredientName"])
+                if (self.ingredients[iid]["BloodType"] is not None
+                        and blood_type not in self.ingredient_blood[iid]
+                        and fid not in excluded["bloodtype"]):
+                    excluded["bloodtype"][fid] = ["Blood mismatch"]
+            row = self.foods[fid]
+            if row["MoodCategoryID"] is not None and mood_id not in _list_tokens(row["MoodCategoryID"]):
+                excluded["mood"][fid] = ["Mood mismatch"]
+            if user_bmi >= 25 and self.bmi_lt25_bits >> i & 1:
+                excluded["bmi"][fid] = [f"User BMI={user_bmi:.2f} >= 25"]
+            lo, hi = self.age_ranges[i]
+            if lo is not None and not (lo <= age <= hi):
+                excluded["age"][fid] = [f"Not in age_range {row['age_range']}"]
+        return excluded
+
+
+class CatalogMatrices:
+    """
+    The CatalogIndex filters as NumPy boolean rows over food_ids, for scoring many
+    (user, mood) pairs at once: eligible() returns a pairs x foods matrix that
+    matches eligible_bits() row by row.
+    """
+    def __init__(self, catalog):
+        n = len(catalog.food_ids)
+        self.food_ids = np.array(catalog.food_ids, dtype=object)
+
+        def rows(keys, bits_by_key):
+            # One row per key plus an all-False row for keys the catalog doesn't know
+            index = {key: k for k, key in enumerate(keys)}
+            matrix = np.zeros((len(keys) + 1, n), dtype=bool)
+            for key, k in index.items():
+                matrix[k] = self._bool_row(bits_by_key[key], n)
+            return index, matrix
+
+        self.mood_index, self.mood_rows = rows(sorted(catalog.mood_bits), catalog.mood_bits)
+        self.blood_index, self.blood_rows = rows(sorted(catalog.blood_bits), catalog.blood_bits)
+        self.allergen_index, allergen_rows = rows(sorted(catalog.allergen_bits), catalog.allergen_bits)
+        self.allergen_rows = allergen_rows[:-1].astype(np.int32)  # no fallback row needed
+        self.bmi_na = self._bool_row(catalog.bmi_na_bits, n)
+        self.bmi_lt25 = self._bool_row(catalog.bmi_lt25_bits, n)
+        # Foods without a parseable age_range never match, like age_bits()
+        self.age_lo = np.array([lo if lo is not None else 1 for lo, _ in catalog.age_ranges], dtype=np.int64)
+        self.age_hi = np.array([hi if lo is not None else 0 for lo, hi in catalog.age_ranges], dtype=np.int64)
+
+    @staticmethod
+    def _bool_row(bits, n):
+        return np.array([bits >> i & 1 for i in range(n)], dtype=bool)
+
+    def eligible(self, ages, bmis, blood_types, mood_ids, allergy_ids):
+        """Boolean matrix, one row per pair; the arguments are parallel lists."""
+        age = np.asarray(ages, dtype=np.int64)[:, None]
+        bmi = np.asarray(bmis, dtype=float)
+        mood = [self.mood_index.get(str(m).upper(), len(self.mood_index)) for m in mood_ids]
+        blood = [self.blood_index.get(bt, len(self.blood_index)) for bt in blood_types]
+
+        allowed = self.mood_rows[mood] & self.blood_rows[blood]
+        allowed &= self.bmi_na | (self.bmi_lt25 & (bmi < 25)[:, None])
+        allowed &= (self.age_lo <= age) & (age <= self.age_hi)
+
+        # Pairs x allergens membership, times allergens x foods: > 0 means a listed allergen is in the food
+        if len(self.allergen_index):
+            has = np.zeros((len(allowed), len(self.allergen_index)), dtype=np.int32)
+            for row, ids in enumerate(allergy_ids):
+                for aid in ids:
+                    k = self.allergen_index.get(str(aid).upper())
+                    if k is not None:
+                        has[row, k] = 1
+            allowed &= (has @ self.allergen_rows) == 0
+        return allowed
+
+
+class FoodCatalog:
+    """
+    Process-wide holder of the current CatalogIndex.
+    The index is loaded on first use and rebuilt after CATALOG_TTL seconds,
+    or right away after invalidate() (SIGHUP / POST /catalog/reload).
+    """
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._index = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._invalidation_hooks = []
+
+    def add_invalidation_hook(self, hook):
+        """Register a callable to run whenever the catalog is invalidated (e.g. clear a cache)."""
+        self._invalidation_hooks.append(hook)
+
+    def invalidate(self):
+        self._loaded_at = 0.0
+        for hook in self._invalidation_hooks:
+            hook()
+
+    def get(self, open_conn=None):
+        if self._index is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return self._index
+        with self._lock:
+            # Another thread may have finished the reload while we waited
+            if self._index is None or time.monotonic() - self._loaded_at >= self.ttl:
+                self._index = self._load(open_conn)
+                self._loaded_at = time.monotonic()
+            return self._index
+
+    def _load(self, open_conn=None):
+        conn = open_conn or get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("""
+                SELECT FoodID, FoodName, ImageURL, MoodCategoryID, BMI, age_range
+                FROM fooditems
+            """)
+            foods = {row["FoodID"]: row for row in cursor.fetchall()}
+            cursor.execute("""
+                SELECT IngredientID, IngredientName, Allergy, BloodType
+                FROM ingredients
+            """)
+            ingredients = {row["IngredientID"]: row for row in cursor.fetchall()}
+            cursor.execute("SELECT FoodID, IngredientID FROM food_ingredient")
+            links = [(row["FoodID"], row["IngredientID"]) for row in cursor.fetchall()]
+            cursor.execute("SELECT AL_ID, AL_Title FROM allergens")
+            allergens = cursor.fetchall()
+        finally:
+            cursor.close()
+            if not open_conn:
+                conn.close()
+
+        catalog_log.info("Food catalog loaded: %d foods, %d ingredients", len(foods), len(ingredients))
+        return CatalogIndex(foods, ingredients, links, allergens)
+
+
+food_catalog = FoodCatalog(CATALOG_TTL)
+
+###############################################################################
+# CATALOG RESPONSE CACHE (pre-serialized JSON + ETag / 304)
+###############################################################################
+class ResponseCache:
+    """
+    LRU + TTL cache of pre-serialized response bodies (JSON payloads, or raw bytes
+    such as rendered files). Each entry keeps its bytes and a strong ETag (hash of
+    the bytes), so a hit costs no DB work and no serialization.
+    """
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()   # key -> (body, etag, stored_at)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[2] >= self.ttl:
+                self._entries.pop(key, None)
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0], entry[1]
+
+    def put(self, key, payload):
+        if isinstance(payload, bytes):
+            body = payload
         else:
-            user_bmi = 0  # Fallback if height is missing/zero
+            body = app.json.dumps(payload).encode("utf-8")
+        etag = hashlib.sha1(body).hexdigest()
+        with self._lock:
+            self._entries[key] = (body, etag, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return body, etag
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self._hits, "misses": self._misses}
+
+
+catalog_response_cache = ResponseCache(CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL)
+food_catalog.add_invalidation_hook(catalog_response_cache.invalidate)
+
+def cached_json_response(cache, key, build):
+    """
+    Serve `build()` (a JSON-serializable payload) through `cache`.
+    Answers 304 when the client's If-None-Match already holds the current ETag.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        entry = cache.put(key, build())
+    body, etag = entry
+
+    if etag in request.if_none_match:
+        resp = Response(status=304)
+    else:
+        resp = Response(body, mimetype="application/json")
+    resp.set_etag(etag)
+    # Let browsers keep the body but revalidate each time (cheap 304s)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+def _reload_catalog_on_signal(signum, frame):
+    food_catalog.invalidate()
+
+# `kill -HUP <pid>` forces a catalog reload on the next request (not available on Windows)
+if hasattr(signal, "SIGHUP"):
+    try:
+        signal.signal(signal.SIGHUP, _reload_catalog_on_signal)
+    except ValueError:
+        pass  # not imported from the main thread
 
-        # [4] Prepare regex patterns for bloodType, mood, and allergy filters
-        blood_regex = f"(^|[ ,]){normalize_blood_type(user['bloodType'])}($|[ ,])"
-        mood_regex = f"(^|[ ,]){moodCategoryID}($|[ ,])"
-        allergy_names = [
+###############################################################################
+# SET-BASED SUGGESTION QUERY (normalized tables, see migrations/001)
+###############################################################################
+def _bmi_values(user_bmi):
+    # BMI >= 25 only allows 'N/A' foods, otherwise '<25' foods are fine too
+    return ("N/A", "<25") if user_bmi < 25 else ("N/A",)
+
+def _indexed_suggestion_query(age, user_bmi, blood_type, mood_id, allergy_ids):
+    """Anti-join over food_mood / ingredient_bloodtype / ingredient_allergen. Returns (sql, params)."""
+    bmi_values = _bmi_values(user_bmi)
+    sql = f"""
+        SELECT f.FoodID
+        FROM food_mood fm
+        JOIN fooditems f ON f.FoodID = fm.FoodID
+        WHERE fm.MoodCategoryID = %s
+          AND f.BMI IN ({",".join(["%s"] * len(bmi_values))})
+          AND f.age_min <= %s
+          AND f.age_max >= %s
+          AND EXISTS (
+              SELECT 1
+              FROM food_ingredient fi
+              JOIN ingredient_bloodtype ib ON ib.IngredientID = fi.IngredientID
+              WHERE fi.FoodID = f.FoodID
+                AND ib.BloodType = %s
+          )
+    """
+    params = [str(mood_id).upper(), *bmi_values, age, age, blood_type]
+    if allergy_ids:
+        sql += f"""
+          AND NOT EXISTS (
+              SELECT 1
+              FROM food_ingredient fi2
+              JOIN ingredient_allergen ia ON ia.IngredientID = fi2.IngredientID
+              WHERE fi2.FoodID = f.FoodID
+                AND ia.AL_ID IN ({",".join(["%s"] * len(allergy_ids))})
+          )
+        """
+        params.extend(sorted(str(a).upper() for a in allergy_ids))
+    return sql, params
+
+def _legacy_suggestion_query(age, user_bmi, blood_type, mood_id, allergy_ids):
+    """The original REGEXP / CAST(SUBSTRING_INDEX(...)) query, kept for the EXPLAIN harness."""
+    blood_regex = f"(^|[ ,]){blood_type}($|[ ,])"
+    mood_regex = f"(^|[ ,]){mood_id}($|[ ,])"
+    allergy_regex = "|".join(f"(^|[ ,]){aid}($|[ ,])" for aid in sorted(allergy_ids))
+    bmi_values = _bmi_values(user_bmi)
+    sql = f"""
+        SELECT DISTINCT fi.FoodID
+        FROM food_ingredient fi
+        JOIN ingredients i ON fi.IngredientID = i.IngredientID
+        JOIN fooditems f ON fi.FoodID = f.FoodID
+        WHERE f.MoodCategoryID REGEXP %s
+          AND f.BMI IN ({",".join(["%s"] * len(bmi_values))})
+          AND CAST(SUBSTRING_INDEX(REPLACE(f.age_range, '–', '-'), '-', 1) AS UNSIGNED) <= %s
+          AND CAST(SUBSTRING_INDEX(REPLACE(f.age_range, '–', '-'), '-', -1) AS UNSIGNED) >= %s
+          AND i.BloodType REGEXP %s
+    """
+    params = [mood_regex, *bmi_values, age, age, blood_regex]
+    if allergy_regex:
+        sql += """
+            AND fi.FoodID NOT IN (
+                SELECT fi2.FoodID
+                FROM food_ingredient fi2
+                JOIN ingredients i2 ON fi2.IngredientID = i2.IngredientID
+                WHERE i2.Allergy REGEXP %s
+            )
+        """
+        params.append(allergy_regex)
+    return sql, params
+
+def eligible_food_ids_sql(conn, age, user_bmi, blood_type, mood_id, allergy_ids, legacy=False):
+    """Eligible FoodIDs from MySQL, sorted like CatalogIndex.ids_from_bits()."""
+    build = _legacy_suggestion_query if legacy else _indexed_suggestion_query
+    sql, params = build(age, user_bmi, blood_type, mood_id, allergy_ids)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        return sorted((row[0] for row in cursor.fetchall()), key=_food_sort_key)
+    finally:
+        cursor.close()
+
+def refresh_filter_tables():
+    """
+    (Re)fill fooditems.age_min/age_max and the food_mood / ingredient_bloodtype /
+    ingredient_allergen junction tables from the catalog, in one transaction.
+    Tokens are split exactly like the in-memory engine does.
+    """
+    food_catalog.invalidate()
+    catalog = food_catalog.get()
+
+    age_rows = [(lo, hi, fid) for fid, (lo, hi) in zip(catalog.food_ids, catalog.age_ranges)]
+    mood_rows = [
+        (fid, mood)
+        for fid in catalog.food_ids
+        for mood in sorted(_list_tokens(catalog.foods[fid]["MoodCategoryID"]))
+        if mood
+    ]
+    blood_rows = [(iid, bt) for iid, tokens in catalog.ingredient_blood.items() for bt in sorted(tokens) if bt]
+    allergen_rows = [(iid, al) for iid, tokens in catalog.ingredient_allergy.items() for al in sorted(tokens) if al]
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.executemany("UPDATE fooditems SET age_min = %s, age_max = %s WHERE FoodID = %s", age_rows)
+        cursor.execute("DELETE FROM food_mood")
+        cursor.executemany("INSERT INTO food_mood (FoodID, MoodCategoryID) VALUES (%s, %s)", mood_rows)
+        cursor.execute("DELETE FROM ingredient_bloodtype")
+        cursor.executemany("INSERT INTO ingredient_bloodtype (IngredientID, BloodType) VALUES (%s, %s)", blood_rows)
+        cursor.execute("DELETE FROM ingredient_allergen")
+        cursor.executemany("INSERT INTO ingredient_allergen (IngredientID, AL_ID) VALUES (%s, %s)", allergen_rows)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    catalog_log.info("Filter tables refreshed: %d foods, %d food/mood, %d ingredient/blood type, "
+                     "%d ingredient/allergen rows",
+                     len(age_rows), len(mood_rows), len(blood_rows), len(allergen_rows))
+
+def explain_suggestions(age, user_bmi, blood_type, mood_id, allergy_ids, runs):
+    """
+    Before/after harness: EXPLAIN + timing of the legacy REGEXP query vs the
+    indexed anti-join, plus the in-memory engine, on the same inputs.
+    """
+    blood_type = normalize_blood_type(blood_type)
+    conn = get_db_connection()
+    try:
+        results = {}
+        for name, build, legacy in (("legacy", _legacy_suggestion_query, True),
+                                    ("indexed", _indexed_suggestion_query, False)):
+            sql, params = build(age, user_bmi, blood_type, mood_id, allergy_ids)
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("EXPLAIN " + sql, params)
+            plan = cursor.fetchall()
+            cursor.close()
+            print(f"=== EXPLAIN ({name}) ===")
+            for row in plan:
+                print(f"  {row['table']:<8} type={row['type']:<8} key={row['key']} rows={row['rows']} extra={row['Extra']}")
+
+            timings = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                food_ids = eligible_food_ids_sql(conn, age, user_bmi, blood_type, mood_id, allergy_ids, legacy=legacy)
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = food_ids
+            print(f"  {len(food_ids)} foods | avg {statistics.mean(timings):.3f} ms | "
+                  f"p50 {statistics.median(timings):.3f} ms | max {max(timings):.3f} ms over {runs} runs")
+    finally:
+        conn.close()
+
+    catalog = food_catalog.get()
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        food_ids = catalog.ids_from_bits(catalog.eligible_bits(age, user_bmi, blood_type, mood_id, allergy_ids))
+        timings.append((time.perf_counter() - started) * 1000)
+    results["memory"] = food_ids
+    print(f"=== in-memory catalog ===\n  {len(food_ids)} foods | avg {statistics.mean(timings):.3f} ms")
+
+    same = results["legacy"] == results["indexed"] == results["memory"]
+    print("Results match." if same else f"[WARN] Results differ: {results}")
+    return same
+
+###############################################################################
+# USER PROFILE CACHE (suggestion filters per user, see migrations/006)
+###############################################################################
+USER_PROFILE_COLUMNS = "UserID, birthday, bloodType, allergies, weight, height"
+USER_PROFILE_SQL = f"""
+    SELECT {USER_PROFILE_COLUMNS}
+    FROM users
+    WHERE UserID = %s
+    LIMIT 1
+"""
+
+class UserProfile:
+    """The suggestion filters derived from one `users` row."""
+    __slots__ = ("birthday", "bmi", "blood_type", "allergy_names", "_allergy_ids")
+
+    def __init__(self, row):
+        self.birthday = row["birthday"]
+        # Assuming weight in kg, height in cm: BMI = weight / ( (height/100)^2 ).
+        if row["height"] and row["height"] > 0:
+            self.bmi = row["weight"] / ((row["height"] / 100) ** 2)
+        else:
+            self.bmi = 0  # Fallback if height is missing/zero
+        self.blood_type = normalize_blood_type(row["bloodType"])
+        self.allergy_names = tuple(
             a.strip().lower()
-            for a in user.get("allergies", "").split(",")
+            for a in (row.get("allergies") or "").split(",")
             if a.strip()
-        ]
-
-        # [5] Map allergy names to allergen IDs (AL_IDs)
-        allergy_ids = []
-        if allergy_names:
-            placeholders = ",".join(["%s"] * len(allergy_names))
-            cursor.execute(f"""
-                SELECT AL_ID
-                FROM allergens
-                WHERE LOWER(AL_Title) IN ({placeholders})
-            """, allergy_names)
-            allergy_ids = list(set(row["AL_ID"] for row in cursor.fetchall()))
-
-        # Build an OR-based regex for allergen IDs if any
-        allergy_regex = "|".join(
-            [f"(^|[ ,]){aid}($|[ ,])" for aid in allergy_ids]
-        ) if allergy_ids else ""
-
-        # [6] Collect exclusions for debugging:
-        excluded = {
-            "allergies": {},
-            "bloodtype": {},
-            "mood": {},
-            "bmi": {},
-            "age": {},
-        }
+        )
+        self._allergy_ids = (None, frozenset())  # (catalog they were resolved against, AL_IDs)
 
-        # --- Exclude by Allergy ---
-        if allergy_regex:
-            cursor.execute("""
-                SELECT DISTINCT fi.FoodID, i.IngredientName
-                FROM food_ingredient fi
-                JOIN ingredients i ON fi.IngredientID = i.IngredientID
-                WHERE i.Allergy REGEXP %s
-            """, (allergy_regex,))
-            for row in cursor.fetchall():
-                excluded["allergies"].setdefault(row["FoodID"], []).append(row["IngredientName"])
+    def age(self, today=None):
+        # Worked out at use time, so a cached profile still has the right age after a birthday
+        today = today or datetime.date.today()
+        bday = self.birthday
+        return today.year - bday.year - ((today.month, today.day) < (bday.month, bday.day))
 
-        # --- Exclude by Blood Type mismatch ---
-        cursor.execute("""
-            SELECT DISTINCT fi.FoodID
-            FROM food_ingredient fi
-            JOIN ingredients i ON fi.IngredientID = i.IngredientID
-            WHERE NOT (i.BloodType REGEXP %s)
-        """, (blood_regex,))
-        for row in cursor.fetchall():
-            excluded["bloodtype"].setdefault(row["FoodID"], []).append("Blood mismatch")
-
-        # --- Exclude by Mood mismatch ---
-        cursor.execute("""
-            SELECT DISTINCT f.FoodID
-            FROM fooditems f
-            WHERE NOT (f.MoodCategoryID REGEXP %s)
-        """, (mood_regex,))
-        for row in cursor.fetchall():
-            excluded["mood"].setdefault(row["FoodID"], []).append("Mood mismatch")
-
-        # --- Exclude by BMI mismatch ---
-        # If user's BMI >= 25, exclude all foods with BMI = '<25'
-        if user_bmi >= 25:
-            cursor.execute("""
-                SELECT FoodID
-                FROM fooditems
-                WHERE BMI = '<25'
-            """)
-            for row in cursor.fetchall():
-                excluded["bmi"].setdefault(row["FoodID"], []).append(
-                    f"User BMI={user_bmi:.2f} >= 25"
-                )
+    def allergy_ids(self, catalog):
+        """AL_IDs of the user's allergies, looked up again only after the catalog reloads."""
+        resolved_for, ids = self._allergy_ids
+        if resolved_for is not catalog:
+            ids = frozenset(catalog.allergen_ids_for(self.allergy_names))
+            self._allergy_ids = (catalog, ids)
+        return ids
 
-        # --- Exclude by Age mismatch ---
-        cursor.execute("""
-            SELECT DISTINCT f.FoodID, f.age_range
-            FROM fooditems f
-            WHERE NOT (
-                CAST(SUBSTRING_INDEX(REPLACE(f.age_range, '–', '-'), '-', 1) AS UNSIGNED) <= %s
-                AND CAST(SUBSTRING_INDEX(REPLACE(f.age_range, '–', '-'), '-', -1) AS UNSIGNED) >= %s
+
+class UserProfileCache:
+    """
+    Bounded LRU of UserProfile by UserID, so repeat mood saves skip the users query.
+
+    fetch_data.py adds a user_changes row for every user it upserts or deletes, in
+    the same transaction. get() checks user_changes at most every `poll` seconds
+    and drops the users changed since the previous check (plus `overlap` seconds,
+    which also catches a profile read just before a change was committed). A
+    cached profile is at most about `poll` seconds stale. If user_changes can't
+    be read, the whole cache is dropped instead, which keeps that bound.
+    """
+    def __init__(self, maxsize, poll, overlap=USER_CHANGES_OVERLAP, resync=USER_CHANGES_RESYNC):
+        self.maxsize = maxsize
+        self.poll = poll
+        self.overlap = overlap
+        self.resync = resync
+        self._entries = OrderedDict()  # UserID -> UserProfile
+        self._lock = threading.Lock()
+        self._polled_at = None         # monotonic start of the last check
+        self._polling = False
+        self._stats = {"hits": 0, "misses": 0, "invalidated": 0, "polls": 0, "poll_errors": 0}
+
+    def get(self, cursor, user_id):
+        """The user's profile, or None if there is no such user. `cursor` is a dictionary cursor."""
+        self._check_changes(cursor)
+        with self._lock:
+            profile = self._entries.get(user_id)
+            if profile is not None:
+                self._entries.move_to_end(user_id)
+                self._stats["hits"] += 1
+                return profile
+            self._stats["misses"] += 1
+
+        cursor.execute(USER_PROFILE_SQL, (user_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        profile = UserProfile(row)
+        with self._lock:
+            self._entries[user_id] = profile
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return profile
+
+    def get_many(self, cursor, user_ids, chunk_size=500):
+        """
+        {UserID: profile} for the given users that exist. Misses are read with one
+        IN (...) query per chunk and not cached, so a bulk job doesn't evict the
+        users who are saving moods right now.
+        """
+        self._check_changes(cursor)
+        profiles = {}
+        missing = []
+        with self._lock:
+            for user_id in dict.fromkeys(user_ids):
+                profile = self._entries.get(user_id)
+                if profile is None:
+                    missing.append(user_id)
+                else:
+                    profiles[user_id] = profile
+            self._stats["hits"] += len(profiles)
+            self._stats["misses"] += len(missing)
+
+        for start in range(0, len(missing), chunk_size):
+            batch = missing[start:start + chunk_size]
+            cursor.execute(
+                f"SELECT {USER_PROFILE_COLUMNS} FROM users WHERE UserID IN ({','.join(['%s'] * len(batch))})",
+                batch
             )
-        """, (age, age))
-        for row in cursor.fetchall():
-            excluded["age"].setdefault(row["FoodID"], []).append(
-                f"Not in age_range {row['age_range']}"
+            for row in cursor.fetchall():
+                profiles[row["UserID"]] = UserProfile(row)
+        return profiles
+
+    def invalidate(self, user_ids=None):
+        """Drop the given users, or everyone when user_ids is None."""
+        with self._lock:
+            if user_ids is None:
+                self._stats["invalidated"] += len(self._entries)
+                self._entries.clear()
+                return
+            for user_id in user_ids:
+                if self._entries.pop(user_id, None) is not None:
+                    self._stats["invalidated"] += 1
+
+    def _check_changes(self, cursor):
+        now = time.monotonic()
+        with self._lock:
+            if self._polling or (self._polled_at is not None and now - self._polled_at < self.poll):
+                return
+            last, self._polling = self._polled_at, True
+        try:
+            if last is None or now - last >= self.resync:
+                # Nothing to go on (first use, or the change log may have been pruned since)
+                self.invalidate()
+            else:
+                try:
+                    cursor.execute(
+                        "SELECT DISTINCT UserID FROM user_changes WHERE ChangedAt >= NOW() - INTERVAL %s SECOND",
+                        (int(now - last + self.overlap) + 1,)
+                    )
+                    changed = [row["UserID"] for row in cursor.fetchall()]
+                except mysql.connector.Error as e:
+                    # No change log to go on (e.g. migrations/006 not applied): forget everyone,
+                    # so profiles are at most `poll` seconds stale and suggestions keep working
+                    db_log.warning("Checking user_changes failed, dropping all cached profiles: %s", e)
+                    changed = None
+                    with self._lock:
+                        self._stats["poll_errors"] += 1
+                self.invalidate(changed)
+            with self._lock:
+                self._polled_at = now
+                self._stats["polls"] += 1
+        finally:
+            with self._lock:
+                self._polling = False
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
+
+
+user_profiles = UserProfileCache(USER_PROFILE_CACHE_SIZE, USER_CHANGES_POLL)
+
+###############################################################################
+# SUGGESTION CANDIDATE CACHE (eligible foods per filter profile)
+###############################################################################
+class CandidateCache:
+    """
+    LRU of eligible FoodIDs (as tuples) by filter profile, so a mood save is a
+    dict lookup plus a random pick. Users with the same blood type, allergen IDs,
+    age bucket, BMI band and mood share an entry. The buckets are exactly the cuts
+    the filters make: ages that fall in the same set of fooditems.age_range rows
+    (CatalogIndex.age_bits) and BMI below 25 or not. Entries belong to the CatalogIndex they were built from: a reloaded
+    catalog (TTL or invalidate()) starts the cache over.
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # profile key -> (FoodID tuple, approx bytes)
+        self._catalog = None
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "resets": 0}
+
+    @staticmethod
+    def key(catalog, age, user_bmi, blood_type, mood_id, allergy_ids):
+        return (blood_type, frozenset(str(a).upper() for a in allergy_ids), catalog.age_bits(age),
+                user_bmi < 25, str(mood_id).upper())
+
+    def get(self, catalog, key, build):
+        """Cached FoodIDs for `key`, or build() them (a list in catalog order) and keep them."""
+        with self._lock:
+            if catalog is not self._catalog:
+                self._reset(catalog)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[0]
+            self._stats["misses"] += 1
+
+        food_ids = tuple(build())
+        # The FoodID strings belong to the catalog; an entry only adds its tuple and key
+        size = sys.getsizeof(food_ids) + sys.getsizeof(key) + sys.getsizeof(key[1])
+        with self._lock:
+            if catalog is self._catalog and key not in self._entries:
+                self._entries[key] = (food_ids, size)
+                self._bytes += size
+                while len(self._entries) > self.maxsize:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._bytes -= evicted
+                    self._stats["evictions"] += 1
+        return food_ids
+
+    def clear(self):
+        with self._lock:
+            self._reset(None)
+
+    def _reset(self, catalog):
+        if self._entries:
+            self._stats["resets"] += 1
+        self._entries.clear()
+        self._bytes = 0
+        self._catalog = catalog
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return dict(
+                self._stats,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                hit_rate=round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
             )
 
-        # --- Debug print: All Exclusions ---
-        print("=== [❌ EXCLUDED] Foods by reason ===")
-        all_excluded = set()
-        for reason, items in excluded.items():
-            for food_id, details in items.items():
-                all_excluded.add(food_id)
-                print(f"[X] {food_id} — excluded by {reason}: {', '.join(details)}")
-
-        # [7] Build the main SELECT for *allowed* foods only
-        #     Conditions needed:
-        #       - MoodCategoryID matches
-        #       - Age is within range
-        #       - BloodType matches
-        #       - *Optional* allergies not present
-        #       - BMI check
-        # We’ll incorporate BMI by including either (f.BMI='N/A') or (f.BMI='<25' if user_bmi<25).
-        if user_bmi < 25:
-            bmi_condition = "(f.BMI = 'N/A' OR f.BMI = '<25')"
-        else:
-            bmi_condition = "(f.BMI = 'N/A')"
-
-        sql = f"""
-            SELECT DISTINCT fi.FoodID
-            FROM food_ingredient fi
-            JOIN ingredients i ON fi.IngredientID = i.IngredientID
-            JOIN fooditems f ON fi.FoodID = f.FoodID
-            WHERE f.MoodCategoryID REGEXP %s
-              AND {bmi_condition}
-              AND CAST(SUBSTRING_INDEX(REPLACE(f.age_range, '–', '-'), '-', 1) AS UNSIGNED) <= %s
-              AND CAST(SUBSTRING_INDEX(REPLACE(f.age_range, '–', '-'), '-', -1) AS UNSIGNED) >= %s
-              AND i.BloodType REGEXP %s
-        """
 
-        params = [mood_regex, age, age, blood_regex]
-
-        # If the user has any allergy, exclude foods containing those allergens
-        if allergy_regex:
-            sql += """
-                AND fi.FoodID NOT IN (
-                    SELECT fi2.FoodID
-                    FROM food_ingredient fi2
-                    JOIN ingredients i2 ON fi2.IngredientID = i2.IngredientID
-                    WHERE i2.Allergy REGEXP %s
-                )
-            """
-            params.append(allergy_regex)
+suggestion_candidates = CandidateCache(SUGGESTION_CANDIDATE_CACHE_SIZE)
+food_catalog.add_invalidation_hook(suggestion_candidates.clear)
 
-        cursor.execute(sql, params)
+###############################################################################
+# FOOD SUGGESTION LOGIC (with Allergy + Blood Type + Mood + Age + BMI Filters)
+###############################################################################
+def generate_food_suggestions(moodentry_id, userID, moodCategoryID, open_conn=None, raise_errors=False):
+    # Connect to MySQL database (reuse existing connection if provided)
+    conn = open_conn or get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    need_to_close_conn = not open_conn
+
+    try:
+        # [1] User profile (birthday, BMI, blood type, allergies), cached per user
+        profile = user_profiles.get(cursor, userID)
+        if profile is None:
+            suggest_log.warning("User not found: %s", userID)
+            return []
 
-        # Sort by numeric portion of FoodID (assuming format like "F019", "F020", etc.)
-        food_ids = sorted(
-            (row["FoodID"] for row in cursor.fetchall()),
-            key=lambda x: int(x[1:])
+        # [2]-[4] Age (from the birthday, as of today), BMI and normalized blood type
+        age = profile.age()
+        user_bmi = profile.bmi
+        blood_type = profile.blood_type
+
+        # [5] Map allergy names to allergen IDs (AL_IDs) using the in-memory catalog
+        catalog = food_catalog.get()
+        allergy_ids = profile.allergy_ids(catalog)
+
+        # [6] Exclusions by reason, only worked out when someone is reading them
+        if suggest_log.isEnabledFor(logging.DEBUG):
+            excluded = catalog.exclusions(age, user_bmi, blood_type, moodCategoryID, allergy_ids)
+            for reason, items in excluded.items():
+                for food_id, details in items.items():
+                    suggest_log.debug("%s excluded by %s: %s", food_id, reason, ", ".join(details))
+
+        # [7] Allowed foods = mood ∩ BMI ∩ age ∩ blood type, minus any food with the user's allergens
+        #     Already sorted by the numeric portion of FoodID ("F019", "F020", ...);
+        #     cached per filter profile, so usually no filtering happens here at all
+        def build_candidates():
+            if SUGGESTION_ENGINE == "sql":
+                return eligible_food_ids_sql(conn, age, user_bmi, blood_type, moodCategoryID, allergy_ids)
+            return catalog.ids_from_bits(
+                catalog.eligible_bits(age, user_bmi, blood_type, moodCategoryID, allergy_ids)
+            )
+
+        food_ids = suggestion_candidates.get(
+            catalog, CandidateCache.key(catalog, age, user_bmi, blood_type, moodCategoryID, allergy_ids), build_candidates
         )
 
-        # [8] Randomize and keep at most 3
-        random.shuffle(food_ids)
-        final_food_ids = food_ids[:3]
+        # [8] Random pick of at most 3 (the cached tuple itself is shared, so sample instead of shuffling)
+        final_food_ids = random.sample(food_ids, min(3, len(food_ids)))
 
-        # [9] Insert into foodsuggestion table
-        insert_cursor = conn.cursor()
+        # [9] Insert into foodsuggestion table, in one statement that does nothing if
+        #     the entry already has suggestions (a queued job and the missed-entry
+        #     sweep can both get to the same entry)
         inserted_count = 0
-        for food_id in final_food_ids:
-            insert_cursor.execute("""
-                INSERT INTO foodsuggestion (MoodEntryID, UserID, FoodID, MoodCategoryID, SuggestedDate)
-                VALUES (%s, %s, %s, %s, NOW())
-            """, (moodentry_id, userID, food_id, moodCategoryID))
-            inserted_count += 1
+        if final_food_ids:
+            picks = " UNION ALL ".join(["SELECT %s AS FoodID"] * len(final_food_ids))
+            insert_cursor = conn.cursor()
+            try:
+                insert_cursor.execute(f"""
+                    INSERT INTO foodsuggestion (MoodEntryID, UserID, FoodID, MoodCategoryID, SuggestedDate)
+                    SELECT %s, %s, picks.FoodID, %s, NOW()
+                    FROM ({picks}) AS picks
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM foodsuggestion fs
+                        WHERE fs.UserID = %s AND fs.MoodEntryID = %s
+                    )
+                """, [moodentry_id, userID, moodCategoryID, *final_food_ids, userID, moodentry_id])
+                inserted_count = insert_cursor.rowcount
+            finally:
+                insert_cursor.close()
         conn.commit()
-        insert_cursor.close()
+        if final_food_ids and not inserted_count:
+            suggest_log.debug("Mood entry %s already has suggestions; nothing inserted", moodentry_id)
+            return []
 
         # [10] Debug: Final Output
-        print("=== [✔] Final Food Suggestions ===")
-        for idx, food_id in enumerate(final_food_ids, start=1):
-            print(f"[{idx:02}] Suggested FoodID: {food_id}")
-        print(f"✅ Inserted {inserted_count} new suggestions.")
+        suggest_log.debug("Inserted %d suggestions for mood entry %s: %s",
+                          inserted_count, moodentry_id, final_food_ids)
 
         return final_food_ids
 
-    except Exception as e:
-        print(f"[❌ ERROR] {e}")
+    except Exception:
         if conn:
             conn.rollback()
+        if raise_errors:
+            raise
+        suggest_log.exception("Building suggestions for mood entry %s failed", moodentry_id)
         return []
     finally:
         if cursor:
             cursor.close()
         if need_to_close_conn:
             conn.close()
+
+def eligible_foods_batch(pairs):
+    """
+    Eligible FoodIDs (catalog order) for many (UserID, MoodCategoryID) pairs,
+    using the same filters as generate_food_suggestions but writing nothing.
+    Returns a list parallel to `pairs`, with None for users that don't exist.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        profiles = user_profiles.get_many(cursor, [user_id for user_id, _ in pairs])
+    finally:
+        cursor.close()
+        conn.close()
+
+    catalog = food_catalog.get()
+    today = datetime.date.today()
+    results = [None] * len(pairs)
+    known = [(k, profiles[user_id], mood_id)
+             for k, (user_id, mood_id) in enumerate(pairs) if user_id in profiles]
+
+    if np is None:
+        for k, profile, mood_id in known:
+            results[k] = catalog.ids_from_bits(catalog.eligible_bits(
+                profile.age(today), profile.bmi, profile.blood_type, mood_id, profile.allergy_ids(catalog)
+            ))
+        return results
+
+    matrices = catalog.matrices()
+    for start in range(0, len(known), ELIGIBLE_CHUNK):
+        chunk = known[start:start + ELIGIBLE_CHUNK]
+        allowed = matrices.eligible(
+            [profile.age(today) for _, profile, _ in chunk],
+            [profile.bmi for _, profile, _ in chunk],
+            [profile.blood_type for _, profile, _ in chunk],
+            [mood_id for _, _, mood_id in chunk],
+            [profile.allergy_ids(catalog) for _, profile, _ in chunk],
+        )
+        # One nonzero() for the whole chunk (row-major), then slice it back into per-pair lists
+        ids = matrices.food_ids[np.nonzero(allowed)[1]].tolist()
+        pos = 0
+        for (k, _, _), count in zip(chunk, allowed.sum(axis=1).tolist()):
+            results[k] = ids[pos:pos + count]
+            pos += count
+    return results
+
+###############################################################################
+# ASYNC SUGGESTION QUEUE (opt-in with ASYNC_SUGGESTIONS=1)
+###############################################################################
+class SuggestionQueue:
+    """
+    Bounded job queue + worker threads that run generate_food_suggestions
+    off the request path.
+      - submit() returns False when the queue is full; the caller then builds
+        suggestions inline, which pushes back on bursts instead of growing memory.
+      - Failed jobs are retried up to `retries` times with exponential backoff.
+      - Jobs only live in this process. /foodsuggestion works out "pending" from
+        the database (any worker can answer), and sweep_missing_suggestions()
+        in the background worker fills in jobs lost to a restart or crash.
+    """
+    def __init__(self, workers, maxsize, retries):
+        self.workers = workers
+        self.retries = retries
+        self._jobs = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._started = False
+        self._stats = {"submitted": 0, "completed": 0, "retried": 0, "failed": 0, "rejected": 0}
+
+    def _start(self):
+        # Threads are started on first use so importing make.py stays cheap
+        with self._lock:
+            if self._started:
+                return
+            for _ in range(self.workers):
+                threading.Thread(target=self._worker, daemon=True).start()
+            self._started = True
+
+    def submit(self, moodentry_id, user_id, mood_category_id):
+        self._start()
+        try:
+            self._jobs.put_nowait((moodentry_id, user_id, mood_category_id))
+        except queue.Full:
+            with self._lock:
+                self._stats["rejected"] += 1
+            return False
+        with self._lock:
+            self._stats["submitted"] += 1
+        return True
+
+    def _worker(self):
+        while True:
+            moodentry_id, user_id, mood_category_id = self._jobs.get()
+            outcome = "failed"
+            for attempt in range(self.retries + 1):
+                try:
+                    generate_food_suggestions(moodentry_id, user_id, mood_category_id, raise_errors=True)
+                    outcome = "completed"
+                    break
+                except Exception as e:
+                    suggest_log.warning("Suggestion job %s attempt %d failed: %s", moodentry_id, attempt + 1, e)
+                    if attempt < self.retries:
+                        with self._lock:
+                            self._stats["retried"] += 1
+                        time.sleep(0.5 * (2 ** attempt))
+            with self._lock:
+                self._stats[outcome] += 1
+            self._jobs.task_done()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, queued=self._jobs.qsize())
+
+
+suggestion_queue = SuggestionQueue(SUGGESTION_WORKERS, SUGGESTION_QUEUE_SIZE, SUGGESTION_RETRIES)
+
+MISSED_SUGGESTIONS_SQL = """
+    SELECT me.MoodEntryID, me.UserID, me.MoodCategoryID, me.DateTime
+    FROM moodentry me
+    WHERE me.DateTime >= NOW() - INTERVAL %s SECOND
+      AND me.DateTime <  NOW() - INTERVAL %s SECOND
+      AND (me.DateTime > %s OR (me.DateTime = %s AND me.MoodEntryID > %s))
+      AND NOT EXISTS (
+          SELECT 1 FROM foodsuggestion fs
+          WHERE fs.UserID = me.UserID AND fs.MoodEntryID = me.MoodEntryID
+      )
+    ORDER BY me.DateTime, me.MoodEntryID
+    LIMIT %s
+"""
+
+def sweep_missing_suggestions(grace=SUGGESTION_SWEEP_GRACE, window=SUGGESTION_SWEEP_WINDOW,
+                              page=SUGGESTION_SWEEP_PAGE):
+    """
+    Build suggestions for mood entries from the last `window` seconds that are
+    older than `grace` seconds and still have none (e.g. their async job was
+    lost when a web worker restarted). Returns how many entries got suggestions.
+    Entries with no eligible foods are looked at again on every sweep, which is
+    harmless: they produce nothing. A job still queued for an entry may finish
+    after the sweep (or before it): generate_food_suggestions inserts nothing
+    for an entry that already has suggestions, so neither duplicates them.
+    """
+    filled = 0
+    after = (datetime.datetime(1970, 1, 1), 0)
+    while True:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(MISSED_SUGGESTIONS_SQL, (window, grace, after[0], after[0], after[1], page))
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+        for row in rows:
+            if generate_food_suggestions(row["MoodEntryID"], row["UserID"], row["MoodCategoryID"]):
+                filled += 1
+        if len(rows) < page:
+            break
+        after = (rows[-1]["DateTime"], rows[-1]["MoodEntryID"])
+    if filled:
+        suggest_log.info("Filled in suggestions for %d missed mood entries", filled)
+    return filled
+
 ###############################################################################
 # MOOD ENTRY ENDPOINTS
 ###############################################################################
@@ -333,28 +1900,28 @@ def save_mood():
     conn = None
     cursor = None
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASS,
-            database=DB_NAME
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
         insert_sql = """
             INSERT INTO moodentry (UserID, MoodCategoryID, MoodIntensity, DateTime)
             VALUES (%s, %s, %s, NOW())
         """
         cursor.execute(insert_sql, (userID, moodCategoryID, moodIntensity))
+        moodentry_id = cursor.lastrowid
+        record_mood_rollup(cursor, moodentry_id)
         conn.commit()
 
-        moodentry_id = cursor.lastrowid
+        # Async mode: hand suggestion generation to the workers and answer right away
+        if ASYNC_SUGGESTIONS and suggestion_queue.submit(moodentry_id, userID, moodCategoryID):
+            return jsonify(success=True, pending=True, moodEntryID=moodentry_id)
+
         # Generate suggestions now that we have a moodentry_id
         generate_food_suggestions(moodentry_id, userID, moodCategoryID, open_conn=conn)
 
         return jsonify(success=True)
 
     except Exception as e:
-        print("Error inserting mood:", e)
+        http_log.exception("Error inserting mood")
         return jsonify(success=False, error=str(e))       
     finally:
         if cursor:
@@ -362,134 +1929,338 @@ def save_mood():
         if conn:
             conn.close()
 
+###############################################################################
+# KEYSET PAGINATION + STREAMING (history endpoints)
+###############################################################################
+def parse_keyset_args():
+    """
+    Read ?before=<ISO DateTime>,<ID>&limit=N (an empty DateTime continues
+    among the rows whose date is NULL, see keyset_predicate).
+    Returns (before, limit); before is (datetime or None, id) or None, limit is int or None.
+    Raises ValueError on malformed input.
+    """
+    before = None
+    before_str = request.args.get('before')
+    if before_str:
+        dt_str, _, id_str = before_str.rpartition(',')
+        try:
+            before = (datetime.datetime.fromisoformat(dt_str) if dt_str else None, int(id_str))
+        except ValueError:
+            raise ValueError("Invalid before cursor. Use <YYYY-MM-DDTHH:MM:SS>,<ID>")
+
+    limit = request.args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError("limit must be an integer")
+        if not 1 <= limit <= HISTORY_PAGE_MAX:
+            raise ValueError(f"limit must be between 1 and {HISTORY_PAGE_MAX}")
+    elif before:
+        limit = HISTORY_PAGE_MAX
+    return before, limit
+
+def keyset_predicate(dt_col, id_col, before):
+    """
+    (sql, params) matching the rows after `before` in ORDER BY dt_col DESC, id_col DESC.
+    MySQL (and the sqlite stand-in) sort NULL dates last in that order, so they
+    follow every dated row, and a NULL `before` date pages among them by id.
+    """
+    dt, row_id = before
+    if dt is None:
+        return f"({dt_col} IS NULL AND {id_col} < %s)", [row_id]
+    return (f"({dt_col} < %s OR ({dt_col} = %s AND {id_col} < %s) OR {dt_col} IS NULL)",
+            [dt, dt, row_id])
+
+def _fetch_page(page_sql, before, size, dictionary):
+    """One keyset page (at most `size` rows) on a briefly borrowed pooled connection."""
+    sql, params = page_sql(before)
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor(dictionary=dictionary)
+        try:
+            cursor.execute(sql + " LIMIT %s", list(params) + [size])
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+    finally:
+        conn.close()
+
+def rows_response(page_sql, to_json, cursor_key, before, limit, dictionary=False):
+    """
+    Send rows through `to_json`, newest first.
+    `page_sql(before)` returns (sql, params) for the rows older than the keyset
+    `before` (all rows if None), ordered newest first, without a LIMIT.
+      - limit set -> one keyset page; `X-Next-Cursor` holds the `before=` value
+                     for the next page (absent on the last page).
+      - no limit  -> the whole result is streamed in keyset pages of
+                     STREAM_FETCH_SIZE rows. Each page is read in full and its
+                     connection returned before it is sent, so a slow client
+                     never holds a pooled connection.
+    ?format=ndjson sends one JSON object per line instead of a JSON array.
+    """
+    ndjson = request.args.get('format') == 'ndjson'
+    mimetype = "application/x-ndjson" if ndjson else "application/json"
+    dumps = app.json.dumps
+
+    if limit is not None:
+        rows = _fetch_page(page_sql, before, limit + 1, dictionary)
+        page = rows[:limit]
+        items = [to_json(row) for row in page]
+        if ndjson:
+            body = "".join(dumps(item) + "\n" for item in items)
+        else:
+            body = dumps(items)
+        resp = Response(body, mimetype=mimetype)
+        if len(rows) > limit:
+            dt, row_id = cursor_key(page[-1])
+            resp.headers["X-Next-Cursor"] = f"{dt.isoformat() if dt else ''},{row_id}"
+        return resp
+
+    # First page up front so a failing query still turns into an error response
+    chunk = _fetch_page(page_sql, before, STREAM_FETCH_SIZE, dictionary)
+
+    def generate(chunk):
+        first = True
+        if not ndjson:
+            yield "["
+        while chunk:
+            parts = []
+            for row in chunk:
+                text = dumps(to_json(row))
+                if ndjson:
+                    parts.append(text + "\n")
+                else:
+                    parts.append(text if first else "," + text)
+                first = False
+            yield "".join(parts)
+            if len(chunk) < STREAM_FETCH_SIZE:
+                break
+            chunk = _fetch_page(page_sql, cursor_key(chunk[-1]), STREAM_FETCH_SIZE, dictionary)
+        if not ndjson:
+            yield "]"
+
+    return Response(generate(chunk), mimetype=mimetype)
+
+###############################################################################
+# MOOD ENTRY HISTORY
+###############################################################################
+def _mood_entry_json(row):
+    moodentry_id, db_user_id, category_code, intensity, dt = row
+    date_label = dt.strftime("%b %d") if dt else "Jan 01"
+    time_label = dt.strftime("%H:%M") if dt else "00:00"
+    return {
+        "MoodEntryID": moodentry_id,
+        "userId":      db_user_id,
+        "mood":        (category_code or "").upper().strip(),
+        "intensity":   intensity,
+        "dateLabel":   date_label,
+        "timeLabel":   time_label
+    }
+
 @app.route('/moodentry', methods=['GET'])
 def get_mood_entries():
+    """
+    Mood entries, newest first.
+    Optional keyset paging: ?limit=50 then ?before=<X-Next-Cursor>&limit=50
+    (served by the (UserID, DateTime) index from migrations/002).
+    """
     user_id = request.args.get('userId', None)
-    conn = None
-    cursor = None
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASS,
-            database=DB_NAME
-        )
-        cursor = conn.cursor()
+        before, limit = parse_keyset_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
+    def page_sql(before):
+        where = []
+        params = []
         if user_id:
-            sql = """SELECT MoodEntryID, UserID, MoodCategoryID, MoodIntensity, DateTime
-                     FROM moodentry
-                     WHERE UserID = %s
-                     ORDER BY DateTime DESC"""
-            cursor.execute(sql, (user_id,))
-        else:
-            sql = """SELECT MoodEntryID, UserID, MoodCategoryID, MoodIntensity, DateTime
-                     FROM moodentry
-                     ORDER BY DateTime DESC"""
-            cursor.execute(sql)
+            where.append("UserID = %s")
+            params.append(user_id)
+        if before:
+            predicate, keyset_params = keyset_predicate("DateTime", "MoodEntryID", before)
+            where.append(predicate)
+            params.extend(keyset_params)
+
+        sql = """SELECT MoodEntryID, UserID, MoodCategoryID, MoodIntensity, DateTime
+                 FROM moodentry"""
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY DateTime DESC, MoodEntryID DESC"
+        return sql, params
 
-        rows = cursor.fetchall()
-        data = []
-        for row in rows:
-            moodentry_id, db_user_id, category_code, intensity, dt = row
-            date_label = dt.strftime("%b %d") if dt else "Jan 01"
-            time_label = dt.strftime("%H:%M") if dt else "00:00"
-
-            data.append({
-                "MoodEntryID": moodentry_id,
-                "userId":      db_user_id,
-                "mood":        (category_code or "").upper().strip(),
-                "intensity":   intensity,
-                "dateLabel":   date_label,
-                "timeLabel":   time_label
-            })
-        return jsonify(data)
-
-    except Exception as e:
-        print("Error fetching mood entries:", e)
+    try:
+        return rows_response(page_sql, _mood_entry_json, lambda row: (row[4], row[0]), before, limit)
+    except Exception:
+        http_log.exception("Error fetching mood entries")
         return jsonify([]), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 ###############################################################################
 # FOOD ITEMS ENDPOINTS
 ###############################################################################
 @app.route('/ourmenu', methods=['GET'])
 def get_our_menu():
-    conn = None
-    cursor = None
-    try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASS,
-            database=DB_NAME
-        )
-        cursor = conn.cursor()
-        sql = """SELECT FoodID, FoodName, ImageURL FROM fooditems ORDER BY FoodID"""
-        cursor.execute(sql)
-        rows = cursor.fetchall()
-        data = [{"FoodID": food_id, "FoodName": food_name, "ImageURL": image_url} 
-                for food_id, food_name, image_url in rows]
-        return jsonify(data)
+    def load():
+        conn = None
+        cursor = None
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            sql = """SELECT FoodID, FoodName, ImageURL FROM fooditems ORDER BY FoodID"""
+            cursor.execute(sql)
+            rows = cursor.fetchall()
+            return [{"FoodID": food_id, "FoodName": food_name, "ImageURL": image_url}
+                    for food_id, food_name, image_url in rows]
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
 
+    try:
+        return cached_json_response(catalog_response_cache, ("ourmenu",), load)
     except Exception as e:
-        print("Error fetching food items:", e)
+        http_log.exception("Error fetching food items")
         return jsonify({"error": str(e)}), 500
+
+###############################################################################
+# MOOD SUMMARY (daily rollup)
+###############################################################################
+# mood_daily_user (migrations/003) holds one count per (user, day, mood).
+# save_mood bumps it in the same transaction as the moodentry insert, so a
+# summary over N days reads at most N rows per mood instead of every raw entry.
+# The all-users summary sums it per day at read time: a shared per-day row
+# bumped on every save would have all concurrent saves queue on its row lock.
+ROLLUP_UPSERT_USER = """
+    INSERT INTO mood_daily_user (UserID, Day, MoodCategoryID, MoodCount)
+    SELECT UserID, DATE(DateTime), COALESCE(UPPER(TRIM(MoodCategoryID)), ''), 1
+    FROM moodentry
+    WHERE MoodEntryID = %s
+    ON DUPLICATE KEY UPDATE MoodCount = MoodCount + 1
+"""
+
+SUMMARY_RANGES = {"weekly": 7, "monthly": 30, "quarterly": 90, "yearly": 365}
+SUMMARY_MAX_DAYS = 3660
+
+def is_missing_table(exc):
+    """True for MySQL's "Table ... doesn't exist", i.e. a migration that hasn't been applied."""
+    return getattr(exc, "errno", None) == mysql.connector.errorcode.ER_NO_SUCH_TABLE
+
+def record_mood_rollup(cursor, moodentry_id):
+    """
+    Count one freshly inserted moodentry row in mood_daily_user (caller commits).
+    Without migrations/003 the mood is still saved; only /moodsummary misses it.
+    """
+    try:
+        cursor.execute(ROLLUP_UPSERT_USER, (moodentry_id,))
+    except mysql.connector.errors.ProgrammingError as e:
+        if not is_missing_table(e):
+            raise
+        db_log.warning("mood_daily_user is missing (apply migrations/003); not counting mood entry %s",
+                       moodentry_id)
+
+def backfill_mood_rollup(since=None):
+    """
+    Rebuild mood_daily_user from raw moodentry rows, in one transaction.
+    With `since` (a date) only days >= since are rebuilt.
+    """
+    day_filter = " WHERE Day >= %s" if since else ""
+    entry_filter = " WHERE DateTime >= %s" if since else ""
+    params = (since,) if since else ()
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM mood_daily_user" + day_filter, params)
+        cursor.execute(f"""
+            INSERT INTO mood_daily_user (UserID, Day, MoodCategoryID, MoodCount)
+            SELECT UserID, DATE(DateTime), COALESCE(UPPER(TRIM(MoodCategoryID)), ''), COUNT(*)
+            FROM moodentry{entry_filter}
+            GROUP BY UserID, DATE(DateTime), COALESCE(UPPER(TRIM(MoodCategoryID)), '')
+        """, params)
+        user_rows = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
     finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+        cursor.close()
+        conn.close()
+
+    catalog_log.info("Mood rollup rebuilt%s: %d user/day rows",
+                     f" since {since}" if since else "", user_rows)
+
+def summary_window():
+    """
+    Resolve the requested window to (first_day, last_day), both inclusive.
+      ?start=YYYY-MM-DD&end=YYYY-MM-DD  explicit dates (end defaults to today)
+      ?days=N                           the last N days, today included
+      ?range=weekly|monthly|quarterly|yearly
+    Raises ValueError on bad input.
+    """
+    today = datetime.date.today()
+    start = request.args.get('start')
+    if start:
+        try:
+            first = datetime.date.fromisoformat(start)
+            last = datetime.date.fromisoformat(request.args.get('end') or today.isoformat())
+        except ValueError:
+            raise ValueError("start/end must be YYYY-MM-DD")
+        if last < first:
+            raise ValueError("end is before start")
+        if (last - first).days >= SUMMARY_MAX_DAYS:
+            raise ValueError(f"range is longer than {SUMMARY_MAX_DAYS} days")
+        return first, last
+
+    days = request.args.get('days')
+    if days is not None:
+        try:
+            days = int(days)
+        except ValueError:
+            raise ValueError("days must be an integer")
+        if not 1 <= days <= SUMMARY_MAX_DAYS:
+            raise ValueError(f"days must be between 1 and {SUMMARY_MAX_DAYS}")
+    else:
+        range_param = request.args.get('range', 'weekly')
+        days = SUMMARY_RANGES.get(range_param, SUMMARY_RANGES["monthly"])
+    return today - datetime.timedelta(days=days - 1), today
 
-###############################################################################
-# MOOD SUMMARY (OPTIONAL)
-###############################################################################
 @app.route('/moodsummary', methods=['GET'])
 def mood_summary():
-    range_param = request.args.get('range', 'weekly')  # 'weekly' or 'monthly'
-    user_id     = request.args.get('userId', None)
-
-    days_back = 7 if range_param == 'weekly' else 30
+    user_id = request.args.get('userId', None)
+    try:
+        first, last = summary_window()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     conn = None
     cursor = None
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASS,
-            database=DB_NAME
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         if user_id:
-            sql = """SELECT MoodCategoryID
-                     FROM moodentry
+            sql = """SELECT MoodCategoryID, SUM(MoodCount)
+                     FROM mood_daily_user
                      WHERE UserID = %s
-                       AND DateTime >= NOW() - INTERVAL %s DAY"""
-            cursor.execute(sql, (user_id, days_back))
+                       AND Day BETWEEN %s AND %s
+                     GROUP BY MoodCategoryID"""
+            cursor.execute(sql, (user_id, first, last))
         else:
-            sql = """SELECT MoodCategoryID
-                     FROM moodentry
-                     WHERE DateTime >= NOW() - INTERVAL %s DAY"""
-            cursor.execute(sql, (days_back,))
+            # Served from the (Day, MoodCategoryID, MoodCount) index alone
+            sql = """SELECT MoodCategoryID, SUM(MoodCount)
+                     FROM mood_daily_user
+                     WHERE Day BETWEEN %s AND %s
+                     GROUP BY MoodCategoryID"""
+            cursor.execute(sql, (first, last))
 
-        rows = cursor.fetchall()
-        mood_counts = {}
-        total = 0
-        for (category_code,) in rows:
-            code = (category_code or "").upper().strip()
-            mood_counts[code] = mood_counts.get(code, 0) + 1
-            total += 1
+        mood_counts = {code: int(count) for code, count in cursor.fetchall() if count}
+        total = sum(mood_counts.values())
 
         return jsonify({"total": total, "counts": mood_counts})
 
-    except Exception as e:
-        print("Error in mood_summary:", e)
+    except Exception:
+        http_log.exception("Error in mood_summary")
         return jsonify({"total": 0, "counts": {}}), 500
     finally:
         if cursor:
@@ -509,22 +2280,17 @@ def get_food_suggestions():
     conn = None
     cursor = None
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASS,
-            database=DB_NAME
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         # 1️⃣: Find latest MoodEntryID for the user
         cursor.execute("""
-            SELECT MoodEntryID
+            SELECT MoodEntryID, DateTime >= NOW() - INTERVAL %s SECOND AS Recent
             FROM moodentry
             WHERE UserID = %s
             ORDER BY DateTime DESC
             LIMIT 1
-        """, (user_id,))
+        """, (SUGGESTION_PENDING_WINDOW, user_id))
         moodentry = cursor.fetchone()
         if not moodentry:
             return jsonify([])
@@ -548,10 +2314,15 @@ def get_food_suggestions():
         """, (user_id, latest_moodentry_id))
 
         rows = cursor.fetchall()
-        return jsonify(rows)
+        resp = jsonify(rows)
+        # Async mood saves: tell the page the latest suggestions are still being built.
+        # Decided from the database, since the job may run in another worker process.
+        pending = ASYNC_SUGGESTIONS and not rows and bool(moodentry["Recent"])
+        resp.headers["X-Suggestions-Pending"] = "true" if pending else "false"
+        return resp
 
     except Exception as e:
-        print("Error fetching food suggestions:", e)
+        http_log.exception("Error fetching food suggestions")
         return jsonify({"error": str(e)}), 500
     finally:
         if cursor:
@@ -559,6 +2330,45 @@ def get_food_suggestions():
         if conn:
             conn.close()
 
+@app.route('/eligible_foods', methods=['POST'])
+def eligible_foods():
+    """
+    Read-only bulk version of the suggestion filters, for reports and batch jobs:
+      { "pairs": [["U001", "MD01"], ["U002", "MD03"], ...] }
+      { "userIds": ["U001", "U002"], "moods": ["MD01", "MD02"] }   (every user x mood; moods default to all)
+    Returns { "results": [{"userId", "moodCategoryId", "foodIds": [...]}, ...],
+              "unknownUsers": [...] }. Nothing is written to foodsuggestion.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        if "pairs" in data:
+            pairs = [(str(user_id).strip(), str(mood_id).strip().upper()) for user_id, mood_id in data["pairs"]]
+        else:
+            moods = [str(m).strip().upper() for m in data.get("moods") or MOOD_LABELS]
+            pairs = [(str(user_id).strip(), mood_id) for user_id in data.get("userIds") or [] for mood_id in moods]
+    except (TypeError, ValueError):
+        return jsonify({"error": "pairs must be [userId, moodCategoryId] lists"}), 400
+
+    if not pairs:
+        return jsonify({"error": "Missing pairs or userIds"}), 400
+    if len(pairs) > MAX_ELIGIBLE_PAIRS:
+        return jsonify({"error": f"At most {MAX_ELIGIBLE_PAIRS} pairs per request"}), 400
+
+    try:
+        food_ids = eligible_foods_batch(pairs)
+    except Exception as e:
+        http_log.exception("Error in eligible_foods")
+        return jsonify({"error": str(e)}), 500
+
+    results = []
+    unknown = []
+    for (user_id, mood_id), ids in zip(pairs, food_ids):
+        if ids is None:
+            unknown.append(user_id)
+        else:
+            results.append({"userId": user_id, "moodCategoryId": mood_id, "foodIds": ids})
+    return jsonify({"results": results, "unknownUsers": list(dict.fromkeys(unknown))})
+
 
 ###############################################################################
 # FOOD INGREDIENT ENDPOINTS
@@ -569,47 +2379,95 @@ def get_food_ingredients():
     if not food_id:
         return jsonify({"food": None, "ingredients": []}), 400
 
-    conn = None
-    cursor = None
-    try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASS,
-            database=DB_NAME
-        )
-        cursor = conn.cursor(dictionary=True)
+    def load():
+        conn = None
+        cursor = None
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor(dictionary=True)
 
-        # main food item
-        sql_food = """
-            SELECT FoodID, FoodName, MoodCategoryID, BMI, Age_Range
-            FROM fooditems
-            WHERE FoodID = %s
-            LIMIT 1
-        """
-        cursor.execute(sql_food, (food_id,))
-        food_row = cursor.fetchone()
-
-        # ingredients
-        sql_ing = """
-            SELECT i.IngredientID, i.IngredientName, i.Allergy, i.BloodType
-            FROM food_ingredient fi
-            JOIN ingredients i ON fi.IngredientID = i.IngredientID
-            WHERE fi.FoodID = %s
-        """
-        cursor.execute(sql_ing, (food_id,))
-        rows_ing = cursor.fetchall()
+            # main food item
+            sql_food = """
+                SELECT FoodID, FoodName, MoodCategoryID, BMI, Age_Range
+                FROM fooditems
+                WHERE FoodID = %s
+                LIMIT 1
+            """
+            cursor.execute(sql_food, (food_id,))
+            food_row = cursor.fetchone()
+
+            # ingredients
+            sql_ing = """
+                SELECT i.IngredientID, i.IngredientName, i.Allergy, i.BloodType
+                FROM food_ingredient fi
+                JOIN ingredients i ON fi.IngredientID = i.IngredientID
+                WHERE fi.FoodID = %s
+            """
+            cursor.execute(sql_ing, (food_id,))
+            rows_ing = cursor.fetchall()
 
-        return jsonify({"food": food_row, "ingredients": rows_ing})
+            return {"food": food_row, "ingredients": rows_ing}
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
 
-    except Exception as e:
-        print("Error in get_food_ingredients:", e)
+    try:
+        return cached_json_response(catalog_response_cache, ("foodingredient", food_id), load)
+    except Exception:
+        http_log.exception("Error in get_food_ingredients")
         return jsonify({"food": None, "ingredients": []}), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+
+@app.route('/foodingredients', methods=['GET', 'POST'])
+def get_food_ingredients_batch():
+    """
+    Batch version of /foodingredient.
+      GET  /foodingredients?foodIds=F001,F002,F003
+      POST /foodingredients  { "foodIds": ["F001", "F002", "F003"] }
+    Returns { FoodID: {"food": {...} or null, "ingredients": [...]} } straight
+    from the in-memory catalog, so N foods cost no DB round trips.
+    """
+    if request.method == 'POST':
+        food_ids = (request.get_json(silent=True) or {}).get('foodIds') or []
+    else:
+        food_ids = (request.args.get('foodIds') or "").split(",")
+    food_ids = sorted({str(f).strip() for f in food_ids if str(f).strip()})
+
+    if not food_ids:
+        return jsonify({"error": "Missing foodIds"}), 400
+    if len(food_ids) > MAX_BATCH_FOOD_IDS:
+        return jsonify({"error": f"At most {MAX_BATCH_FOOD_IDS} foodIds per request"}), 400
+
+    def load():
+        catalog = food_catalog.get()
+        result = {}
+        for food_id in food_ids:
+            row = catalog.foods.get(food_id)
+            if row is None:
+                result[food_id] = {"food": None, "ingredients": []}
+                continue
+            result[food_id] = {
+                # Same fields as /foodingredient
+                "food": {
+                    "FoodID":         row["FoodID"],
+                    "FoodName":       row["FoodName"],
+                    "MoodCategoryID": row["MoodCategoryID"],
+                    "BMI":            row["BMI"],
+                    "Age_Range":      row["age_range"],
+                },
+                "ingredients": [
+                    catalog.ingredients[iid]
+                    for iid in sorted(catalog.food_ingredients.get(food_id, ()))
+                ],
+            }
+        return result
+
+    try:
+        return cached_json_response(catalog_response_cache, ("foodingredients", tuple(food_ids)), load)
+    except Exception as e:
+        http_log.exception("Error in get_food_ingredients_batch")
+        return jsonify({"error": str(e)}), 500
 
 ###############################################################################
 # EATEN FLAG UPDATE
@@ -624,12 +2482,7 @@ def update_eaten_flag():
     conn = None
     cursor = None
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASS,
-            database=DB_NAME
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
         sql = """
             UPDATE foodsuggestion
@@ -644,7 +2497,7 @@ def update_eaten_flag():
         return "OK", 200
 
     except Exception as e:
-        print("Error in update_eaten_flag:", e)
+        http_log.exception("Error in update_eaten_flag")
         return str(e), 500
     finally:
         if cursor:
@@ -652,16 +2505,147 @@ def update_eaten_flag():
         if conn:
             conn.close()
 
-def dprint(*args, **kwargs):
-    """ Helper for debug printing. """
-    print(*args, **kwargs)
-
 ###############################################################################
 # NOTIFICATIONS & EMAIL REMINDERS
 ###############################################################################
-def send_email_reminder(to_email):
+class MailDelivery:
+    """
+    Bounded pool of persistent, authenticated SMTP sessions with a thread fan-out.
+      - Each of the `size` worker threads reuses an open session (STARTTLS + login
+        happen once per session, not per email). Sessions idle longer than
+        `noop_after` are checked with NOOP and reopened if the server dropped them.
+      - Transient failures (disconnects, 4xx replies) are retried up to `retries`
+        times with exponential backoff; 5xx replies and refused recipients are not.
+      - stats() reports sent/failed/retried counts and the last batch's throughput.
+    """
+    def __init__(self, size, retries, noop_after):
+        self.size = size
+        self.retries = retries
+        self.noop_after = noop_after
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="smtp")
+        self._idle = queue.LifoQueue()   # (session, last_used)
+        self._lock = threading.Lock()
+        self._stats = {"sent": 0, "failed": 0, "retried": 0, "sessions_opened": 0, "sessions_dropped": 0}
+        self._last_batch = None
+
+    def _open(self):
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        try:
+            if SMTP_USE_TLS:
+                server.starttls()
+            if SMTP_PASS:
+                server.login(SMTP_USER, SMTP_PASS)
+        except Exception:
+            self._discard(server)
+            raise
+        with self._lock:
+            self._stats["sessions_opened"] += 1
+        return server
+
+    def _discard(self, server):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _checkout(self):
+        try:
+            server, last_used = self._idle.get_nowait()
+        except queue.Empty:
+            return self._open()
+        if time.monotonic() - last_used > self.noop_after:
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._discard(server)
+            with self._lock:
+                self._stats["sessions_dropped"] += 1
+            return self._open()
+        return server
+
+    def _checkin(self, server):
+        self._idle.put((server, time.monotonic()))
+
+    def _drop(self, server):
+        if server is not None:
+            self._discard(server)
+            with self._lock:
+                self._stats["sessions_dropped"] += 1
+
+    def _deliver(self, msg):
+        """Send one message on a pooled session. Returns True once it is accepted."""
+        for attempt in range(self.retries + 1):
+            server = None
+            try:
+                server = self._checkout()
+                server.send_message(msg)
+                self._checkin(server)
+                with self._lock:
+                    self._stats["sent"] += 1
+                return True
+            except smtplib.SMTPRecipientsRefused as e:
+                self._checkin(server)  # the session itself is fine
+                error, permanent = e, True
+            except smtplib.SMTPResponseException as e:
+                # Also raised while opening a session (SMTPConnectError, SMTPAuthenticationError),
+                # in which case there is nothing to give back
+                if server is not None:
+                    self._checkin(server)
+                error, permanent = e, e.smtp_code >= 500
+            except (smtplib.SMTPException, OSError) as e:
+                self._drop(server)
+                error, permanent = e, False
+            except Exception as e:
+                # Never let one message take down the batch (send_many reads every future)
+                self._drop(server)
+                error, permanent = e, True
+
+            if permanent or attempt == self.retries:
+                break
+            with self._lock:
+                self._stats["retried"] += 1
+            time.sleep(SMTP_RETRY_BACKOFF * (2 ** attempt))
+
+        with self._lock:
+            self._stats["failed"] += 1
+        reminder_log.warning("Failed to send email to %s: %s", msg["To"], error)
+        return False
+
+    def send(self, msg):
+        """Send one message and wait for the outcome."""
+        return self._executor.submit(self._deliver, msg).result()
+
+    def send_many(self, messages):
+        """Fan `messages` out over the pool; returns how many were accepted."""
+        started = time.monotonic()
+        futures = [self._executor.submit(self._deliver, msg) for msg in messages]
+        sent = sum(1 for future in futures if future.result())
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self._last_batch = {
+                "messages": len(futures),
+                "sent": sent,
+                "seconds": round(elapsed, 3),
+                "per_second": round(len(futures) / elapsed, 1) if elapsed else None,
+            }
+        return sent
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, idle_sessions=self._idle.qsize(), pool_size=self.size,
+                        last_batch=self._last_batch)
+
+
+mail_delivery = MailDelivery(SMTP_POOL_SIZE, SMTP_RETRIES, SMTP_NOOP_AFTER)
+
+def reminder_message(to_email):
     """
-    Sends a simple reminder email.
+    Builds the reminder email.
     """
     subject = "🌟 FoodMood Reminder – Time to Treat Yourself! 🌟"
     body = (
@@ -673,15 +2657,20 @@ def send_email_reminder(to_email):
     msg["Subject"] = subject
     msg["From"] = SMTP_USER
     msg["To"] = to_email
+    return msg
 
-    try:
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_USER, SMTP_PASS)
-            server.send_message(msg)
-        dprint(f"[INFO] Reminder email sent to {to_email}")
-    except Exception as e:
-        dprint(f"[ERROR] Failed to send email to {to_email}: {e}")
+def send_email_reminder(to_email):
+    """
+    Sends a simple reminder email (through the shared SMTP session pool).
+    """
+    if mail_delivery.send(reminder_message(to_email)):
+        reminder_log.debug("Reminder email sent to %s", to_email)
+
+def send_email_reminders(emails):
+    """Sends one reminder per address concurrently; returns how many were accepted."""
+    sent = mail_delivery.send_many([reminder_message(email) for email in emails])
+    reminder_log.info("Reminder emails sent: %d/%d", sent, len(emails))
+    return sent
 
 def calc_next_time(old_time, freq):
     """
@@ -704,74 +2693,351 @@ def calc_next_time(old_time, freq):
     else:
         return None
 
-def reminder_thread():
+def claim_due_reminders(cutoff, limit):
+    """
+    Claim up to `limit` unsent reminders due at or before `cutoff` in one short
+    transaction:
+      1) SELECT ... FOR UPDATE SKIP LOCKED  (rows another worker is claiming are skipped)
+      2) one UPDATE marks the whole batch SentFlag=1
+      3) one multi-row INSERT schedules the next occurrences (freq != 'once')
+    Returns the claimed rows; their emails are sent by the caller after commit.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("""
+            SELECT NotificationID, Email, RemindTime, Frequency
+            FROM notifications
+            WHERE SentFlag = 0
+              AND RemindTime <= %s
+            ORDER BY RemindTime
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (cutoff, limit))
+        rows = cursor.fetchall()
+        if not rows:
+            conn.rollback()
+            return []
+
+        ids = [notif["NotificationID"] for notif in rows]
+        cursor.execute(f"""
+            UPDATE notifications
+            SET SentFlag = 1
+            WHERE NotificationID IN ({",".join(["%s"] * len(ids))})
+        """, ids)
+
+        next_rows = []
+        for notif in rows:
+            freq = notif["Frequency"] or "once"
+            new_time = calc_next_time(notif["RemindTime"], freq)
+            if new_time:
+                next_rows.append((notif["Email"], new_time, freq))
+        if next_rows:
+            cursor.executemany("""
+              INSERT INTO notifications (Email, RemindTime, CreatedAt, SentFlag, Frequency)
+              VALUES (%s, %s, NOW(), 0, %s)
+            """, next_rows)
+
+        conn.commit()
+        return rows
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+def dispatch_due_reminders(cutoff):
     """
-    Background thread that runs every 60s, checks notifications table for due items.
-    If a notification is due (SentFlag=0 and RemindTime <= NOW()):
-      1) We "claim" it with an UPDATE WHERE SentFlag=0
-      2) If rowcount == 1 (we claimed it), we send the email
-      3) If freq != 'once', we schedule the next occurrence
+    Claim and send every reminder due at or before `cutoff`, REMINDER_BATCH_SIZE
+    at a time. Each batch commits before its emails go out, so a crash never
+    leaves a sent email unrecorded (at worst a claimed batch goes unsent), and
+    any number of workers can run this side by side. Returns how many were sent.
     """
+    sent = 0
     while True:
-        try:
-            conn = mysql.connector.connect(
-                host=DB_HOST,
-                user=DB_USER,
-                password=DB_PASS,
-                database=DB_NAME
-            )
-            cursor = conn.cursor(dictionary=True)
+        # Keep going until nothing is left: a long-overdue recurring reminder
+        # can insert a next occurrence that is itself already due
+        rows = claim_due_reminders(cutoff, REMINDER_BATCH_SIZE)
+        if not rows:
+            return sent
+        sent += send_email_reminders([notif["Email"] for notif in rows])
 
-            # 1) Find all unsent, due notifications
-            sql_fetch = """
-                SELECT NotificationID, Email, RemindTime, Frequency
+
+class ReminderScheduler:
+    """
+    Event-driven replacement for the old 60-second polling loop.
+      - A min-heap holds (RemindTime, NotificationID) for unsent reminders due
+        within the next `reconcile` + REMINDER_LOOKAHEAD_SLACK seconds, loaded
+        with one indexed query on (SentFlag, RemindTime).
+      - The thread sleeps on a condition until the earliest RemindTime, then
+        claims and sends everything due in batches (dispatch_due_reminders).
+      - schedule() adds a row inserted by this process and wakes the thread if it
+        is now the earliest. Rows inserted elsewhere (the web processes, when the
+        scheduler runs in `make.py worker`) are picked up every `tail_poll`
+        seconds by a primary-key probe. Auto-increment IDs need not commit in
+        order, so the probe starts at the highest ID seen REMINDER_TAIL_OVERLAP
+        seconds ago and skips the IDs it already queued.
+      - Every `reconcile` seconds the heap is rebuilt from the table, which drops
+        reminders other instances already sent. SKIP LOCKED claims keep
+        instances from sending the same reminder twice.
+    """
+    def __init__(self, reconcile, tail_poll, heap_max):
+        self.reconcile = reconcile
+        self.tail_poll = tail_poll
+        self.heap_max = heap_max
+        self._heap = []         # (RemindTime, NotificationID)
+        self._horizon = None    # rows due after this are left for the next reconcile
+        self._last_id = 0       # highest NotificationID seen by _load/_tail
+        self._marks = deque()   # (monotonic, _last_id) after each load/tail, for the tail's overlap
+        self._queued = set()    # IDs pushed above the oldest mark (tail dedupe)
+        self._truncated = False # last load hit heap_max, so reload as soon as the heap drains
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stop = None       # Event of the running thread
+        self._stats = {"sent": 0, "reconciles": 0, "errors": 0}
+
+    def start(self):
+        """
+        Start the thread if it is not running. Raises RuntimeError while a
+        thread from an earlier stop() is still finishing, so two never run.
+        """
+        with self._cond:
+            if self._thread is not None:
+                if not self._thread.is_alive():
+                    self._thread = None
+                elif self._stop.is_set():
+                    raise RuntimeError("The previous reminder scheduler thread has not stopped yet")
+                else:
+                    return
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._stop,),
+                                            name="reminder-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=30):
+        """
+        Stop the thread (e.g. on losing worker leadership) and forget the heap.
+        Returns False if the thread is still busy after `timeout`; it stays
+        tracked (`running` is True) so a later stop() can wait for it again.
+        """
+        with self._cond:
+            thread = self._thread
+            if thread is None:
+                return True
+            self._stop.set()
+            self._cond.notify_all()
+        thread.join(timeout)
+        if thread.is_alive():
+            reminder_log.warning("Reminder scheduler thread still busy %ss after stop", timeout)
+            return False
+        with self._cond:
+            if self._thread is thread:
+                self._thread = None
+            self._heap = []
+            self._horizon = None
+            self._marks.clear()
+            self._queued = set()
+        return True
+
+    @property
+    def running(self):
+        with self._cond:
+            return self._thread is not None
+
+    def schedule(self, notification_id, remind_time):
+        """Track a freshly inserted notification; wakes the thread if it is due sooner."""
+        with self._cond:
+            self._push([(remind_time, notification_id)])
+
+    def _push(self, rows):
+        # caller holds self._cond
+        if self._horizon is None:
+            return  # not running here, or not loaded yet: the next load picks them up
+        earliest = self._heap[0][0] if self._heap else None
+        for remind_time, notification_id in rows:
+            if remind_time <= self._horizon and notification_id not in self._queued:
+                heapq.heappush(self._heap, (remind_time, notification_id))
+                self._queued.add(notification_id)
+        if self._heap and (earliest is None or self._heap[0][0] < earliest):
+            self._cond.notify()
+
+    def _load(self):
+        lookahead = int(self.reconcile + REMINDER_LOOKAHEAD_SLACK)
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            # Read the high-water mark first: anything inserted after it is left to _tail
+            cursor.execute("SELECT MAX(NotificationID) FROM notifications")
+            last_id = cursor.fetchone()[0] or 0
+            cursor.execute("""
+                SELECT RemindTime, NotificationID
                 FROM notifications
                 WHERE SentFlag = 0
-                  AND RemindTime <= NOW()
-            """
-            cursor.execute(sql_fetch)
-            rows = cursor.fetchall()
+                  AND RemindTime <= NOW() + INTERVAL %s SECOND
+                ORDER BY RemindTime
+                LIMIT %s
+            """, (lookahead, self.heap_max))
+            rows = [tuple(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            conn.close()
 
-            for notif in rows:
-                notif_id  = notif["NotificationID"]
-                email     = notif["Email"]
-                old_time  = notif["RemindTime"]
-                freq      = notif["Frequency"] or "once"
-
-                # 2) Attempt to 'claim' the notification
-                sql_claim = """
-                  UPDATE notifications
-                  SET SentFlag=1
-                  WHERE NotificationID=%s AND SentFlag=0
-                """
-                cursor.execute(sql_claim, (notif_id,))
-                
-                # If rowcount==0, another process/thread already claimed/sent it
-                if cursor.rowcount == 0:
+        truncated = len(rows) >= self.heap_max
+        horizon = rows[-1][0] if truncated else datetime.datetime.now() + datetime.timedelta(seconds=lookahead)
+        with self._cond:
+            self._queued = {notification_id for _, notification_id in rows}
+            heapq.heapify(rows)
+            self._heap = rows
+            self._horizon = horizon
+            self._last_id = last_id
+            self._mark()
+            self._truncated = truncated
+            self._stats["reconciles"] += 1
+
+    def _mark(self):
+        # caller holds self._cond; keeps the newest mark at least REMINDER_TAIL_OVERLAP old as the floor
+        now = time.monotonic()
+        self._marks.append((now, self._last_id))
+        while len(self._marks) > 1 and self._marks[1][0] <= now - REMINDER_TAIL_OVERLAP:
+            self._marks.popleft()
+        floor = self._marks[0][1]
+        self._queued = {notification_id for notification_id in self._queued if notification_id > floor}
+
+    def _tail(self):
+        """Pick up rows inserted (by any process) since the last load/tail, or committed late."""
+        with self._cond:
+            floor = self._marks[0][1] if self._marks else self._last_id
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT RemindTime, NotificationID
+                FROM notifications
+                WHERE NotificationID > %s
+                  AND SentFlag = 0
+                ORDER BY NotificationID
+                LIMIT %s
+            """, (floor, self.heap_max))
+            rows = [tuple(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            conn.close()
+        with self._cond:
+            if rows:
+                self._last_id = max(self._last_id, rows[-1][1])
+                self._push(rows)
+            self._mark()
+
+    def _take_due(self, stop, deadline):
+        """Block until something is due or `deadline` (monotonic) passes; returns the due cutoff time."""
+        with self._cond:
+            while not stop.is_set():
+                now = datetime.datetime.now()
+                if self._heap and self._heap[0][0] <= now:
+                    while self._heap and self._heap[0][0] <= now:
+                        heapq.heappop(self._heap)
+                    return now
+                if time.monotonic() >= deadline or (self._truncated and not self._heap):
+                    return None
+                timeout = deadline - time.monotonic()
+                if self._heap:
+                    timeout = min(timeout, (self._heap[0][0] - now).total_seconds())
+                self._cond.wait(max(timeout, 0.01))
+            return None
+
+    def _run(self, stop):
+        next_reconcile = 0.0
+        next_tail = 0.0
+        while not stop.is_set():
+            try:
+                now = time.monotonic()
+                if now >= next_reconcile or (self._truncated and not self._heap):
+                    self._load()
+                    next_reconcile = now + self.reconcile
+                    next_tail = now + self.tail_poll
+                elif now >= next_tail:
+                    self._tail()
+                    next_tail = now + self.tail_poll
+
+                cutoff = self._take_due(stop, min(next_reconcile, next_tail))
+                if cutoff is None:
                     continue
+                sent = dispatch_due_reminders(cutoff)
+                with self._cond:
+                    self._stats["sent"] += sent
+            except Exception:
+                reminder_log.exception("Error in reminder scheduler")
+                with self._cond:
+                    self._stats["errors"] += 1
+                # Rebuild from the table after a short pause; unsent rows are still there
+                next_reconcile = time.monotonic() + REMINDER_RETRY_DELAY
+                next_tail = next_reconcile
+
+    def stats(self):
+        with self._cond:
+            return dict(
+                self._stats,
+                running=self._thread is not None,
+                queued=len(self._heap),
+                next_due=self._heap[0][0].isoformat() if self._heap else None,
+                horizon=self._horizon.isoformat() if self._horizon else None,
+            )
 
-                # 3) Now safe to send the email
-                send_email_reminder(email)
 
-                # 4) If freq != 'once', schedule the next occurrence
-                new_time = calc_next_time(old_time, freq)
-                if new_time:
-                    sql_insert = """
-                      INSERT INTO notifications (Email, RemindTime, CreatedAt, SentFlag, Frequency)
-                      VALUES (%s, %s, NOW(), 0, %s)
-                    """
-                    cursor.execute(sql_insert, (email, new_time, freq))
+reminder_scheduler = ReminderScheduler(REMINDER_RECONCILE, REMINDER_TAIL_POLL, REMINDER_HEAP_MAX)
 
-            conn.commit()
+###############################################################################
+# BACKGROUND WORKER (python make.py worker)
+###############################################################################
+def run_worker(stop=None):
+    """
+    Background jobs live here, not in the web processes: importing make.py
+    starts only the log listener. Any number of workers may run; they elect a leader with
+    the MySQL advisory lock WORKER_LOCK_NAME (GET_LOCK is held for as long as
+    the leader's connection stays open), and only the leader runs the reminder
+    scheduler and the missed-suggestion sweep. Standbys block in GET_LOCK and take over within
+    WORKER_LOCK_WAIT seconds of the leader's connection going away.
+    Runs until `stop` (an Event) is set, or forever.
+    """
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        conn = None
+        try:
+            # A dedicated connection, outside the pool: the lock lives exactly as long as it does
+            conn = db_pool._connect()
+            cursor = conn.cursor()
+            cursor.execute("SELECT GET_LOCK(%s, %s)", (WORKER_LOCK_NAME, WORKER_LOCK_WAIT))
+            acquired = cursor.fetchone()[0] == 1
             cursor.close()
-            conn.close()
-        except Exception as e:
-            dprint("[ERROR] In reminder_thread:", e)
-
-        time.sleep(60)  # check every minute
-
-# Start the background thread on app startup
-threading.Thread(target=reminder_thread, daemon=True).start()
+            if not acquired:
+                continue  # someone else leads; the finally closes conn and we queue up again
+
+            reminder_log.info("Worker %d is the leader; starting the reminder scheduler", os.getpid())
+            reminder_scheduler.start()
+            next_sweep = time.monotonic()
+            while True:
+                if time.monotonic() >= next_sweep:
+                    try:
+                        sweep_missing_suggestions()
+                    except Exception:
+                        suggest_log.exception("Error sweeping missed suggestions")
+                    next_sweep = time.monotonic() + SUGGESTION_SWEEP_INTERVAL
+                if stop.wait(WORKER_LOCK_CHECK):
+                    break
+                conn.ping(reconnect=False)  # raises once the lock connection is gone
+        except Exception:
+            reminder_log.exception("Error in worker")
+            stop.wait(WORKER_RETRY_DELAY)
+        finally:
+            if reminder_scheduler.running:
+                reminder_log.info("Worker %d stepping down; stopping the reminder scheduler", os.getpid())
+                reminder_scheduler.stop()
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
 
 @app.route('/schedule_reminder', methods=['POST'])
 def schedule_reminder():
@@ -780,7 +3046,8 @@ def schedule_reminder():
       Insert into notifications => 
         Email, RemindTime=that date/time, CreatedAt=NOW(), SentFlag=0, Frequency
     """
-    dprint("DEBUG: Entered schedule_reminder route")
+    conn = None
+    cursor = None
     try:
         data = request.get_json(force=True)
         email        = data.get('email')
@@ -797,12 +3064,7 @@ def schedule_reminder():
 
         created_at  = datetime.datetime.now()
 
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASS,
-            database=DB_NAME
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         sql = """
@@ -811,15 +3073,18 @@ def schedule_reminder():
         """
         cursor.execute(sql, (email, remind_time, created_at, frequency))
         conn.commit()
+        reminder_scheduler.schedule(cursor.lastrowid, remind_time)
 
-        cursor.close()
-        conn.close()
-
-        dprint(f"[INFO] Inserted notification for {email}, on {remind_time}. freq={frequency}")
+        reminder_log.debug("Inserted notification for %s on %s, freq=%s", email, remind_time, frequency)
         return jsonify(success=True)
     except Exception as e:
-        dprint("[ERROR in schedule_reminder]:", e)
+        http_log.exception("Error in schedule_reminder")
         return jsonify(success=False, error=str(e)), 500
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
 
 # -------------------------------------------------------
 # GET FOOD INFO (Eaten Page)
@@ -830,13 +3095,10 @@ def get_food_eaten_info():
     if not food_id:
         return jsonify({"error": "Missing foodId"}), 400
 
+    conn = None
+    cursor = None
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASS,
-            database=DB_NAME
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
         sql = """
@@ -852,7 +3114,7 @@ def get_food_eaten_info():
         return jsonify(row), 200
 
     except Exception as e:
-        print("[ERROR] /food_eaten_info:", e)
+        http_log.exception("Error in /food_eaten_info")
         return jsonify({"error": str(e)}), 500
     finally:
         if cursor:
@@ -869,6 +3131,8 @@ def store_eaten_feedback():
     Expects JSON: { userId, foodId, feeling }
     We'll store codes like MD01, MD02, MD03, MD04 in FeelBetter.
     """
+    conn = None
+    cursor = None
     try:
         data        = request.get_json(force=True)
         user_id     = data.get('userId')
@@ -889,12 +3153,7 @@ def store_eaten_feedback():
         # Default to MD04 ("Neutral") if not recognized
         feeling_code = feeling_map.get(feeling_str, "MD04")
 
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASS,
-            database=DB_NAME
-        )
+        conn = get_db_connection()
         cursor = conn.cursor()
 
         insert_sql = """
@@ -903,204 +3162,195 @@ def store_eaten_feedback():
         """
         cursor.execute(insert_sql, (user_id, food_id, feeling_code))
         conn.commit()
-
-        cursor.close()
-        conn.close()
         return jsonify(success=True), 200
 
     except Exception as e:
-        print("[ERROR] store_eaten_feedback:", e)
+        http_log.exception("Error in store_eaten_feedback")
         return jsonify(success=False, error=str(e)), 500
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
 # -------------------------------------------------------
 # REPORT PAGE
 # -------------------------------------------------------
-@app.route('/report_data', methods=['GET'])
-def report_data():
+REPORT_PAGE_MAX = 500  # max ?limit= for /report_data tableData
+
+# Maps for MoodCategoryID => label
+MOOD_LABELS = {
+    "MD01": "Happy",
+    "MD02": "Sad",
+    "MD03": "Angry",
+    "MD04": "Neutral"
+}
+# Stable order for the "after" bar chart
+MOOD_AFTER_ORDER = ["Happy", "Sad", "Angry", "Neutral", "Better", "Same", "Worse"]
+
+# One row per eaten meal in the window. "Mood before" is the mood of the single
+# most recent suggestion of that food to that user at or before the meal
+# (idx_foodsuggestion_user_food makes it one index probe per meal), so a meal
+# is never multiplied by the food's whole suggestion history.
+REPORT_MEALS_SQL = """
+    SELECT
+        ue.FoodID,
+        ue.EatenDateTime,
+        ue.FeelBetter,
+        fi.FoodName AS EatenFoodName,
+        fi.ImageURL AS EatenFoodImage,
+        (SELECT fs.MoodCategoryID
+           FROM foodsuggestion fs
+          WHERE fs.UserID = ue.UserID
+            AND fs.FoodID = ue.FoodID
+            AND fs.SuggestedDate <= ue.EatenDateTime
+          ORDER BY fs.SuggestedDate DESC
+          LIMIT 1) AS MoodBeforeID
+    FROM user_eaten ue
+    JOIN fooditems fi
+           ON ue.FoodID = fi.FoodID
+    WHERE ue.UserID = %s
+      AND ue.EatenDateTime >= %s
+      AND ue.EatenDateTime < %s
+"""
+REPORT_TABLE_SQL = REPORT_MEALS_SQL + " ORDER BY ue.EatenDateTime DESC, ue.FoodID"
+
+def _mood_after_label(fb_val):
     """
-    Returns JSON for the report page:
-      - Eaten meals (via user_eaten).
-      - Mood 'before' from foodsuggestion.MoodCategoryID (no join to moodcategory table).
-      - A local mapping (dictionary) is used to translate MoodCategoryID to a mood name.
-      - Mood 'after' from user_eaten.FeelBetter (which could be an int or an MD-code).
+    FeelBetter -> label.
+    1 / 0 / -1 => "Better" / "Same" / "Worse" (old numeric feedback),
+    MD-codes => "Happy", "Sad", "Angry", "Neutral", text "Better"/"Same"/"Worse" as is.
+    """
+    if fb_val is None:
+        return ""
+    if isinstance(fb_val, int):
+        return {1: "Better", 0: "Same", -1: "Worse"}.get(fb_val, "")
+    fb_str = str(fb_val).strip()
+    if fb_str in MOOD_LABELS:
+        return MOOD_LABELS[fb_str]
+    if fb_str in MOOD_AFTER_ORDER:
+        return fb_str
+    return "Unknown"
+
+def parse_report_args():
+    """
+    Read ?userId=&start=YYYY-MM-DD&end=YYYY-MM-DD.
+    Returns (user_id, start, end) with `end` already moved to the next midnight.
+    Raises ValueError on missing or malformed input.
     """
     user_id        = request.args.get('userId')
     start_date_str = request.args.get('start')
     end_date_str   = request.args.get('end')
 
     if not (user_id and start_date_str and end_date_str):
-        return jsonify({"error": "Missing userId, start or end parameters"}), 400
+        raise ValueError("Missing userId, start or end parameters")
 
     # Parse the date range
     try:
         start_date = datetime.datetime.strptime(start_date_str, "%Y-%m-%d")
         end_date   = datetime.datetime.strptime(end_date_str,   "%Y-%m-%d")
     except ValueError:
-        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+        raise ValueError("Invalid date format. Use YYYY-MM-DD")
 
     # Extend end_date by one day to include the entire end date
-    end_date += datetime.timedelta(days=1)
+    return user_id, start_date, end_date + datetime.timedelta(days=1)
+
+def report_counts(cursor, params):
+    """
+    Bar-chart counts for one report, grouped in SQL (one row per distinct
+    (before, after) pair). Returns (total_meals, mood_before_counts, mood_after_counts).
+    `cursor` must be a dictionary cursor.
+    """
+    cursor.execute(f"""
+        SELECT m.MoodBeforeID, m.FeelBetter, COUNT(*) AS Meals
+        FROM ({REPORT_MEALS_SQL}) m
+        GROUP BY m.MoodBeforeID, m.FeelBetter
+    """, params)
+
+    mood_before_counts = {code: 0 for code in MOOD_LABELS}
+    mood_after_counts  = {label: 0 for label in MOOD_AFTER_ORDER}
+    total_meals = 0
+    for group in cursor.fetchall():
+        meals = int(group["Meals"])
+        total_meals += meals
+        if group["MoodBeforeID"] in mood_before_counts:
+            mood_before_counts[group["MoodBeforeID"]] += meals
+        after_label = _mood_after_label(group["FeelBetter"])
+        if after_label in mood_after_counts:
+            mood_after_counts[after_label] += meals
+    return total_meals, mood_before_counts, mood_after_counts
+
+def report_table_row(row):
+    """One REPORT_MEALS_SQL row (dictionary cursor) -> one tableData entry."""
+    # Format date/time
+    dt_str = ""
+    if row["EatenDateTime"]:
+        dt_str = row["EatenDateTime"].strftime("%Y-%m-%d %H:%M")
+
+    return {
+        "foodImage":  row["EatenFoodImage"] or "/images/default_food.png",
+        "foodName":   row["EatenFoodName"] or "Unknown Food",
+        "dateTime":   dt_str,
+        "moodBefore": MOOD_LABELS.get(row["MoodBeforeID"], "Unknown"),
+        "moodAfter":  _mood_after_label(row["FeelBetter"])
+    }
+
+@app.route('/report_data', methods=['GET'])
+def report_data():
+    """
+    Returns JSON for the report page:
+      - Eaten meals (via user_eaten), newest first; ?limit=&offset= pages tableData.
+      - Mood 'before' from the nearest earlier foodsuggestion of the same food.
+      - Mood 'after' from user_eaten.FeelBetter (which could be an int or an MD-code).
+      - Bar-chart counts and totalMeals always cover the whole date range; they
+        are grouped in SQL, so Python only sees a handful of (before, after) pairs.
+    """
+    try:
+        params = parse_report_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        limit = request.args.get('limit')
+        limit = int(limit) if limit is not None else None
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers"}), 400
+    if (limit is not None and not 1 <= limit <= REPORT_PAGE_MAX) or offset < 0:
+        return jsonify({"error": f"limit must be between 1 and {REPORT_PAGE_MAX}, offset >= 0"}), 400
 
     conn = None
     cursor = None
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASS,
-            database=DB_NAME
-        )
+        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
-        # Grab user_eaten + related info
-        sql = """
-        SELECT 
-            ue.UserID,
-            ue.FoodID,
-            ue.EatenDateTime,
-            ue.FeelBetter,
-            fi.FoodName       AS EatenFoodName,
-            fi.ImageURL       AS EatenFoodImage,
-            fs.MoodCategoryID AS MoodBeforeID
-        FROM user_eaten ue
-        JOIN fooditems fi 
-               ON ue.FoodID = fi.FoodID
-        LEFT JOIN foodsuggestion fs 
-               ON fs.UserID = ue.UserID
-              AND fs.FoodID = ue.FoodID
-        WHERE ue.UserID = %s
-          AND ue.EatenDateTime >= %s
-          AND ue.EatenDateTime < %s
-        ORDER BY ue.EatenDateTime DESC
-        """
+        total_meals, mood_before_counts, mood_after_counts = report_counts(cursor, params)
 
-        cursor.execute(sql, (user_id, start_date, end_date))
+        # Table rows (one page of them when ?limit= is given)
+        page_sql = REPORT_TABLE_SQL
+        page_params = params
+        if limit is not None:
+            page_sql += " LIMIT %s OFFSET %s"
+            page_params = params + (limit, offset)
+        cursor.execute(page_sql, page_params)
         rows = cursor.fetchall()
-
-        # We'll track "before" (MD01..MD04) and "after" in separate counters
-        # Mood BEFORE => MD01, MD02, MD03, MD04
-        mood_before_counts = {
-            "MD01": 0,
-            "MD02": 0,
-            "MD03": 0,
-            "MD04": 0
-        }
-        # If after is storing "Better","Same","Worse" or MD-codes, let's unify:
-        # We'll store counts by "Happy","Sad","Angry","Neutral" OR "Better","Same","Worse".
-        mood_after_counts = {
-            "Happy":  0,
-            "Sad":    0,
-            "Angry":  0,
-            "Neutral":0,
-            "Better": 0,
-            "Same":   0,
-            "Worse":  0
-        }
-
-        # Maps for MoodCategoryID => label
-        mood_label_map = {
-            "MD01": "Happy",
-            "MD02": "Sad",
-            "MD03": "Angry",
-            "MD04": "Neutral"
-        }
-
-        table_data = []
-
-        for row in rows:
-            eaten_food_name  = row["EatenFoodName"] or "Unknown Food"
-            eaten_food_image = row["EatenFoodImage"] or "/images/default_food.png"
-
-            # Format date/time
-            dt_str = ""
-            if row["EatenDateTime"]:
-                dt_str = row["EatenDateTime"].strftime("%Y-%m-%d %H:%M")
-
-            # Mood BEFORE
-            mood_before_id = row["MoodBeforeID"]
-            mood_before_label = "Unknown"
-            if mood_before_id and mood_before_id in mood_before_counts:
-                # increment the counter for that code
-                mood_before_counts[mood_before_id] += 1
-                mood_before_label = mood_label_map.get(mood_before_id, "Unknown")
-            else:
-                # Either no code or something unrecognized
-                # We can keep "Unknown" or skip
-                pass
-
-            # Mood AFTER
-            # If user is storing 1 => "Better", 0 => "Same", -1 => "Worse"
-            # or if storing an MD code => "Happy","Sad","Angry","Neutral"
-            fb_val = row["FeelBetter"]  # could be int or string
-
-            mood_after_label = ""
-            if fb_val is not None:
-                if isinstance(fb_val, int):
-                    # The old logic: 1 => "Better", 0 => "Same", -1 => "Worse"
-                    if fb_val == 1:
-                        mood_after_label = "Better"
-                        mood_after_counts["Better"] += 1
-                    elif fb_val == 0:
-                        mood_after_label = "Same"
-                        mood_after_counts["Same"] += 1
-                    elif fb_val == -1:
-                        mood_after_label = "Worse"
-                        mood_after_counts["Worse"] += 1
-                else:
-                    # Assume string, e.g. "MD01","MD02","MD03","MD04"
-                    # or "Better","Same","Worse" if user stored text
-                    fb_str = str(fb_val).strip()
-                    if fb_str in mood_label_map:
-                        # e.g. "MD01" => "Happy"
-                        mood_after_label = mood_label_map[fb_str]
-                        mood_after_counts[mood_after_label] += 1
-                    elif fb_str in mood_after_counts:
-                        # e.g. "Better","Same","Worse"
-                        mood_after_label = fb_str
-                        mood_after_counts[fb_str] += 1
-                    else:
-                        # unknown string
-                        mood_after_label = "Unknown"
-
-            # Build the table row
-            table_data.append({
-                "foodImage":  eaten_food_image,
-                "foodName":   eaten_food_name,
-                "dateTime":   dt_str,
-                "moodBefore": mood_before_label,
-                "moodAfter":  mood_after_label
-            })
-
-        total_meals = len(table_data)
-
-        # Convert mood_before_counts => array of {label, count}
-        # We only have 4 codes for "before" => MD01..MD04 => ["Happy","Sad","Angry","Neutral"]
-        # We'll keep the same old approach.
-        mood_bar_data = []
-        for code, cnt in mood_before_counts.items():
-            lbl = mood_label_map.get(code, "Unknown")
-            mood_bar_data.append({"label": lbl, "count": cnt})
-
-        # For "after," we have 7 possible keys in mood_after_counts
-        # but maybe you only want 4? If you only care about MD-codes or only about Better/Same/Worse,
-        # you can filter. Otherwise, let's keep them all.
-        mood_after_bar_data = []
-        # We'll use a stable order: "Happy","Sad","Angry","Neutral","Better","Same","Worse"
-        after_order = ["Happy","Sad","Angry","Neutral","Better","Same","Worse"]
-        for lbl in after_order:
-            cnt = mood_after_counts[lbl]
-            mood_after_bar_data.append({"label": lbl, "count": cnt})
+        table_data = [report_table_row(row) for row in rows]
 
         # Build final result
         result = {
             "tableData":        table_data,
             "totalMeals":       total_meals,
-            "moodBarData":      mood_bar_data,       # Mood BEFORE
-            "moodAfterBarData": mood_after_bar_data  # Mood AFTER
+            "moodBarData":      [{"label": MOOD_LABELS[code], "count": cnt}
+                                 for code, cnt in mood_before_counts.items()],  # Mood BEFORE
+            "moodAfterBarData": [{"label": lbl, "count": mood_after_counts[lbl]}
+                                 for lbl in MOOD_AFTER_ORDER]                    # Mood AFTER
         }
+        if limit is not None:
+            result["nextOffset"] = offset + limit if len(rows) == limit else None
         return jsonify(result)
 
     except Exception as e:
-        print("Error in /report_data:", e)
+        http_log.exception("Error in /report_data")
         return jsonify({"error": str(e)}), 500
     finally:
         if cursor:
@@ -1108,24 +3358,241 @@ def report_data():
         if conn:
             conn.close()
 
+# -------------------------------------------------------
+# REPORT EXPORT (CSV / PDF)
+# -------------------------------------------------------
+REPORT_CSV_HEADER = ["Food", "Date/Time", "Mood Before", "Mood After"]
+
+def report_data_version(cursor, params):
+    """
+    Cheap fingerprint of everything a report depends on: the meals in the range
+    (count + latest time) and the user's newest suggestion. Any new meal or
+    suggestion changes it, so cached exports never go stale.
+    """
+    user_id, start_date, end_date = params
+    cursor.execute("""
+        SELECT COUNT(*), MAX(EatenDateTime)
+        FROM user_eaten
+        WHERE UserID = %s AND EatenDateTime >= %s AND EatenDateTime < %s
+    """, params)
+    meals, last_meal = cursor.fetchone()
+    cursor.execute("SELECT MAX(SuggestionID) FROM foodsuggestion WHERE UserID = %s", (user_id,))
+    last_suggestion = cursor.fetchone()[0]
+    return (int(meals), str(last_meal), last_suggestion)
+
+def render_report_pdf(params):
+    """Build the report PDF for one (user, start, end) on a pooled connection. Returns bytes."""
+    user_id, start_date, end_date = params
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        total_meals, mood_before_counts, mood_after_counts = report_counts(cursor, params)
+        cursor.execute(REPORT_TABLE_SQL, params)
+        table = [[r["foodName"], r["dateTime"], r["moodBefore"], r["moodAfter"]]
+                 for r in map(report_table_row, cursor)]
+    finally:
+        cursor.close()
+        conn.close()
+
+    styles = getSampleStyleSheet()
+    last_day = (end_date - datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+    story = [
+        Paragraph("FoodMood Report", styles["Title"]),
+        Paragraph(f"{start_date:%Y-%m-%d} to {last_day}", styles["Normal"]),
+        Paragraph(f"Date of Report: {datetime.datetime.now():%Y-%m-%d %H:%M}", styles["Normal"]),
+        Paragraph(f"Total meals: {total_meals}", styles["Normal"]),
+        Spacer(1, 12),
+    ]
+
+    # Mood before vs after (the four MD moods), like the chart on the report page
+    moods = list(MOOD_LABELS.values())
+    chart = VerticalBarChart()
+    chart.x, chart.y, chart.width, chart.height = 40, 30, 400, 150
+    chart.data = [[mood_before_counts[code] for code in MOOD_LABELS],
+                  [mood_after_counts[label] for label in moods]]
+    chart.categoryAxis.categoryNames = moods
+    chart.valueAxis.valueMin = 0
+    chart.bars[0].fillColor = colors.HexColor("#4e79a7")
+    chart.bars[1].fillColor = colors.HexColor("#f28e2b")
+    drawing = Drawing(480, 200)
+    drawing.add(chart)
+    story += [Paragraph("Mood before vs after eating", styles["Heading2"]), drawing, Spacer(1, 12)]
+
+    story.append(Paragraph("Consumed Meals", styles["Heading2"]))
+    meals_table = Table([REPORT_CSV_HEADER] + table, repeatRows=1)
+    meals_table.setStyle(TableStyle([
+        ("FONTNAME",   (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("GRID",       (0, 0), (-1, -1), 0.25, colors.grey),
+        ("FONTSIZE",   (0, 0), (-1, -1), 9),
+    ]))
+    story.append(meals_table)
+
+    buf = io.BytesIO()
+    SimpleDocTemplate(buf, pagesize=A4, title="FoodMood Report").build(story)
+    return buf.getvalue()
+
+
+class ReportRenderer:
+    """
+    Bounded worker pool for PDF rendering plus a cache of finished files.
+    Requests for the same (user, start, end, data version) share one render,
+    whether it is finished (cache hit) or still running.
+    """
+    def __init__(self, workers, cache):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-render")
+        self._cache = cache
+        self._inflight = {}   # key -> Future
+        self._lock = threading.Lock()
+
+    def get(self, key, params, timeout):
+        """(body, etag) for `key`, rendering it in the pool on a cache miss."""
+        entry = self._cache.get(key)
+        if entry is not None:
+            return entry
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._executor.submit(self._render, key, params)
+                self._inflight[key] = future
+        return future.result(timeout=timeout)
+
+    def _render(self, key, params):
+        try:
+            return self._cache.put(key, render_report_pdf(params))
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            inflight = len(self._inflight)
+        return dict(self._cache.stats(), rendering=inflight)
+
+
+report_renderer = ReportRenderer(REPORT_RENDER_WORKERS, ResponseCache(REPORT_CACHE_SIZE, REPORT_CACHE_TTL))
+
+def _report_csv_pages(params):
+    """
+    The report's rows, newest first, as pages of STREAM_FETCH_SIZE rows, each
+    read with _fetch_page (no connection is held between pages). user_eaten
+    has no unique column to break ties with, so the keyset is EatenDateTime
+    alone: the next page starts at the last timestamp sent and skips the rows
+    at that timestamp that were already sent.
+    """
+    user_id, start_date, end_date = params
+
+    def page_sql(before):
+        sql, args = REPORT_MEALS_SQL, [user_id, start_date, end_date]
+        if before is not None:
+            sql += "      AND ue.EatenDateTime <= %s\n"
+            args.append(before)
+        return sql + " ORDER BY ue.EatenDateTime DESC, ue.FoodID, ue.FeelBetter", args
+
+    before, skip = None, 0
+    while True:
+        rows = _fetch_page(page_sql, before, STREAM_FETCH_SIZE + skip, True)
+        page = rows[skip:]
+        if page:
+            yield page
+        if len(rows) < STREAM_FETCH_SIZE + skip:
+            return
+        before = page[-1]["EatenDateTime"]
+        skip = sum(1 for row in rows if row["EatenDateTime"] == before)
+
+def _stream_report_csv(params):
+    """CSV rows in keyset pages of STREAM_FETCH_SIZE (see _report_csv_pages)."""
+    pages = _report_csv_pages(params)
+    # First page up front so a failing query still turns into an error response
+    first = next(pages, [])
+
+    def generate():
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(REPORT_CSV_HEADER)
+        rows = first
+        while rows:
+            for row in map(report_table_row, rows):
+                writer.writerow([row["foodName"], row["dateTime"], row["moodBefore"], row["moodAfter"]])
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+            rows = next(pages, [])
+        yield buf.getvalue()
+
+    return Response(generate(), mimetype="text/csv")
+
+@app.route('/report_export', methods=['GET'])
+def report_export():
+    """
+    Download the report as a file: ?userId=&start=&end=&format=csv|pdf.
+      - csv: streamed in keyset pages, never held in memory whole.
+      - pdf: rendered with ReportLab in the report worker pool and cached per
+             (user, range, data version); repeat downloads are served from
+             the cache and answer 304 to If-None-Match.
+    """
+    try:
+        params = parse_report_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    fmt = request.args.get('format', 'pdf')
+    if fmt not in ("csv", "pdf"):
+        return jsonify({"error": "format must be csv or pdf"}), 400
+    if fmt == "pdf" and SimpleDocTemplate is None:
+        return jsonify({"error": "PDF export needs ReportLab (pip install reportlab)"}), 501
+
+    user_id, start_date, end_date = params
+    last_day = (end_date - datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+    filename = f"FoodMood_Report_{start_date:%Y-%m-%d}_{last_day}.{fmt}"
+
+    try:
+        if fmt == "csv":
+            resp = _stream_report_csv(params)
+        else:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            try:
+                version = report_data_version(cursor, params)
+            finally:
+                cursor.close()
+                conn.close()
+
+            key = (user_id, start_date, end_date, version)
+            body, etag = report_renderer.get(key, params, REPORT_RENDER_TIMEOUT)
+            if etag in request.if_none_match:
+                resp = Response(status=304)
+            else:
+                resp = Response(body, mimetype="application/pdf")
+            resp.set_etag(etag)
+            resp.headers["Cache-Control"] = "private, no-cache"
+    except FuturesTimeout:
+        return jsonify({"error": "Report is still rendering, try again shortly"}), 503
+    except Exception as e:
+        http_log.exception("Error in /report_export")
+        return jsonify({"error": str(e)}), 500
+
+    resp.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return resp
+
 ###############################################################################
 #history_suggestion.html
 ###############################################################################
 @app.route('/foodsugg_history', methods=['GET'])
 def get_food_suggestion_history():
+    """
+    All suggestions for a user, newest first.
+    Same ?before=&limit= keyset paging and ?format=ndjson streaming as /moodentry.
+    """
     user_id = request.args.get('userId')
     if not user_id:
         return jsonify({"error": "Missing userId"}), 400
-
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASS,
-            database=DB_NAME
-        )
-        cursor = conn.cursor(dictionary=True)
+        before, limit = parse_keyset_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
+    def page_sql(before):
         sql = """
         SELECT 
             fs.SuggestionID,
@@ -1139,20 +3606,125 @@ def get_food_suggestion_history():
         JOIN fooditems fi 
           ON fs.FoodID = fi.FoodID
         WHERE fs.UserID = %s
-        ORDER BY fs.SuggestedDate DESC
         """
-        cursor.execute(sql, (user_id,))
-        rows = cursor.fetchall()
-        return jsonify(rows)
+        params = [user_id]
+        if before:
+            predicate, keyset_params = keyset_predicate("fs.SuggestedDate", "fs.SuggestionID", before)
+            sql += f"          AND {predicate}\n"
+            params.extend(keyset_params)
+        sql += " ORDER BY fs.SuggestedDate DESC, fs.SuggestionID DESC"
+        return sql, params
 
+    try:
+        return rows_response(
+            page_sql, lambda row: row,
+            lambda row: (row["SuggestedDate"], row["SuggestionID"]),
+            before, limit, dictionary=True,
+        )
     except Exception as e:
-        print("Error in get_food_suggestion_history:", e)
+        http_log.exception("Error in get_food_suggestion_history")
         return jsonify({"error": str(e)}), 500
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
+
+###############################################################################
+# CATALOG RELOAD + POOL METRICS
+###############################################################################
+@app.route('/catalog/reload', methods=['POST'])
+def reload_catalog():
+    """
+    Drop the in-memory food catalog so the next suggestion reloads it from MySQL.
+    Call this after editing fooditems / food_ingredient / ingredients / allergens.
+    Also clears the cached /ourmenu and /foodingredient responses.
+    """
+    food_catalog.invalidate()
+    return jsonify(success=True)
+
+@app.route('/pool_stats', methods=['GET'])
+def pool_stats():
+    """
+    Connection-pool counters for sizing DB_POOL_SIZE:
+    checkouts, how many had to wait, avg/max wait and checkout timeouts.
+    """
+    return jsonify(db_pool.stats())
+
+@app.route('/suggestion_candidate_stats', methods=['GET'])
+def suggestion_candidate_stats():
+    """Hit rate, size and approximate memory (bytes) of the per-profile candidate cache."""
+    return jsonify(suggestion_candidates.stats())
+
+@app.route('/user_profile_stats', methods=['GET'])
+def user_profile_stats():
+    """Hit/miss/invalidation counters of the per-user suggestion profile cache."""
+    return jsonify(user_profiles.stats())
+
+@app.route('/catalog_cache_stats', methods=['GET'])
+def catalog_cache_stats():
+    """Hit/miss counters of the /ourmenu + /foodingredient response cache."""
+    return jsonify(catalog_response_cache.stats())
+
+@app.route('/suggestion_queue_stats', methods=['GET'])
+def suggestion_queue_stats():
+    """Async suggestion queue counters (submitted/completed/retried/failed/rejected)."""
+    return jsonify(suggestion_queue.stats())
+
+@app.route('/reminder_stats', methods=['GET'])
+def reminder_stats():
+    """Reminder scheduler state: queued reminders, next due time, sent/reconcile counters."""
+    return jsonify(reminder_scheduler.stats())
+
+@app.route('/mail_stats', methods=['GET'])
+def mail_stats():
+    """SMTP delivery pool counters plus the last batch's throughput."""
+    return jsonify(mail_delivery.stats())
+
+@app.route('/report_cache_stats', methods=['GET'])
+def report_cache_stats():
+    """Report export cache counters plus renders in progress."""
+    return jsonify(report_renderer.stats())
+
 # -----------------------------------------------------------------------------
 # MAIN ENTRY POINT
 # -----------------------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FOODMOOD Flask app and maintenance commands.")
+    sub = parser.add_subparsers(dest="command")
+    serve = sub.add_parser("serve", help="Run the development server (default).")
+    serve.add_argument("--no-worker", action="store_true",
+                       help="Don't run the background worker inside the dev server")
+    sub.add_parser("worker", help="Run the background worker (reminder scheduler).")
+    sub.add_parser("refresh-filter-tables", help="Refill the normalized suggestion filter tables.")
+    sub.add_parser("sweep-suggestions", help="Build suggestions for recent mood entries that have none.")
+    backfill = sub.add_parser("backfill-rollup", help="Rebuild the daily mood rollup from moodentry.")
+    backfill.add_argument("--since", type=datetime.date.fromisoformat,
+                          help="Only rebuild days from this date (YYYY-MM-DD) on")
+    explain = sub.add_parser("explain-suggestions", help="EXPLAIN + time the suggestion queries.")
+    explain.add_argument("--age", type=int, default=30)
+    explain.add_argument("--bmi", type=float, default=22.0)
+    explain.add_argument("--blood", default="A")
+    explain.add_argument("--mood", default="MD01")
+    explain.add_argument("--allergens", default="", help="Comma-separated AL_IDs")
+    explain.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    if args.command == "refresh-filter-tables":
+        refresh_filter_tables()
+    elif args.command == "sweep-suggestions":
+        sweep_missing_suggestions()
+    elif args.command == "backfill-rollup":
+        backfill_mood_rollup(args.since)
+    elif args.command == "explain-suggestions":
+        allergens = {a.strip() for a in args.allergens.split(",") if a.strip()}
+        explain_suggestions(args.age, args.bmi, args.blood, args.mood, allergens, args.runs)
+    elif args.command == "worker":
+        try:
+            run_worker()
+        except KeyboardInterrupt:
+            pass
+    else:
+        # The debug reloader imports the app twice; only the child that actually
+        # serves (WERKZEUG_RUN_MAIN=true) starts the in-process worker
+        if not getattr(args, "no_worker", False) and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+            threading.Thread(target=run_worker, name="worker", daemon=True).start()
+        app.run(debug=True, port=5500)
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5500)
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,41 @@
+-- 001: normalized filter columns + junction tables for the suggestion query
+--
+-- The comma-separated lists in fooditems.MoodCategoryID, ingredients.BloodType
+-- and ingredients.Allergy (and the text fooditems.age_range) can't use an index.
+-- This adds numeric age bounds and one junction table per list so the suggestion
+-- filter becomes an indexed anti-join (see eligible_food_ids_sql in make.py).
+--
+-- Apply once:      mysql foodmood_db < migrations/001_suggestion_filter_tables.sql
+-- Then fill it:    python make.py refresh-filter-tables
+-- (re-run refresh-filter-tables whenever the catalog tables change)
+
+ALTER TABLE fooditems
+  ADD COLUMN age_min INT UNSIGNED NULL,
+  ADD COLUMN age_max INT UNSIGNED NULL,
+  ADD INDEX idx_fooditems_age_bmi (age_min, age_max, BMI, FoodID);
+
+CREATE TABLE IF NOT EXISTS food_mood (
+  FoodID         VARCHAR(20) NOT NULL,
+  MoodCategoryID VARCHAR(20) NOT NULL,
+  PRIMARY KEY (MoodCategoryID, FoodID),
+  KEY idx_food_mood_food (FoodID)
+);
+
+CREATE TABLE IF NOT EXISTS ingredient_bloodtype (
+  IngredientID VARCHAR(20) NOT NULL,
+  BloodType    VARCHAR(8)  NOT NULL,
+  PRIMARY KEY (BloodType, IngredientID),
+  KEY idx_ingredient_bloodtype_ing (IngredientID, BloodType)
+);
+
+CREATE TABLE IF NOT EXISTS ingredient_allergen (
+  IngredientID VARCHAR(20) NOT NULL,
+  AL_ID        VARCHAR(20) NOT NULL,
+  PRIMARY KEY (AL_ID, IngredientID),
+  KEY idx_ingredient_allergen_ing (IngredientID, AL_ID)
+);
+
+-- Covering indexes for the EXISTS / NOT EXISTS probes in both directions
+ALTER TABLE food_ingredient
+  ADD INDEX idx_food_ingredient_food (FoodID, IngredientID),
+  ADD INDEX idx_food_ingredient_ing (IngredientID, FoodID);
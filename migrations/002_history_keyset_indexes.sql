@@ -0,0 +1,15 @@
+-- 002: indexes behind keyset pagination of /moodentry and /foodsugg_history
+--
+-- Pages are read with ORDER BY <time> DESC, <id> DESC and
+-- WHERE (<time> < ? OR (<time> = ? AND <id> < ?)).
+-- InnoDB appends the primary key to every secondary index, so (UserID, DateTime)
+-- already ends in MoodEntryID and each page is a short index range scan.
+--
+-- Apply once: mysql foodmood_db < migrations/002_history_keyset_indexes.sql
+
+ALTER TABLE moodentry
+  ADD INDEX idx_moodentry_user_dt (UserID, DateTime),
+  ADD INDEX idx_moodentry_dt (DateTime);
+
+ALTER TABLE foodsuggestion
+  ADD INDEX idx_foodsuggestion_user_date (UserID, SuggestedDate);
@@ -0,0 +1,20 @@
+-- 003: daily mood rollup behind /moodsummary
+--
+-- One row per (user, day, mood), kept current by /save_mood in the same
+-- transaction as the moodentry insert. /moodsummary sums at most <days> rows
+-- per mood for one user; the all-users summary sums the (Day, MoodCategoryID,
+-- MoodCount) index at read time. (There is deliberately no shared per-day
+-- table: every save would queue on the same row lock to bump it.)
+--
+-- Apply once:      mysql foodmood_db < migrations/003_mood_daily_rollup.sql
+-- Then fill it:    python make.py backfill-rollup
+-- (backfill-rollup --since YYYY-MM-DD rebuilds just the recent days)
+
+CREATE TABLE IF NOT EXISTS mood_daily_user (
+  UserID         VARCHAR(128) NOT NULL,
+  Day            DATE         NOT NULL,
+  MoodCategoryID VARCHAR(20)  NOT NULL,
+  MoodCount      INT UNSIGNED NOT NULL DEFAULT 0,
+  PRIMARY KEY (UserID, Day, MoodCategoryID),
+  INDEX idx_mood_daily_day (Day, MoodCategoryID, MoodCount)
+);
@@ -0,0 +1,14 @@
+-- 004: indexes behind /report_data
+--
+-- Each eaten meal looks up the latest suggestion of the same food to the same
+-- user at or before the meal time: (UserID, FoodID, SuggestedDate) answers it
+-- with one backward index probe. (UserID, EatenDateTime) scans the meals in the
+-- requested date range.
+--
+-- Apply once: mysql foodmood_db < migrations/004_report_indexes.sql
+
+ALTER TABLE foodsuggestion
+  ADD INDEX idx_foodsuggestion_user_food (UserID, FoodID, SuggestedDate);
+
+ALTER TABLE user_eaten
+  ADD INDEX idx_user_eaten_user_dt (UserID, EatenDateTime);
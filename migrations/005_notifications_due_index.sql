@@ -0,0 +1,10 @@
+-- 005: index behind the reminder scheduler
+--
+-- The scheduler loads unsent reminders due soon with
+--   WHERE SentFlag = 0 AND RemindTime <= NOW() + INTERVAL n SECOND ORDER BY RemindTime LIMIT m
+-- which (SentFlag, RemindTime) serves as an ordered range scan.
+--
+-- Apply once: mysql foodmood_db < migrations/005_notifications_due_index.sql
+
+ALTER TABLE notifications
+  ADD INDEX idx_notifications_due (SentFlag, RemindTime);
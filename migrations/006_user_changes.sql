@@ -0,0 +1,18 @@
+-- 006: change log behind make.py's user profile cache
+--
+-- FirebaseFunctions/functions/fetch_data.py appends one row per user it
+-- upserts or deletes, in the same transaction as the write. Each web process
+-- polls it with
+--   SELECT DISTINCT UserID FROM user_changes WHERE ChangedAt >= NOW() - INTERVAL n SECOND
+-- every USER_CHANGES_POLL seconds and drops those users' cached profiles.
+-- fetch_data.py prunes rows older than a day after each sync.
+--
+-- Apply once: mysql foodmood_db < migrations/006_user_changes.sql
+
+CREATE TABLE IF NOT EXISTS user_changes (
+  ChangeSeq BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+  UserID    VARCHAR(128)    NOT NULL,
+  ChangedAt DATETIME        NOT NULL,
+  PRIMARY KEY (ChangeSeq),
+  INDEX idx_user_changes_at (ChangedAt)
+);
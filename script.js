@@ -955,10 +955,18 @@ if ($id('foodCardsRow') && $id('doneBtn')) {
     alert('Thanks! Enjoy your meal suggestions.');
   });
 
-  async function loadFoodSuggestions(userId) {
+  async function loadFoodSuggestions(userId, attempt = 0) {
     try {
       const resp = await fetch(`/foodsuggestion?userId=${encodeURIComponent(userId)}`);
       if (!resp.ok) throw new Error(`Failed to fetch suggestions: ${resp.statusText}`);
+
+      // Suggestions for the latest mood are still being generated => poll again shortly
+      if (resp.headers.get('X-Suggestions-Pending') === 'true' && attempt < 20) {
+        foodCardsRow.innerHTML = '<p>Preparing your suggestions...</p>';
+        setTimeout(() => loadFoodSuggestions(userId, attempt + 1), 500);
+        return;
+      }
+
       const suggestions = await resp.json();
       foodCardsRow.innerHTML = '';
   
@@ -1578,6 +1586,7 @@ document.addEventListener('DOMContentLoaded', () => {
   const downloadPdfBtn   = $id('downloadPdfBtn');
   let currentUser        = null;
   let moodLineChart      = null;
+  let currentRange       = null;  // { start, end } of the report on screen
 
   onAuthStateChanged(auth, (user) => {
     if (!user) {
@@ -1623,6 +1632,7 @@ document.addEventListener('DOMContentLoaded', () => {
   }
 
   async function fetchReportData(uid, start, end) {
+    currentRange = { start, end };
     try {
       // Adjust to your actual endpoint
       const url  = `/report_data?userId=${encodeURIComponent(uid)}&start=${start}&end=${end}`;
@@ -1737,43 +1747,17 @@ document.addEventListener('DOMContentLoaded', () => {
     });
   }
 
-  // PDF Export if you have jsPDF
-  const { jsPDF } = window.jspdf || {};
-  if (downloadPdfBtn && jsPDF) {
-    downloadPdfBtn.addEventListener('click', () => {
-      const doc = new jsPDF();
-      doc.setFontSize(16);
-      doc.text('FoodMood Report', 14, 20);
-
-      let yPos = 30;
-      doc.setFontSize(12);
-      doc.text(`Date of Report: ${new Date().toLocaleString()}`, 14, yPos);
-      yPos += 10;
-      doc.text('Consumed Meals:', 14, yPos);
-      yPos += 10;
-
-      const rows = document.querySelectorAll('#historyTable tbody tr');
-      rows.forEach(row => {
-        const cols = row.querySelectorAll('td');
-        const lineArr = Array.from(cols).map((td, idx) =>
-          (idx === 0) ? '[Im`g]' : td.innerText
-        );
-        const line = lineArr.join(' | ');
-        doc.text(line, 14, yPos);
-        yPos += 6;
-        if (yPos > 270) {
-          doc.addPage();
-          yPos = 20;
-        }
-      });
-
-      yPos += 10;
-      const moodCompareCanvas  = $id('moodCompareChart');
-      const moodCompareDataURL = moodCompareCanvas.toDataURL('image/png');
-      doc.addImage(moodCompareDataURL, 'PNG', 15, yPos, 180, 100);
-      doc.save('FoodMood_Report.pdf');
+  // PDF Export: rendered (and cached) by the server from the same date range
+  downloadPdfBtn?.addEventListener('click', () => {
+    if (!currentUser || !currentRange) return;
+    const params = new URLSearchParams({
+      userId: currentUser.uid,
+      start:  currentRange.start,
+      end:    currentRange.end,
+      format: 'pdf'
     });
-  }
+    window.location.href = `/report_export?${params}`;
+  });
 });
 
 /***************************************************************
@@ -0,0 +1,44 @@
+"""
+Shared fixtures: make.py pointed at a fresh sqlite stand-in (bench/standin.py)
+per test, so no MySQL server is needed.
+
+    python -m pytest -q
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import make  # noqa: E402
+from bench import datagen, standin  # noqa: E402
+
+
+@pytest.fixture
+def connect(tmp_path, monkeypatch):
+    """Zero-argument connect() for the stand-in database; make.db_pool uses it too."""
+    connect = standin.connect_factory(str(tmp_path / "foodmood.sqlite3"))
+    monkeypatch.setattr(make, "db_pool", make.ConnectionPool(
+        connect=connect, size=4, timeout=5, ping_after=30, recycle=3600,
+    ))
+    make.food_catalog.invalidate()  # also clears the suggestion candidate cache
+    make.user_profiles.invalidate()
+    yield connect
+    make.food_catalog.invalidate()
+    make.user_profiles.invalidate()
+
+
+@pytest.fixture
+def dataset(connect):
+    """A small generated dataset; returns datagen's counts (with `user_ids`)."""
+    conn = connect()
+    try:
+        return datagen.generate(conn, 400, seed=7)
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def client():
+    return make.app.test_client()
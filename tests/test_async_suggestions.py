@@ -0,0 +1,100 @@
+import datetime
+
+import make
+
+
+def _save_mood(client, user_id, mood="MD01"):
+    resp = client.post("/save_mood", json={"userID": user_id, "moodCategoryID": mood, "moodIntensity": 5})
+    return resp.get_json()
+
+
+def _backdate(moodentry_id, minutes):
+    conn = make.get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT DateTime FROM moodentry WHERE MoodEntryID = %s", (moodentry_id,))
+        moved = cursor.fetchone()[0] - datetime.timedelta(minutes=minutes)
+        cursor.execute("UPDATE moodentry SET DateTime = %s WHERE MoodEntryID = %s", (moved, moodentry_id))
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _eligible_user(dataset):
+    """A generated user with eligible foods for MD01, so suggestions are never legitimately empty."""
+    catalog = make.food_catalog.get()
+    conn = make.get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        for user_id in dataset["user_ids"]:
+            cursor.execute(make.USER_PROFILE_SQL, (user_id,))
+            profile = make.UserProfile(cursor.fetchone())
+            if catalog.eligible_bits(profile.age(), profile.bmi, profile.blood_type, "MD01",
+                                     profile.allergy_ids(catalog)):
+                return user_id
+    finally:
+        cursor.close()
+        conn.close()
+    raise AssertionError("no user with eligible foods in the dataset")
+
+
+def test_lost_job_is_pending_everywhere_then_swept(dataset, client, monkeypatch):
+    monkeypatch.setattr(make, "ASYNC_SUGGESTIONS", True)
+    # The job is accepted and then lost, as when a gunicorn worker is recycled
+    monkeypatch.setattr(make.suggestion_queue, "submit", lambda *job: True)
+    user_id = _eligible_user(dataset)
+
+    saved = _save_mood(client, user_id)
+    assert saved["pending"] is True
+
+    # Any worker answers from the database: no rows yet for a fresh entry => pending
+    resp = client.get(f"/foodsuggestion?userId={user_id}")
+    assert resp.get_json() == []
+    assert resp.headers["X-Suggestions-Pending"] == "true"
+
+    # Not swept while still inside the grace period...
+    assert make.sweep_missing_suggestions() == 0
+    # ...and filled in once it is past it
+    _backdate(saved["moodEntryID"], minutes=5)
+    assert make.sweep_missing_suggestions() >= 1
+
+    resp = client.get(f"/foodsuggestion?userId={user_id}")
+    rows = resp.get_json()
+    assert len(rows) == 3 and {row["MoodCategoryID"] for row in rows} == {"MD01"}
+    assert resp.headers["X-Suggestions-Pending"] == "false"
+
+    # A second sweep finds nothing left to do for this entry
+    conn = make.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM foodsuggestion WHERE MoodEntryID = %s", (saved["moodEntryID"],))
+    before = cursor.fetchone()[0]
+    assert make.sweep_missing_suggestions() == 0
+    cursor.execute("SELECT COUNT(*) FROM foodsuggestion WHERE MoodEntryID = %s", (saved["moodEntryID"],))
+    assert cursor.fetchone()[0] == before
+    cursor.close()
+    conn.close()
+
+
+def test_sync_mode_never_reports_pending(dataset, client):
+    user_id = _eligible_user(dataset)
+    assert _save_mood(client, user_id) == {"success": True}
+    resp = client.get(f"/foodsuggestion?userId={user_id}")
+    assert len(resp.get_json()) == 3
+    assert resp.headers["X-Suggestions-Pending"] == "false"
+
+
+def test_job_finishing_after_the_sweep_adds_no_duplicates(dataset, client, monkeypatch):
+    monkeypatch.setattr(make, "ASYNC_SUGGESTIONS", True)
+    jobs = []
+    # Queued but not yet run when the sweep gets to the entry
+    monkeypatch.setattr(make.suggestion_queue, "submit", lambda *job: jobs.append(job) or True)
+    user_id = _eligible_user(dataset)
+    saved = _save_mood(client, user_id)
+    _backdate(saved["moodEntryID"], minutes=5)
+
+    assert make.sweep_missing_suggestions() >= 1
+    assert make.generate_food_suggestions(*jobs[0], raise_errors=True) == []
+
+    resp = client.get(f"/foodsuggestion?userId={user_id}")
+    assert len(resp.get_json()) == 3
@@ -0,0 +1,79 @@
+import make
+
+from test_async_suggestions import _eligible_user, _save_mood
+
+
+def _key(catalog, age=30, bmi=22.0, blood="A", mood="MD01", allergens=()):
+    return make.CandidateCache.key(catalog, age, bmi, blood, mood, allergens)
+
+
+def test_same_profile_is_built_once(dataset):
+    catalog = make.food_catalog.get()
+    cache = make.CandidateCache(maxsize=10)
+    builds = []
+
+    def build():
+        builds.append(1)
+        return ["F001", "F002"]
+
+    first = cache.get(catalog, _key(catalog), build)
+    # Another user in the same BMI band (below 25) shares the entry
+    assert cache.get(catalog, _key(catalog, bmi=23.5), build) is first
+    assert len(builds) == 1
+
+    cache.get(catalog, _key(catalog, bmi=27.0), build)   # other BMI band
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 2)
+    assert stats["hit_rate"] == 0.3333
+    assert stats["bytes"] > 0
+
+
+def test_new_catalog_starts_over_and_lru_is_bounded(dataset):
+    catalog = make.food_catalog.get()
+    cache = make.CandidateCache(maxsize=2)
+    for mood in ("MD01", "MD02", "MD03"):
+        cache.get(catalog, _key(catalog, mood=mood), lambda: ["F001"])
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 1
+
+    make.food_catalog.invalidate()
+    reloaded = make.food_catalog.get()
+    assert reloaded is not catalog
+    cache.get(reloaded, _key(reloaded), lambda: ["F002"])
+    stats = cache.stats()
+    assert (stats["entries"], stats["resets"]) == (1, 1)
+
+
+def test_mood_saves_share_entries_until_the_catalog_reloads(client, dataset):
+    user_id = _eligible_user(dataset)
+    _save_mood(client, user_id)
+    _save_mood(client, user_id)
+    stats = client.get("/suggestion_candidate_stats").get_json()
+    assert stats["hits"] >= 1 and stats["entries"] >= 1
+
+    client.post("/catalog/reload")
+    assert make.suggestion_candidates.stats()["entries"] == 0
+
+
+def test_cached_candidates_match_the_filters(client, dataset):
+    user_id = _eligible_user(dataset)
+    for _ in range(3):
+        _save_mood(client, user_id)
+
+    catalog = make.food_catalog.get()
+    conn = make.get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        profile = make.user_profiles.get(cursor, user_id)
+        cursor.execute("""
+            SELECT FoodID FROM foodsuggestion
+            WHERE MoodEntryID = (SELECT MAX(MoodEntryID) FROM moodentry WHERE UserID = %s)
+        """, (user_id,))
+        picks = [row["FoodID"] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+    eligible = catalog.ids_from_bits(catalog.eligible_bits(
+        profile.age(), profile.bmi, profile.blood_type, "MD01", profile.allergy_ids(catalog)))
+
+    assert picks and set(picks) <= set(eligible)
@@ -0,0 +1,84 @@
+import mysql.connector
+import pytest
+
+import make
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def execute(self, sql, params=()):
+        if self._conn.error is not None:
+            raise self._conn.error
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Raw connection whose next execute() raises `error`; ping() fails once `dead`."""
+    def __init__(self):
+        self.error = None
+        self.dead = False
+        self.closed = False
+        self.in_transaction = False
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def ping(self, reconnect=False):
+        if self.dead:
+            raise mysql.connector.errors.InterfaceError("Connection not available.")
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool():
+    return make.ConnectionPool(FakeConnection, size=2, timeout=1, ping_after=60, recycle=3600)
+
+
+def _fail(conn, error, dead):
+    raw = conn._raw
+    raw.error, raw.dead = error, dead
+    cursor = conn.cursor()
+    with pytest.raises(type(error)):
+        cursor.execute("SELECT 1")
+    conn.close()
+    return raw
+
+
+def test_connection_lost_in_use_is_not_reused(pool):
+    raw = _fail(pool.get_connection(),
+                mysql.connector.errors.OperationalError("Lost connection to MySQL server during query"),
+                dead=True)
+
+    assert raw.closed
+    assert pool.get_connection()._raw is not raw
+    stats = pool.stats()
+    assert stats["discarded"] == 1 and stats["health_failures"] == 1
+
+
+def test_live_connection_survives_a_server_side_error(pool):
+    raw = _fail(pool.get_connection(),
+                mysql.connector.errors.OperationalError("Lock wait timeout exceeded"),
+                dead=False)
+
+    assert not raw.closed
+    assert pool.get_connection()._raw is raw
+
+
+def test_query_errors_skip_the_ping(pool):
+    conn = pool.get_connection()
+    raw = _fail(conn, mysql.connector.errors.ProgrammingError("syntax"), dead=True)
+
+    assert not raw.closed
+    assert pool.get_connection()._raw is raw
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+import make
+
+
+def _paged(client, url):
+    """Every row of `url`, fetched with ?limit= keyset pages."""
+    items, before = [], None
+    while True:
+        resp = client.get(url + "&limit=7" + (f"&before={before}" if before else ""))
+        items += resp.get_json()
+        before = resp.headers.get("X-Next-Cursor")
+        if not before:
+            return items
+
+
+@pytest.mark.parametrize("url", ["/moodentry?userId={}", "/foodsugg_history?userId={}"])
+def test_streamed_history_matches_pages(client, dataset, monkeypatch, url):
+    monkeypatch.setattr(make, "STREAM_FETCH_SIZE", 5)
+    url = url.format(dataset["user_ids"][0])
+
+    streamed = client.get(url).get_json()
+    ndjson = [json.loads(line) for line in client.get(url + "&format=ndjson").get_data(as_text=True).splitlines()]
+
+    assert len(streamed) > 5
+    assert streamed == ndjson == _paged(client, url)
+
+
+def test_streaming_returns_connections_between_pages(client, dataset, monkeypatch):
+    monkeypatch.setattr(make, "STREAM_FETCH_SIZE", 5)
+    resp = client.get(f"/moodentry?userId={dataset['user_ids'][0]}")
+
+    body = resp.response
+    next(body)                                  # "[" after the first page was read
+    next(body)
+    assert make.db_pool.stats()["in_use"] == 0  # nothing held while the client reads
+    resp.close()
+
+
+def _add_undated(user_id, count):
+    """Mood entries and suggestions with NULL dates, as older rows may have. Returns their IDs."""
+    ids = {"MoodEntryID": [], "SuggestionID": []}
+    conn = make.get_db_connection()
+    cursor = conn.cursor()
+    try:
+        for _ in range(count):
+            cursor.execute("INSERT INTO moodentry (UserID, MoodCategoryID, MoodIntensity, DateTime) "
+                           "VALUES (%s, 'MD01', 5, NULL)", (user_id,))
+            ids["MoodEntryID"].append(cursor.lastrowid)
+            cursor.execute("INSERT INTO foodsuggestion (MoodEntryID, UserID, FoodID, MoodCategoryID, SuggestedDate) "
+                           "VALUES (%s, %s, 'F001', 'MD01', NULL)", (cursor.lastrowid, user_id))
+            ids["SuggestionID"].append(cursor.lastrowid)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    return ids
+
+
+@pytest.mark.parametrize("url,id_field", [("/moodentry?userId={}", "MoodEntryID"),
+                                          ("/foodsugg_history?userId={}", "SuggestionID")])
+def test_null_dated_rows_page_and_stream_last(client, dataset, monkeypatch, url, id_field):
+    monkeypatch.setattr(make, "STREAM_FETCH_SIZE", 5)
+    user_id = dataset["user_ids"][0]
+    undated = _add_undated(user_id, 8)[id_field]
+    url = url.format(user_id)
+
+    streamed = client.get(url).get_json()
+
+    assert streamed == _paged(client, url)
+    ids = [item[id_field] for item in streamed]
+    assert len(ids) == len(set(ids)) > 8
+    assert ids[-8:] == sorted(undated, reverse=True)  # after every dated row, newest ID first
@@ -0,0 +1,48 @@
+import logging
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+import make
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code):
+    return subprocess.run([sys.executable, "-c", textwrap.dedent(code)], cwd=REPO,
+                          capture_output=True, text=True, timeout=60)
+
+
+def test_setup_logging_is_idempotent():
+    listener = make.setup_logging()
+
+    assert make.setup_logging() is listener
+    queue_handlers = [h for h in make.log.handlers if isinstance(h, logging.handlers.QueueHandler)]
+    assert len(queue_handlers) == 1
+
+
+def test_importing_make_is_enough_to_log():
+    # What waitress-serve make:app does: import the module, never call main()
+    result = _run("""
+        import make
+        make.http_log.warning("logged without main()")
+    """)
+    assert "WARNING foodmood.http" in result.stderr
+    assert "logged without main()" in result.stderr
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_gets_its_own_listener():
+    result = _run("""
+        import os, sys
+        import make
+        pid = os.fork()
+        if pid == 0:
+            make.http_log.warning("from the child")
+            sys.exit(0)
+        os.waitpid(pid, 0)
+    """)
+    assert "from the child" in result.stderr
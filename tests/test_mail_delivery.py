@@ -0,0 +1,74 @@
+import smtplib
+
+import pytest
+
+import make
+
+
+class FakeSMTP:
+    """Stands in for smtplib.SMTP. Class attributes script the behaviour."""
+    fail_login = 0      # next N sessions fail to log in with a 535
+    fail_send = []      # exceptions raised by the next send_message() calls
+    sent = []
+
+    def __init__(self, host, port, timeout=None):
+        self.closed = False
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        if FakeSMTP.fail_login:
+            FakeSMTP.fail_login -= 1
+            raise smtplib.SMTPAuthenticationError(535, b"bad credentials")
+
+    def send_message(self, msg):
+        if FakeSMTP.fail_send:
+            raise FakeSMTP.fail_send.pop(0)
+        FakeSMTP.sent.append(msg["To"])
+
+    def noop(self):
+        return (250, b"ok")
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def delivery(monkeypatch):
+    FakeSMTP.fail_login = 0
+    FakeSMTP.fail_send = []
+    FakeSMTP.sent = []
+    monkeypatch.setattr(make.smtplib, "SMTP", FakeSMTP)
+    monkeypatch.setattr(make, "SMTP_PASS", "secret")
+    monkeypatch.setattr(make, "SMTP_RETRY_BACKOFF", 0)
+    return make.MailDelivery(size=2, retries=2, noop_after=60)
+
+
+def test_failed_session_open_is_not_pooled(delivery):
+    FakeSMTP.fail_login = 1
+    assert delivery.send(make.reminder_message("a@example.com")) is False  # 535 is permanent
+    assert delivery.stats()["idle_sessions"] == 0
+
+    assert delivery.send(make.reminder_message("b@example.com")) is True
+    assert FakeSMTP.sent == ["b@example.com"]
+    assert delivery.stats()["idle_sessions"] == 1
+
+
+def test_transient_errors_are_retried_on_a_fresh_session(delivery):
+    FakeSMTP.fail_send = [smtplib.SMTPServerDisconnected("gone"),
+                          smtplib.SMTPResponseException(451, b"try later")]
+    assert delivery.send(make.reminder_message("a@example.com")) is True
+    stats = delivery.stats()
+    assert stats["retried"] == 2 and stats["sessions_dropped"] == 1 and stats["sent"] == 1
+
+
+def test_unexpected_error_does_not_abort_the_batch(delivery):
+    FakeSMTP.fail_send = [RuntimeError("boom")]
+    emails = [f"u{i}@example.com" for i in range(5)]
+    assert delivery.send_many([make.reminder_message(e) for e in emails]) == 4
+    assert delivery.stats()["failed"] == 1
+    assert len(FakeSMTP.sent) == 4
@@ -0,0 +1,48 @@
+from collections import Counter
+
+import make
+
+
+def _raw_counts(user_id=None):
+    conn = make.get_db_connection()
+    cursor = conn.cursor()
+    try:
+        sql = "SELECT UPPER(TRIM(MoodCategoryID)) FROM moodentry WHERE DATE(DateTime) = CURDATE()"
+        params = ()
+        if user_id:
+            sql += " AND UserID = %s"
+            params = (user_id,)
+        cursor.execute(sql, params)
+        return dict(Counter(row[0] for row in cursor.fetchall()))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _save(client, user_id, mood):
+    return client.post("/save_mood", json={"userID": user_id, "moodCategoryID": mood, "moodIntensity": 5}).get_json()
+
+
+def test_all_users_summary_is_summed_from_the_per_user_rollup(client, dataset):
+    make.backfill_mood_rollup()
+    first, second = dataset["user_ids"][:2]
+    for user_id, mood in [(first, "MD01"), (first, "MD01"), (second, "MD01"), (second, "MD02")]:
+        assert _save(client, user_id, mood)["success"]
+
+    summary = client.get("/moodsummary?days=1").get_json()
+    assert summary["counts"] == _raw_counts()
+    assert summary["total"] == sum(_raw_counts().values())
+    assert client.get(f"/moodsummary?days=1&userId={first}").get_json()["counts"] == _raw_counts(first)
+
+
+def test_save_mood_works_without_the_rollup_table(client, dataset):
+    conn = make.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE mood_daily_user")
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+    user_id = dataset["user_ids"][0]
+    assert _save(client, user_id, "MD01")["success"]
+    assert _raw_counts(user_id).get("MD01", 0) >= 1
@@ -0,0 +1,66 @@
+import datetime
+import threading
+
+import pytest
+
+import make
+
+
+def test_stop_timeout_keeps_the_thread_and_blocks_a_second_start():
+    scheduler = make.ReminderScheduler(reconcile=60, tail_poll=5, heap_max=100)
+    release = threading.Event()
+    runs = []
+
+    def run(stop):
+        runs.append(stop)
+        release.wait(5)  # a send that outlasts stop()'s join
+        stop.wait(5)
+
+    scheduler._run = run
+    scheduler.start()
+
+    assert scheduler.stop(timeout=0.05) is False
+    assert scheduler.running
+    with pytest.raises(RuntimeError):
+        scheduler.start()
+    assert len(runs) == 1
+
+    release.set()
+    assert scheduler.stop(timeout=5) is True
+    assert not scheduler.running
+
+    scheduler.start()
+    assert len(runs) == 2
+    assert scheduler.stop(timeout=5) is True
+
+
+def _insert_notification(notification_id, remind_time):
+    conn = make.get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO notifications (NotificationID, Email, RemindTime, CreatedAt, SentFlag, Frequency)
+            VALUES (%s, 'late@example.com', %s, NOW(), 0, 'once')
+        """, (notification_id, remind_time))
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def test_tail_picks_up_a_lower_id_that_commits_late(dataset):
+    scheduler = make.ReminderScheduler(reconcile=300, tail_poll=5, heap_max=100)
+    scheduler._load()
+    soon = datetime.datetime.now() + datetime.timedelta(seconds=30)
+
+    high = scheduler._last_id + 5
+    _insert_notification(high, soon)
+    scheduler._tail()
+    # An insert that took ID high - 2 earlier but commits only now
+    _insert_notification(high - 2, soon)
+    scheduler._tail()
+    scheduler._tail()
+
+    queued = [notification_id for _, notification_id in scheduler._heap]
+    assert queued.count(high) == 1
+    assert queued.count(high - 2) == 1
@@ -0,0 +1,66 @@
+import csv
+import datetime
+import io
+from collections import Counter
+
+import make
+
+START, END = datetime.date(2020, 1, 1), datetime.date(2030, 1, 1)
+URL = "/report_export?format=csv&userId={}&start=2020-01-01&end=2029-12-31"
+
+
+def _add_meals(user_id, rows):
+    conn = make.get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.executemany(
+            "INSERT INTO user_eaten (UserID, FoodID, EatenDateTime, FeelBetter) VALUES (%s, %s, %s, %s)",
+            [(user_id,) + row for row in rows],
+        )
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _expected(user_id):
+    conn = make.get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(make.REPORT_TABLE_SQL, (user_id, START, END))
+        rows = [make.report_table_row(row) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+    return [[r["foodName"], r["dateTime"], r["moodBefore"], r["moodAfter"]] for r in rows]
+
+
+def test_csv_pages_keep_every_row_across_timestamp_ties(client, dataset, monkeypatch):
+    monkeypatch.setattr(make, "STREAM_FETCH_SIZE", 3)
+    user_id = dataset["user_ids"][0]
+    tie = datetime.datetime(2025, 3, 1, 12, 0)
+    # Seven meals at one timestamp (more than a page), two of them identical
+    _add_meals(user_id, [("F001", tie, "MD01")] * 2 + [("F002", tie, "MD02"), ("F003", tie, None),
+                                                        ("F004", tie, "1"), ("F005", tie, "MD03"),
+                                                        ("F006", tie, "MD04")])
+
+    resp = client.get(URL.format(user_id))
+    rows = list(csv.reader(io.StringIO(resp.get_data(as_text=True))))
+
+    assert rows[0] == make.REPORT_CSV_HEADER
+    expected = _expected(user_id)
+    assert len(expected) > 7
+    assert Counter(map(tuple, rows[1:])) == Counter(map(tuple, expected))
+    assert [row[1] for row in rows[1:]] == [row[1] for row in expected]  # newest first
+
+
+def test_csv_download_holds_no_connection_between_pages(client, dataset, monkeypatch):
+    monkeypatch.setattr(make, "STREAM_FETCH_SIZE", 2)
+    user_id = dataset["user_ids"][0]
+    _add_meals(user_id, [("F001", datetime.datetime(2025, 3, 1, 12, m), "MD01") for m in range(5)])
+
+    resp = client.get(URL.format(user_id))
+    body = resp.response
+    next(body)                                  # header + first page
+    assert make.db_pool.stats()["in_use"] == 0  # nothing held while the client reads
+    resp.close()
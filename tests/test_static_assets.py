@@ -0,0 +1,55 @@
+import gzip
+import re
+
+import pytest
+
+import make
+
+
+@pytest.mark.parametrize("path", [
+    "/make.py",
+    "/gunicorn.conf.py",
+    "/requests.jsonl",
+    "/README.md",
+    "/FirebaseFunctions/functions/fetch_data.py",
+    "/FirebaseFunctions/functions/foodmooddb-firebase-adminsdk-fbsvc-57554975cb.json",
+    "/migrations/001_suggestion_filter_tables.sql",
+    "/deploy/nginx.conf",
+    "/bench/standin.py",
+    "/photo/../make.py",
+])
+def test_source_and_secrets_are_not_served(client, path):
+    assert client.get(path).status_code == 404
+
+
+def test_pages_point_at_fingerprinted_assets(client):
+    resp = client.get("/home.html")
+    assert resp.status_code == 200
+    html = resp.get_data(as_text=True)
+    assert 'href="styles.css"' not in html
+    css = re.search(r'href="(/assets/styles\.[0-9a-f]{10}\.css)"', html).group(1)
+
+    asset = client.get(css, headers={"Accept-Encoding": "gzip"})
+    assert asset.status_code == 200
+    assert asset.headers["Content-Encoding"] == "gzip"
+    assert "immutable" in asset.headers["Cache-Control"]
+    with open(make.os.path.join(make.APP_DIR, "styles.css"), "rb") as f:
+        assert gzip.decompress(asset.get_data()) == f.read()
+
+    again = client.get(css, headers={"If-None-Match": asset.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_script_imports_the_hashed_firebase_config(client):
+    urls = make.static_assets.urls()
+    body = client.get(urls["script.js"]).get_data(as_text=True)
+    assert urls["firebaseConfig.js"] in body
+    assert "./firebaseConfig.js" not in body
+
+
+def test_images_photos_and_plain_asset_urls_still_work(client):
+    assert client.get("/photo/foodmood_logo_icon_copy-removebg-preview.png").status_code == 200
+    assert client.get("/images/F001.jpg").status_code == 200
+    plain = client.get("/styles.css")
+    assert plain.status_code == 200 and plain.headers["Cache-Control"] == "no-cache"
+    assert client.get("/").status_code == 200
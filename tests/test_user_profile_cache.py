@@ -0,0 +1,70 @@
+import datetime
+
+import pytest
+
+import make
+
+
+@pytest.fixture
+def cursor(dataset):
+    conn = make.get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    yield cursor
+    cursor.close()
+    conn.close()
+
+
+def test_repeat_lookups_skip_the_users_query(cursor, dataset):
+    cache = make.UserProfileCache(maxsize=10, poll=3600)
+    user_id = dataset["user_ids"][0]
+
+    first = cache.get(cursor, user_id)
+    assert cache.get(cursor, user_id) is first
+    assert cache.get(cursor, "no-such-user") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+
+
+def test_user_changes_row_drops_the_cached_profile(cursor, dataset):
+    cache = make.UserProfileCache(maxsize=10, poll=0)
+    user_id = dataset["user_ids"][0]
+    cursor.execute("UPDATE users SET height = 170 WHERE UserID = %s", (user_id,))
+    before = cache.get(cursor, user_id).bmi
+
+    # Edited without a change-log row: the cache doesn't notice
+    cursor.execute("UPDATE users SET weight = 100 WHERE UserID = %s", (user_id,))
+    assert cache.get(cursor, user_id).bmi == before
+
+    # fetch_data.py logs every upsert/delete, so the next check drops the entry
+    cursor.execute("INSERT INTO user_changes (UserID, ChangedAt) VALUES (%s, NOW())", (user_id,))
+    assert cache.get(cursor, user_id).bmi == pytest.approx(100 / 1.7 ** 2)
+    assert cache.stats()["invalidated"] >= 1
+
+
+def test_cache_is_bounded(cursor, dataset):
+    cache = make.UserProfileCache(maxsize=2, poll=3600)
+    for user_id in dataset["user_ids"][:3]:
+        cache.get(cursor, user_id)
+
+    assert cache.stats()["entries"] == 2
+
+
+def test_age_is_worked_out_at_use_time():
+    profile = make.UserProfile({"birthday": datetime.date(2000, 6, 15), "weight": 60, "height": 170,
+                                "bloodType": "a+", "allergies": ""})
+
+    assert profile.age(datetime.date(2025, 6, 14)) == 24
+    assert profile.age(datetime.date(2025, 6, 15)) == 25
+
+
+def test_missing_change_log_drops_the_cache_instead_of_failing(cursor, dataset):
+    cache = make.UserProfileCache(maxsize=10, poll=0)
+    user_id = dataset["user_ids"][0]
+    cursor.execute("UPDATE users SET height = 170 WHERE UserID = %s", (user_id,))
+    cache.get(cursor, user_id)
+    cursor.execute("DROP TABLE user_changes")
+
+    cursor.execute("UPDATE users SET weight = 100 WHERE UserID = %s", (user_id,))
+    assert cache.get(cursor, user_id).bmi == pytest.approx(100 / 1.7 ** 2)
+    assert cache.stats()["poll_errors"] == 1